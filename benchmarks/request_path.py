@@ -0,0 +1,239 @@
+"""Measure the cost of the request path: adapter, plugins and controller call.
+
+Requests are sent through an in-process ASGI client, so no network is involved.
+Results can be saved as a baseline and later runs compared against it, failing
+when latency regressed by more than the tolerance.
+
+Usage: python -m benchmarks.request_path [--adapter fastapi|asgi] [--requests 5000]
+       [--limits 3] [--routes 1000] [--save baseline.json] [--compare baseline.json] [--tolerance 0.1]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import NamedTuple
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.base_adapter import BaseAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, ControllerMeta, get
+from my_web_framework.instrumentation import MetricsCollector
+from my_web_framework.plugins.awesome import AwesomePlugin, awesome
+from my_web_framework.plugins.rate_limiter import RateLimiterPlugin, limit
+from tests.asgi_client import ASGIClient
+
+ADAPTERS: dict[str, type[BaseAdapter]] = {"fastapi": FastAPIAdapter, "asgi": ASGIAdapter}
+# Requests measured with tracemalloc, it slows requests down too much to run it with the others
+ALLOCATION_REQUESTS = 200
+STORAGE_URI = "async+sharded-memory://"
+
+
+class Scenario(NamedTuple):
+    api: SomeAPI
+    method: str
+    path: str
+    status: int
+
+
+class Result(NamedTuple):
+    requests_per_second: float
+    p50_us: float
+    p99_us: float
+    allocated_kib: float
+
+
+def _bare(adapter: type[BaseAdapter], _: argparse.Namespace) -> Scenario:
+    class BareController(BaseController):
+        @get("/bare/{name}")
+        async def bare(self, name: str) -> str:
+            return f"Hello {name}!"
+
+    api = SomeAPI("Benchmark", "1", adapter=adapter)
+    api.mount(BareController())
+    return Scenario(api, "GET", "/bare/bob", 200)
+
+
+def _limits(adapter: type[BaseAdapter], args: argparse.Namespace) -> Scenario:
+    def handler(self, name: str) -> str:  # noqa: ANN001
+        return f"Hello {name}!"
+
+    async def limited(self, name: str) -> str:  # noqa: ANN001
+        return handler(self, name)
+
+    # Limits are high enough to never reject requests
+    for i in range(args.limits):
+        limited = limit(f"{10_000_000 + i}/hour", key=lambda name: name)(limited)
+    controller = ControllerMeta("LimitedController", (BaseController,), {"limited": get("/limited/{name}")(limited)})
+
+    # The plain memory storage keeps an entry per hit and expires them in a background
+    # task, which would make the measurement depend on the number of requests sent
+    api = SomeAPI("Benchmark", "1", plugins=[RateLimiterPlugin(STORAGE_URI)], adapter=adapter)
+    api.mount(controller())
+    return Scenario(api, "GET", "/limited/bob", 200)
+
+
+def _awesome(adapter: type[BaseAdapter], _: argparse.Namespace) -> Scenario:
+    class AwesomeController(BaseController):
+        @get("/awesome/{name}")
+        @awesome()
+        async def awesome(self, name: str) -> str:
+            return f"Hello {name}!"
+
+    api = SomeAPI("Benchmark", "1", plugins=[AwesomePlugin()], adapter=adapter)
+    api.mount(AwesomeController())
+    return Scenario(api, "GET", "/awesome/bob", 200)
+
+
+def _instrumented(adapter: type[BaseAdapter], _: argparse.Namespace) -> Scenario:
+    class InstrumentedController(BaseController):
+        @get("/instrumented/{name}")
+        @awesome()
+        async def instrumented(self, name: str) -> str:
+            return f"Hello {name}!"
+
+    api = SomeAPI("Benchmark", "1", plugins=[AwesomePlugin()], adapter=adapter, instrumentation=MetricsCollector())
+    api.mount(InstrumentedController())
+    return Scenario(api, "GET", "/instrumented/bob", 200)
+
+
+def _rejected(adapter: type[BaseAdapter], _: argparse.Namespace) -> Scenario:
+    class RejectedController(BaseController):
+        @get("/rejected/{name}")
+        @limit("1/hour", key=lambda name: name)
+        async def rejected(self, name: str) -> str:
+            return f"Hello {name}!"
+
+    api = SomeAPI("Benchmark", "1", plugins=[RateLimiterPlugin(STORAGE_URI)], adapter=adapter)
+    api.mount(RejectedController())
+    return Scenario(api, "GET", "/rejected/bob", 429)
+
+
+def _many_routes(adapter: type[BaseAdapter], args: argparse.Namespace) -> Scenario:
+    async def handler(self, item_id: str) -> str:  # noqa: ANN001
+        return item_id
+
+    attrs = {
+        f"route{i}": get(f"/resource{i}/{{item_id}}")(
+            # Each endpoint needs a function of its own to carry its annotations
+            type(handler)(handler.__code__, handler.__globals__, f"route{i}"),
+        )
+        for i in range(args.routes)
+    }
+    controller = ControllerMeta("ManyRoutesController", (BaseController,), attrs)
+
+    api = SomeAPI("Benchmark", "1", adapter=adapter)
+    api.mount(controller(), "/v1")
+    return Scenario(api, "GET", f"/v1/resource{args.routes - 1}/123", 200)
+
+
+SCENARIOS: dict[str, Callable[[type[BaseAdapter], argparse.Namespace], Scenario]] = {
+    "bare": _bare,
+    "limits": _limits,
+    "awesome": _awesome,
+    "instrumented": _instrumented,
+    "rejected": _rejected,
+    "many-routes": _many_routes,
+}
+
+
+async def _run(scenario: Scenario, requests: int) -> Result:
+    client = ASGIClient(scenario.api)
+
+    async def request() -> None:
+        response = await client.request(scenario.method, scenario.path)
+        if response.status != scenario.status:
+            msg = f"Expected {scenario.status} for {scenario.path}, got {response.status}: {response.body!r}"
+            raise RuntimeError(msg)
+
+    async with client.lifespan():
+        # Warm up, it also consumes the limit of the rejection scenario
+        for _ in range(max(10, requests // 10)):
+            await client.request(scenario.method, scenario.path)
+
+        latencies = []
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            request_started_at = time.perf_counter_ns()
+            await request()
+            latencies.append(time.perf_counter_ns() - request_started_at)
+        elapsed = time.perf_counter() - started_at
+
+        tracemalloc.start()
+        allocated = 0
+        for _ in range(ALLOCATION_REQUESTS):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await request()
+            allocated += tracemalloc.get_traced_memory()[1] - current
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return Result(
+        requests / elapsed,
+        quantiles[49] / 1000,
+        quantiles[98] / 1000,
+        allocated / ALLOCATION_REQUESTS / 1024,
+    )
+
+
+def _compare(results: dict[str, Result], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    # Only the median is compared, tail latency of a few thousand requests is too noisy
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is not None and result.p50_us > previous["p50_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_us']:.1f}us -> {result.p50_us:.1f}us")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    # Mount records are not part of the measurement
+    logging.getLogger("my_web_framework").setLevel(logging.ERROR)
+    adapters = [args.adapter] if args.adapter else list(ADAPTERS)
+    baseline = json.loads(open(args.compare).read()) if args.compare else {}  # noqa: PTH123, SIM115
+
+    print(f"{'scenario':>22} {'req/s':>9} {'p50 (us)':>9} {'p99 (us)':>9} {'KiB/req':>8} {'vs baseline':>12}")
+    results: dict[str, Result] = {}
+    for adapter in adapters:
+        for name, factory in SCENARIOS.items():
+            scenario = factory(ADAPTERS[adapter], args)
+            result = await _run(scenario, args.requests)
+
+            key = f"{adapter}/{name}"
+            results[key] = result
+            change = f"{result.p50_us / baseline[key]['p50_us'] - 1:+.1%}" if key in baseline else ""
+            print(
+                f"{key:>22} {result.requests_per_second:>9.0f} {result.p50_us:>9.1f}"
+                f" {result.p99_us:>9.1f} {result.allocated_kib:>8.1f} {change:>12}",
+            )
+
+    if args.save:
+        with open(args.save, "w") as f:  # noqa: PTH123
+            json.dump({name: result._asdict() for name, result in results.items()}, f, indent=2)
+
+    regressions = _compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def _arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--adapter", choices=list(ADAPTERS), help="run scenarios with one adapter only")
+    parser.add_argument("--requests", type=int, default=5_000, help="measured requests per scenario")
+    parser.add_argument("--limits", type=int, default=3, help="number of limit annotations of the endpoint")
+    parser.add_argument("--routes", type=int, default=1_000, help="number of mounted routes")
+    parser.add_argument("--save", help="save results as a baseline to this file")
+    parser.add_argument("--compare", help="compare results with the baseline in this file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed p50 latency increase")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(_arguments())))
@@ -0,0 +1,73 @@
+"""Compare route lookup cost of the framework router with a linear regex scan.
+
+Usage: python -m benchmarks.router
+"""
+import random
+import timeit
+
+from starlette.routing import compile_path
+
+from my_web_framework.routing import Router
+
+ROUTE_COUNTS = (10, 100, 1_000, 5_000)
+LOOKUPS = 2_000
+
+
+def _templates(count: int) -> list[str]:
+    # Mix of static routes and routes with parameters, similar to controller mounts
+    templates = []
+    for i in range(count):
+        match i % 3:
+            case 0:
+                templates.append(f"/v1/resource{i}")
+            case 1:
+                templates.append(f"/v1/resource{i}/{{item_id}}")
+            case _:
+                templates.append(f"/v1/resource{i}/{{item_id}}/children/{{child_id}}")
+    return templates
+
+
+def _paths(templates: list[str]) -> list[str]:
+    rng = random.Random(42)
+    return [
+        rng.choice(templates).replace("{item_id}", "123").replace("{child_id}", "abc")
+        for _ in range(LOOKUPS)
+    ]
+
+
+def _bench_router(templates: list[str], paths: list[str]) -> float:
+    router: Router[str] = Router()
+    for template in templates:
+        router.add(template, {"GET"}, template)
+
+    def run() -> None:
+        for path in paths:
+            router.match("GET", path)
+
+    return min(timeit.repeat(run, number=1, repeat=5)) / len(paths)
+
+
+def _bench_linear(templates: list[str], paths: list[str]) -> float:
+    patterns = [compile_path(template)[0] for template in templates]
+
+    def run() -> None:
+        for path in paths:
+            for pattern in patterns:
+                if pattern.match(path):
+                    break
+
+    return min(timeit.repeat(run, number=1, repeat=3)) / len(paths)
+
+
+def main() -> None:
+    print(f"{'routes':>8} {'router (us)':>12} {'linear scan (us)':>17}")
+    for count in ROUTE_COUNTS:
+        templates = _templates(count)
+        paths = _paths(templates)
+        router = _bench_router(templates, paths) * 1e6
+        linear = _bench_linear(templates, paths) * 1e6
+        print(f"{count:>8} {router:>12.2f} {linear:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Check that worker processes enforce a limit together through shared memory storage.
+
+Each process hits the same keys concurrently, the total number of admitted hits
+has to match the limit exactly.
+
+Usage: python -m benchmarks.shared_memory [processes] [hits per process]
+"""
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from limits import parse
+from limits.aio.strategies import MovingWindowRateLimiter
+from limits.storage import storage_from_string
+
+from my_web_framework.plugins.rate_limiter import storages  # noqa: F401
+
+LIMIT = parse("1000/hour")
+KEYS = ("a", "b", "c")
+
+
+def _worker(uri: str, hits: int, results: multiprocessing.Queue) -> None:
+    async def run() -> tuple[int, float]:
+        limiter = MovingWindowRateLimiter(storage_from_string(uri))
+        admitted = 0
+        started = time.perf_counter()
+        for i in range(hits):
+            admitted += await limiter.hit(LIMIT, KEYS[i % len(KEYS)])
+        return admitted, hits / (time.perf_counter() - started)
+
+    results.put(asyncio.run(run()))
+
+
+def main(processes: int, hits: int) -> None:
+    results: multiprocessing.Queue = multiprocessing.Queue()
+
+    # Kept in memory on Linux, like applications are expected to do
+    shm = Path("/dev/shm")  # noqa: S108
+    with tempfile.TemporaryDirectory(dir=shm if shm.is_dir() else None) as directory:
+        uri = f"async+shared-memory:///limits?stripes=64&slots=4096&directory={directory}"
+        workers = [multiprocessing.Process(target=_worker, args=(uri, hits, results)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    admitted = sum(admitted for admitted, _ in outcomes)
+    expected = min(processes * hits, LIMIT.amount * len(KEYS))
+    throughput = sum(throughput for _, throughput in outcomes)
+
+    print(f"{processes} processes, {hits} hits each, limit {LIMIT} for {len(KEYS)} keys")
+    print(f"admitted {admitted}, expected {expected}, {throughput:.0f} hits/s in total")
+    sys.exit(0 if admitted == expected else 1)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5_000,
+    )
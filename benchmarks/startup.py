@@ -0,0 +1,89 @@
+"""Measure import time and mount time of applications with a growing number of endpoints.
+
+Endpoints are mounted once without a mount plan, then again with the plan saved by the
+first run, as an application would on its next startup.
+
+Usage: python -m benchmarks.startup
+"""
+import gc
+import logging
+import subprocess
+import sys
+import time
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.base_adapter import BaseAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, ControllerMeta, get
+from my_web_framework.mount_plan import MountPlan
+from my_web_framework.plugins.rate_limiter import RateLimiterPlugin, limit
+
+ENDPOINT_COUNTS = (100, 500, 1_000)
+ADAPTERS: dict[str, type[BaseAdapter]] = {"fastapi": FastAPIAdapter, "asgi": ASGIAdapter}
+REPEAT = 3
+IMPORTS = (
+    "my_web_framework.api",
+    "my_web_framework.adapters.fastapi_adapter",
+    "my_web_framework.plugins.rate_limiter",
+)
+
+
+def _import_time(module: str) -> float:
+    # Modules are imported by a fresh interpreter, so nothing is imported yet
+    code = f"import time; started_at = time.perf_counter(); import {module}; print(time.perf_counter() - started_at)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, text=True)  # noqa: S603
+    return float(result.stdout)
+
+
+def _controller(endpoints: int) -> type[BaseController]:
+    async def handler(self, item_id: str, page: int = 1) -> str:  # noqa: ANN001
+        return item_id
+
+    attrs = {}
+    for i in range(endpoints):
+        # Each endpoint needs a function of its own to carry its annotations
+        method = type(handler)(handler.__code__, handler.__globals__, f"route{i}", handler.__defaults__)
+        method.__annotations__ = handler.__annotations__
+        method.__qualname__ = f"StartupController.route{i}"
+        if i % 2 == 0:
+            method = limit("10/second", key=lambda item_id: item_id)(method)
+        attrs[f"route{i}"] = get(f"/resource{i}/{{item_id}}")(method)
+
+    return ControllerMeta("StartupController", (BaseController,), attrs)
+
+
+def _mount(adapter: type[BaseAdapter], controller: type[BaseController], plan: str | None) -> tuple[float, SomeAPI]:
+    # Best of a few runs, garbage of previous runs is collected upfront
+    best = float("inf")
+    for _ in range(REPEAT):
+        gc.collect()
+        started_at = time.perf_counter()
+        api = SomeAPI(
+            "Benchmark", "1", plugins=[RateLimiterPlugin()], adapter=adapter,
+            mount_plan=MountPlan.loads(plan) if plan is not None else None,
+        )
+        api.mount(controller(), "/v1")
+        best = min(best, time.perf_counter() - started_at)
+    return best, api
+
+
+def main() -> None:
+    # Mount records are not part of the measurement
+    logging.getLogger("my_web_framework").setLevel(logging.ERROR)
+
+    for module in IMPORTS:
+        print(f"import {module}: {_import_time(module) * 1000:.0f} ms")
+    print()
+
+    print(f"{'adapter':>8} {'endpoints':>10} {'mount (ms)':>11} {'with plan (ms)':>15}")
+    for name, adapter in ADAPTERS.items():
+        for endpoints in ENDPOINT_COUNTS:
+            controller = _controller(endpoints)
+            cold, api = _mount(adapter, controller, None)
+            planned, _ = _mount(adapter, controller, api.mount_plan.dumps())
+            print(f"{name:>8} {endpoints:>10} {cold * 1000:>11.0f} {planned * 1000:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
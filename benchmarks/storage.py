@@ -0,0 +1,57 @@
+"""Compare memory use and throughput of in-memory rate limit storages.
+
+Usage: python -m benchmarks.storage [number of keys]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from limits import parse
+from limits.aio.storage import MemoryStorage, Storage
+from limits.aio.strategies import MovingWindowRateLimiter
+
+from my_web_framework.plugins.rate_limiter.storages import ShardedMemoryStorage
+
+HITS_PER_KEY = 3
+
+
+async def _hit_keys(storage: Storage, keys: int) -> None:
+    limiter = MovingWindowRateLimiter(storage)
+    item = parse("10/minute")
+
+    for _ in range(HITS_PER_KEY):
+        for i in range(keys):
+            await limiter.hit(item, f"10.0.{i >> 16}.{i & 0xFFFF}")
+
+
+async def _throughput(storage: Storage, keys: int) -> float:
+    started = time.perf_counter()
+    await _hit_keys(storage, keys)
+    return keys * HITS_PER_KEY / (time.perf_counter() - started)
+
+
+async def _memory(storage: Storage, keys: int) -> float:
+    tracemalloc.start()
+    await _hit_keys(storage, keys)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return memory / 2**20
+
+
+async def main(keys: int) -> None:
+    storages = {
+        "MemoryStorage": MemoryStorage,
+        "ShardedMemoryStorage": lambda: ShardedMemoryStorage("async+sharded-memory://", max_entries=str(keys)),
+    }
+
+    print(f"{keys} keys, {HITS_PER_KEY} hits per key")
+    print(f"{'storage':>22} {'hits/s':>10} {'memory (MiB)':>13}")
+    for name, factory in storages.items():
+        throughput = await _throughput(factory(), keys)
+        memory = await _memory(factory(), keys)
+        print(f"{name:>22} {throughput:>10.0f} {memory:>13.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
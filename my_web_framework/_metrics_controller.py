@@ -0,0 +1,16 @@
+from starlette.responses import Response
+
+from my_web_framework.controller import BaseController, get
+from my_web_framework.instrumentation import PROMETHEUS_MEDIA_TYPE, MetricsCollector
+
+
+class MetricsController(BaseController):
+    """Serves the metrics of a collector to Prometheus, mount it like any other controller."""
+
+    def __init__(self, collector: MetricsCollector) -> None:
+        self.__collector = collector
+
+    @get("/metrics")
+    async def metrics(self) -> Response:
+        # Given as a header, starlette would append a charset of its own to the media type
+        return Response(self.__collector.render(), headers={"Content-Type": PROMETHEUS_MEDIA_TYPE})
@@ -0,0 +1,314 @@
+import inspect
+import logging
+import traceback
+import types
+import typing
+from collections.abc import Callable, Mapping, MutableMapping
+from typing import Any
+from urllib.parse import parse_qsl
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from my_web_framework.adapters.base_adapter import BaseAdapter
+from my_web_framework.controller import BaseController, Endpoint
+from my_web_framework.encoders import Encoder
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE, HttpException, problem_content
+from my_web_framework.instrumentation import Instrumentation
+from my_web_framework.mount_plan import MountPlan, ParameterPlan
+from my_web_framework.plugins._base import Handler, Interceptor, Plugin, Send
+from my_web_framework.routing import MethodNotAllowedError, RouteNotFoundError, Router
+from my_web_framework.streaming import as_stream, send_stream
+
+logger = logging.getLogger(__name__)
+
+
+def _convert_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in {"1", "true", "yes", "on"}:
+        return True
+    if lowered in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(value)
+
+
+_CONVERTERS: Mapping[Any, Callable[[str], Any]] = {
+    inspect.Parameter.empty: str,
+    Any: str,
+    str: str,
+    int: int,
+    float: float,
+    bool: _convert_bool,
+}
+
+
+def _converter_for(annotation: Any) -> Callable[[str], Any]:
+    # Unwrap `X | None` and `Optional[X]`
+    if isinstance(annotation, types.UnionType) or typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+
+    try:
+        return _CONVERTERS[annotation]
+    except (KeyError, TypeError):
+        msg = f"Unsupported parameter type {annotation!r}, only str, int, float and bool are supported"
+        raise ValueError(msg) from None
+
+
+class _Parameter:
+    __slots__ = ("name", "converter", "default", "required", "in_path")
+
+    def __init__(self, parameter: ParameterPlan, annotation: Any) -> None:
+        self.name = parameter.name
+        self.converter = _converter_for(annotation)
+        self.default = parameter.default
+        self.required = parameter.required
+        self.in_path = parameter.in_path
+
+
+_INTERNAL_ERROR_HEADERS = {"Content-Type": PROBLEM_MEDIA_TYPE}
+_INTERNAL_ERROR_CONTENT = problem_content(500, "Internal server error", "The request could not be handled")
+
+
+def _error(status_code: int, detail: Any, headers: Mapping[str, str] | None = None) -> HttpException:
+    return HttpException(
+        status_code=status_code,
+        headers={"Content-Type": "application/json", **(headers or {})},
+        content={"detail": detail},
+    )
+
+
+class _Route:
+    """A single mounted endpoint with its parameter converters computed upfront."""
+
+    def __init__(
+        self,
+        path: str,
+        methods: set[str],
+        handler: Callable,
+        expects_request: bool,
+        parameters: list[_Parameter],
+    ) -> None:
+        self.path = path
+        self.methods = frozenset(methods)
+        self.handler = handler
+        # Handler compiled with plugins, `None` if no plugins apply to the endpoint
+        self.call: Handler | None = None
+        self.interceptors: tuple[Interceptor, ...] = ()
+        self.expects_request = expects_request
+        self.parameters = parameters
+
+    def bind(self, path_params: Mapping[str, str], query_string: bytes) -> dict[str, Any]:
+        query_params = dict(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)) if query_string else {}
+        kwargs: dict[str, Any] = {}
+        errors = []
+
+        for parameter in self.parameters:
+            source = path_params if parameter.in_path else query_params
+            raw = source.get(parameter.name)
+
+            if raw is None:
+                if parameter.required:
+                    errors.append(
+                        {
+                            "loc": ["path" if parameter.in_path else "query", parameter.name],
+                            "msg": "field required",
+                        },
+                    )
+                else:
+                    kwargs[parameter.name] = parameter.default
+                continue
+
+            try:
+                kwargs[parameter.name] = parameter.converter(raw)
+            except ValueError:
+                errors.append(
+                    {
+                        "loc": ["path" if parameter.in_path else "query", parameter.name],
+                        "msg": f"value is not a valid {parameter.converter.__name__}",
+                    },
+                )
+
+        if errors:
+            raise _error(422, errors)
+
+        return kwargs
+
+
+class ASGIAdapter(BaseAdapter):
+    """Adapter that serves controllers directly over ASGI without an underlying framework."""
+
+    def __init__(
+        self,
+        title: str,
+        version: str,
+        encoder: Encoder | None = None,
+        instrumentation: Instrumentation | None = None,
+        mount_plan: MountPlan | None = None,
+    ) -> None:
+        super().__init__(encoder, instrumentation, mount_plan)
+        self.__title = title
+        self.__version = version
+        self.__router: Router[_Route] = Router()
+        self.__event_handlers: dict[str, list[Callable[..., Any]]] = {
+            "startup": [],
+            "shutdown": [],
+        }
+
+    def _create_route(
+        self,
+        controller: BaseController,
+        endpoint: Endpoint,
+        path: str,
+        plugins: list[Plugin],
+    ) -> _Route:
+        handler = self._endpoint_handler(controller, endpoint)
+        logger.info("Mounting controller endpoint at %s %s%s", endpoint.methods, path, endpoint.path)
+        plan = self._endpoint_plan(controller, endpoint, handler, path, plugins)
+        supported_plugins = self._planned_plugins(plan, endpoint, plugins)
+
+        if supported_plugins:
+            logger.info("The following plugins apply to the endpoint: %s", supported_plugins)
+
+        # Endpoints are named by their handler in metrics and spans
+        name = endpoint.handler.__qualname__
+        # Plans do not keep types, converters are looked up from annotations of the handler,
+        # which are strings in modules using `from __future__ import annotations`
+        annotations = typing.get_type_hints(endpoint.handler)
+        parameters = [
+            _Parameter(parameter, annotations.get(parameter.name, inspect.Parameter.empty))
+            for parameter in plan.parameters
+        ]
+        route = _Route(path + endpoint.path, endpoint.methods, handler, plan.expects_request, parameters)
+        route.call = self._compile_handler(handler, route.expects_request, supported_plugins, name)
+        route.interceptors = self._compile_interceptors(supported_plugins, name)
+        return route
+
+    def mount_controller(
+        self, controller: BaseController, path: str, plugins: list[Plugin],
+    ) -> None:
+        logger.info("Mounting controller at %s", path or "/")
+
+        for endpoint in controller.endpoints():
+            route = self._create_route(controller, endpoint, path, plugins)
+            self.__router.add(route.path, route.methods, route)
+
+    def _match(self, method: str, path: str) -> tuple[_Route, dict[str, str]]:
+        try:
+            return self.__router.match(method, path)
+        except RouteNotFoundError:
+            raise _error(404, "Not Found") from None
+        except MethodNotAllowedError as e:
+            # HEAD requests are answered by GET handlers, without the body
+            if "GET" in e.allowed:
+                if method == "HEAD":
+                    return self.__router.match("GET", path)
+                allowed = e.allowed | {"HEAD"}
+            else:
+                allowed = e.allowed
+            raise _error(405, "Method Not Allowed", {"Allow": ", ".join(sorted(allowed))}) from None
+
+    async def _handle(self, route: _Route, request: Request, path_params: Mapping[str, str]) -> Any:
+        kwargs = route.bind(path_params, request.scope["query_string"])
+
+        if route.call is not None:
+            return await route.call(request, kwargs)
+
+        if route.expects_request:
+            return await route.handler(request=request, **kwargs)
+
+        return await route.handler(**kwargs)
+
+    async def _http(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        try:
+            route, path_params = self._match(scope["method"], scope["path"])
+        except HttpException as e:
+            await _send_response(send, e.status_code, e.headers, e.content, self.encoder)
+            return
+
+        scope["path_params"] = path_params
+        if scope["method"] == "HEAD" and "HEAD" not in route.methods:
+            send = _without_body(send)
+        # The first plugin receives messages first
+        for interceptor in reversed(route.interceptors):
+            send = interceptor(request, send)
+
+        try:
+            result = await self._handle(route, request, path_params)
+        except HttpException as e:
+            await _send_response(send, e.status_code, e.headers, e.content, self.encoder)
+            return
+        except Exception:
+            logger.exception("Unhandled exception in %s %s", scope["method"], scope["path"])
+            await _send_response(send, 500, _INTERNAL_ERROR_HEADERS, _INTERNAL_ERROR_CONTENT, self.encoder)
+            return
+
+        if isinstance(result, Response):
+            await result(scope, receive, send)
+            return
+
+        # Generators and iterators are streamed chunk by chunk
+        stream = as_stream(result)
+        if stream is not None:
+            await send_stream(send, 200, stream, self.encoder)
+            return
+
+        # Handlers may return pre-serialized bytes
+        body = result if isinstance(result, bytes) else self.encoder.encode(result)
+        await _send_response(send, 200, {"Content-Type": self.encoder.media_type}, body, self.encoder)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            event = message["type"].removeprefix("lifespan.")
+            try:
+                for callback in self.__event_handlers.get(event, []):
+                    result = callback()
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception:  # noqa: BLE001
+                await send({"type": f"lifespan.{event}.failed", "message": traceback.format_exc()})
+            else:
+                await send({"type": f"lifespan.{event}.complete"})
+
+            if event == "shutdown":
+                return
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+
+    def add_event_handler(self, event: str, callback: Callable[..., None]):
+        self.__event_handlers[event].append(callback)
+
+
+def _without_body(send: Send) -> Send:
+    async def send_headers(message: MutableMapping[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            message = {**message, "body": b""}
+        await send(message)
+
+    return send_headers
+
+
+async def _send_response(
+    send, status_code: int, headers: Mapping[str, str], content: str | bytes | dict | None, encoder: Encoder,
+) -> None:
+    if content is None:
+        body = b""
+    elif isinstance(content, bytes):
+        body = content
+    elif isinstance(content, str):
+        body = content.encode("utf-8")
+    else:
+        body = encoder.encode(content)
+
+    raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+    raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
@@ -1,33 +1,379 @@
+import functools
+import inspect
+import logging
+import pickle
+import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from collections.abc import Callable, Mapping
+from collections.abc import Callable, Mapping, MutableMapping
+from typing import TYPE_CHECKING, Any
 
 from my_web_framework.annotations import Annotation
-from my_web_framework.controller import BaseController, Endpoint
-from my_web_framework.plugins._base import Plugin
+from my_web_framework.batching import BatchedAnnotation, batch_handler
+from my_web_framework.controller import BaseController, Endpoint, EndpointAnnotation
+from my_web_framework.encoders import Encoder, default_encoder
+from my_web_framework.instrumentation import FAST_BUCKETS, Histogram, Instrumentation
+from my_web_framework.mount_plan import EndpointPlan, MountPlan, ParameterPlan, endpoint_fingerprint
+from my_web_framework.offloading import OffloadAnnotation, OffloadExecutor
+from my_web_framework.plugins._base import Handler, Interceptor, Plugin, Send, Stage
+from my_web_framework.routing import path_parameters
+from my_web_framework.schema import merge_operation
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Annotations handled by adapters themselves rather than by plugins
+_FRAMEWORK_ANNOTATIONS = (EndpointAnnotation, BatchedAnnotation, OffloadAnnotation)
+
+
+def _generator_handler(handler: Callable) -> Callable:
+    # Adapters await handlers, the generator is returned and streamed like any other result
+    async def generator_handler(**kwargs: Any) -> Any:  # noqa: ANN401
+        return handler(**kwargs)
+
+    generator_handler.__signature__ = inspect.signature(handler)
+    return generator_handler
 
 
 class BaseAdapter(ABC):
+    def __init__(
+        self,
+        encoder: Encoder | None = None,
+        instrumentation: Instrumentation | None = None,
+        mount_plan: MountPlan | None = None,
+    ) -> None:
+        self.__encoder = encoder if encoder is not None else default_encoder()
+        self.__instrumentation = instrumentation
+        # Endpoints are recorded to the plan as they are mounted, valid ones are reused
+        self.__mount_plan = mount_plan if mount_plan is not None else MountPlan()
+        # Executors synchronous endpoints run on, by name
+        self.__executors: dict[str, OffloadExecutor] = {}
+
+    @property
+    def encoder(self) -> Encoder:
+        return self.__encoder
+
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        return self.__instrumentation
+
+    @property
+    def mount_plan(self) -> MountPlan:
+        return self.__mount_plan
+
+    @property
+    def executors(self) -> Mapping[str, OffloadExecutor]:
+        return self.__executors
+
+    def _endpoint_handler(self, controller: BaseController, endpoint: Endpoint) -> Callable:
+        handler = functools.partial(endpoint.handler, controller)
+
+        for annotation in endpoint.annotations:
+            if isinstance(annotation, BatchedAnnotation):
+                # Concurrent calls are grouped into calls of the batch method of the controller
+                return batch_handler(controller, endpoint.handler.__name__, handler, annotation)
+
+        if not endpoint.is_async:
+            return self._offload(controller, endpoint, handler)
+
+        if any(isinstance(annotation, OffloadAnnotation) for annotation in endpoint.annotations):
+            msg = f"Handler `{endpoint.handler.__qualname__}` runs on the event loop and cannot be offloaded"
+            raise ValueError(msg)
+
+        if inspect.isasyncgenfunction(endpoint.handler) or inspect.isgeneratorfunction(endpoint.handler):
+            return _generator_handler(handler)
+
+        return handler
+
+    def _executor(self, name: str, max_workers: int | None, *, processes: bool = False) -> OffloadExecutor:
+        executor = self.__executors.get(name)
+        if executor is None:
+            executor = self.__executors[name] = OffloadExecutor(name, max_workers, processes=processes)
+            self.add_event_handler("shutdown", executor.shutdown)
+        return executor
+
+    def _offload(self, controller: BaseController, endpoint: Endpoint, handler: Callable) -> Callable:
+        signature = inspect.signature(handler)
+        controller_name = type(controller).__qualname__
+
+        annotation = next((a for a in endpoint.annotations if isinstance(a, OffloadAnnotation)), None)
+        if annotation is not None:
+            if annotation.processes and "request" in signature.parameters:
+                msg = f"Handler `{endpoint.handler.__qualname__}` running in a process pool cannot expect request"
+                raise ValueError(msg)
+            if annotation.processes:
+                # Fail on mount rather than on the first request
+                try:
+                    pickle.dumps(handler)
+                except (pickle.PicklingError, TypeError, AttributeError) as error:
+                    msg = f"Handler `{endpoint.handler.__qualname__}` running in a process pool cannot be pickled"
+                    raise ValueError(msg) from error
+            executor = self._executor(
+                f"{controller_name}.{endpoint.handler.__name__}",
+                annotation.max_workers,
+                processes=annotation.processes,
+            )
+        elif controller.max_workers is not None:
+            executor = self._executor(controller_name, controller.max_workers)
+        else:
+            executor = self._executor("default", None)
+
+        async def offloaded_handler(**kwargs: Any) -> Any:
+            return await executor.run(handler, kwargs)
+
+        offloaded_handler.__signature__ = signature
+        return offloaded_handler
+
     def _supported_plugins(
         self, endpoint: Endpoint, plugins: list[Plugin],
-    ) -> Mapping[Plugin, list[Annotation]]:
-        supported_plugins: dict[Plugin, list[Annotation]] = defaultdict(list)
+    ) -> tuple[tuple[int, tuple[int, ...]], ...]:
+        """Indices of plugins that apply to the endpoint, with indices of their annotations."""
+        supported_plugins: dict[int, list[int]] = defaultdict(list)
+
+        logger.info("Found the following annotations: %s", endpoint.annotations)
+        for annotation_index, annotation in enumerate(endpoint.annotations):
+            if isinstance(annotation, _FRAMEWORK_ANNOTATIONS):
+                continue
 
-        print("INFO:     Found the following annotations:")
-        for annotation in endpoint.annotations:
-            print(f"INFO:       {annotation}")
             is_supported = False
-            for plugin in plugins:
+            for plugin_index, plugin in enumerate(plugins):
                 if plugin.is_supported_annotation(annotation):
                     is_supported = True
-                    supported_plugins[plugin].append(annotation)
+                    supported_plugins[plugin_index].append(annotation_index)
 
             if not is_supported:
-                print(
-                    f"WARN: No plugin available that supports annotation {annotation}",
+                logger.warning("No plugin available that supports annotation %s", annotation)
+
+        # Plugins are applied in the order they were given, global ones to every endpoint
+        return tuple(
+            (index, tuple(supported_plugins[index]))
+            for index, plugin in enumerate(plugins)
+            if index in supported_plugins or plugin.is_global()
+        )
+
+    def _endpoint_plan(
+        self,
+        controller: BaseController,
+        endpoint: Endpoint,
+        handler: Callable,
+        path: str,
+        plugins: list[Plugin],
+    ) -> EndpointPlan:
+        """Plugins and parameters of the endpoint, taken from the mount plan while it is valid."""
+        controller_type = type(controller)
+        key = f"{controller_type.__module__}.{controller_type.__qualname__}.{endpoint.handler.__name__} {path}"
+        fingerprint = endpoint_fingerprint(endpoint)
+
+        plan = self.__mount_plan.get(key, fingerprint, plugins)
+        if plan is not None:
+            return plan
+
+        signature = inspect.signature(handler)
+        parameters_in_path = set(path_parameters(path + endpoint.path))
+        plan = EndpointPlan(
+            fingerprint or "",
+            self._supported_plugins(endpoint, plugins),
+            "request" in signature.parameters,
+            tuple(
+                ParameterPlan(
+                    parameter.name,
+                    parameter.name in parameters_in_path,
+                    parameter.default is inspect.Parameter.empty,
+                    None if parameter.default is inspect.Parameter.empty else parameter.default,
                 )
+                for parameter in signature.parameters.values()
+                if parameter.name != "request"
+            ),
+        )
+
+        if fingerprint is not None:
+            self.__mount_plan.add(key, plan, plugins)
+        return plan
+
+    @staticmethod
+    def _planned_plugins(
+        plan: EndpointPlan, endpoint: Endpoint, plugins: list[Plugin],
+    ) -> Mapping[Plugin, list[Annotation]]:
+        return {
+            plugins[index]: [endpoint.annotations[annotation] for annotation in annotations]
+            for index, annotations in plan.plugins
+        }
+
+    @staticmethod
+    def _openapi_extra(plugins: Mapping[Plugin, list[Annotation]]) -> dict[str, Any] | None:
+        """OpenAPI metadata plugins add to the operation of the endpoint."""
+        operation: dict[str, Any] = {}
+        for plugin, annotations in plugins.items():
+            extra = plugin.openapi(annotations)
+            if extra is not None:
+                merge_operation(operation, extra)
+        return operation or None
+
+    @staticmethod
+    def _compile_pipeline(stages: list[Stage], handler: Handler) -> Handler:
+        if not stages:
+            return handler
+
+        if len(stages) == 1:
+            stage = stages[0]
+
+            async def pipeline(request: "Request", kwargs: dict[str, Any]) -> Any:
+                await stage(request, kwargs)
+                return await handler(request, kwargs)
+        else:
+            async def pipeline(request: "Request", kwargs: dict[str, Any]) -> Any:
+                for stage in stages:
+                    await stage(request, kwargs)
+                return await handler(request, kwargs)
+
+        return pipeline
+
+    def _compile_interceptors(
+        self, plugins: Mapping[Plugin, list[Annotation]], name: str,
+    ) -> tuple[Interceptor, ...]:
+        """Interceptors of the endpoint, the first plugin receives messages first."""
+        interceptors = tuple(
+            interceptor
+            for plugin, annotations in plugins.items()
+            if (interceptor := plugin.intercept(annotations)) is not None
+        )
+
+        if self.__instrumentation is None:
+            return interceptors
+
+        # Requests are timed until the last body chunk is sent, including interceptors of plugins
+        return self._request_timer(self.__instrumentation, name), *interceptors
+
+    @staticmethod
+    def _request_timer(instrumentation: Instrumentation, name: str) -> Interceptor:
+        # Histograms by method and status, created on first use
+        histograms: dict[tuple[str, int], Histogram] = {}
+
+        def interceptor(request: "Request", send: Send) -> Send:
+            started_at = time.perf_counter()
+            status = 500
+
+            async def timed_send(message: MutableMapping[str, Any]) -> None:
+                nonlocal status
+                await send(message)
+
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                elif not message.get("more_body", False):
+                    key = (request.method, status)
+                    histogram = histograms.get(key)
+                    if histogram is None:
+                        histogram = histograms[key] = instrumentation.histogram(
+                            "http_request_duration_seconds",
+                            "Time until the response of the request is sent",
+                            endpoint=name,
+                            method=request.method,
+                            status=str(status),
+                        )
+                    histogram.observe(time.perf_counter() - started_at)
+
+            return timed_send
+
+        return interceptor
+
+    def _timed(self, call: Callable, name: str, plugin: Plugin, phase: str) -> Callable:
+        """Record the duration of a stage or wrapper of a plugin."""
+        instrumentation = self.__instrumentation
+        if instrumentation is None:
+            return call
+
+        plugin_name = type(plugin).__name__
+        histogram = instrumentation.histogram(
+            "plugin_duration_seconds",
+            "Time spent in plugins, wrappers include the time of the handler they wrap",
+            FAST_BUCKETS,
+            endpoint=name,
+            plugin=plugin_name,
+            phase=phase,
+        )
+
+        if instrumentation.tracing:
+            attributes = {"endpoint": name, "plugin": plugin_name, "phase": phase}
+
+            async def traced(*args: Any) -> Any:
+                with instrumentation.span(f"{plugin_name}.{phase}", attributes):
+                    started_at = time.perf_counter()
+                    try:
+                        return await call(*args)
+                    finally:
+                        histogram.observe(time.perf_counter() - started_at)
+
+            return traced
+
+        async def timed(*args: Any) -> Any:
+            started_at = time.perf_counter()
+            try:
+                return await call(*args)
+            finally:
+                histogram.observe(time.perf_counter() - started_at)
+
+        return timed
+
+    def _traced(self, call: Handler, name: str) -> Handler:
+        """Record a span around the plugins and the handler of the endpoint."""
+        instrumentation = self.__instrumentation
+        if instrumentation is None or not instrumentation.tracing:
+            return call
+
+        attributes = {"endpoint": name}
+
+        async def traced(request: "Request", kwargs: dict[str, Any]) -> Any:
+            with instrumentation.span(name, {**attributes, "http.method": request.method}):
+                return await call(request, kwargs)
+
+        return traced
+
+    @staticmethod
+    def _bind(handler: Callable, expects_request: bool) -> Handler:
+        if expects_request:
+            # endpoint handler expects request parameter,
+            # we have to pass it explicitly here
+            async def call(request: "Request", kwargs: dict[str, Any]) -> Any:
+                return await handler(request=request, **kwargs)
+        else:
+            # otherwise pass declared parameters only
+            async def call(_: "Request", kwargs: dict[str, Any]) -> Any:
+                return await handler(**kwargs)
+
+        return call
+
+    def _compile_handler(
+        self,
+        handler: Callable,
+        expects_request: bool,
+        plugins: Mapping[Plugin, list[Annotation]],
+        name: str,
+    ) -> Handler | None:
+        """Chain plugin stages and wrappers with the endpoint handler.
+
+        Returns `None` if none of the plugins has anything to do for the endpoint
+        and the endpoint is not traced.
+        """
+        bound = call = self._bind(handler, expects_request)
+
+        # Plugins are applied like layers: the stage and wrapper of
+        # a plugin run within the wrappers of the plugins listed before it, so the
+        # first plugin is the outermost one. Consecutive stages are chained together.
+        stages: list[Stage] = []
+        for plugin, annotations in reversed(list(plugins.items())):
+            stage = plugin.compile(annotations)
+            if stage is not None:
+                stages.insert(0, self._timed(stage, name, plugin, "stage"))
+
+            wrapped = plugin.wrap(annotations, self._compile_pipeline(stages, call))
+            if wrapped is not None:
+                call = self._timed(wrapped, name, plugin, "wrap")
+                stages = []
 
-        return supported_plugins
+        call = self._traced(self._compile_pipeline(stages, call), name)
+        return None if call is bound else call
 
     @abstractmethod
     def mount_controller(
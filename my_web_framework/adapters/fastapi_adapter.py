@@ -1,109 +1,204 @@
 import functools
 import inspect
+import logging
 from collections.abc import Callable, Mapping
+from typing import Any
 
-from fastapi import APIRouter, FastAPI
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
 
 from my_web_framework.adapters.base_adapter import BaseAdapter
 from my_web_framework.annotations import Annotation
 from my_web_framework.controller import BaseController, Endpoint
+from my_web_framework.encoders import Encoder, default_encoder
 from my_web_framework.exceptions import HttpException
-from my_web_framework.plugins._base import Plugin
+from my_web_framework.instrumentation import Instrumentation
+from my_web_framework.mount_plan import MountPlan
+from my_web_framework.plugins._base import Interceptor, Plugin
+from my_web_framework.schema import SchemaDocument
+from my_web_framework.streaming import as_stream
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_URL = "/.well-known/schema-discovery"
+
+
+class _InterceptedRoute(APIRoute):
+    # Set on a subclass per endpoint, FastAPI creates routes from their class
+    interceptors: tuple[Interceptor, ...] = ()
+
+    async def handle(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        # The first plugin receives messages first
+        for interceptor in reversed(self.interceptors):
+            send = interceptor(request, send)
+        await super().handle(scope, receive, send)
+
+
+class _JSONableEncoder(Encoder):
+    """Falls back to `jsonable_encoder` for types only FastAPI knows how to serialize, e.g. pydantic models."""
+
+    def __init__(self, encoder: Encoder) -> None:
+        self.__encoder = encoder
+        self.media_type = encoder.media_type
+
+    def encode(self, value: Any) -> bytes:  # noqa: ANN401
+        try:
+            return self.__encoder.encode(value)
+        except TypeError:
+            return self.__encoder.encode(jsonable_encoder(value))
 
 
 class FastAPIAdapter(BaseAdapter):
-    def __init__(self, title: str, version: str) -> None:
+    def __init__(
+        self,
+        title: str,
+        version: str,
+        encoder: Encoder | None = None,
+        instrumentation: Instrumentation | None = None,
+        mount_plan: MountPlan | None = None,
+    ) -> None:
+        # Plugins encoding results themselves get the same fallback through the encoder of the adapter
+        super().__init__(
+            _JSONableEncoder(encoder if encoder is not None else default_encoder()), instrumentation, mount_plan,
+        )
         self.__api = FastAPI(
-            title=title, version=version, openapi_url="/.well-known/schema-discovery",
+            title=title, version=version, openapi_url=SCHEMA_URL,
+        )
+        self.__api.add_exception_handler(HttpException, self._handle_http_exception)
+
+        # The document is rendered once all controllers are mounted and served as prepared bytes,
+        # the route takes precedence over the one FastAPI renders the document with on every request
+        self.__schema = SchemaDocument(self.__api.openapi)
+        self.__api.router.routes.insert(0, Route(SCHEMA_URL, self.__schema, methods=["GET"], include_in_schema=False))
+        self.__api.add_event_handler("startup", self.__schema.prepare)
+
+    async def _response(self, result: Any) -> Response:  # noqa: ANN401
+        if isinstance(result, Response):
+            return result
+
+        # Generators and iterators are streamed chunk by chunk
+        stream = as_stream(result)
+        if stream is not None:
+            await stream.prepare()
+            return StreamingResponse(stream.chunks(self.encoder), headers=stream.headers, media_type=stream.media_type)
+
+        # Handlers may return pre-serialized bytes
+        if isinstance(result, bytes):
+            return Response(result, media_type=self.encoder.media_type)
+
+        return Response(self.encoder.encode(result), media_type=self.encoder.media_type)
+
+    async def _handle_http_exception(self, _: Request, e: HttpException) -> Response:
+        return self._error_response(e)
+
+    def _error_response(self, e: HttpException) -> Response:
+        content = e.content
+        if content is not None and not isinstance(content, str | bytes):
+            content = self.encoder.encode(content)
+
+        return Response(
+            status_code=e.status_code,
+            headers=e.headers,
+            content=content,
         )
 
     def _wrap(
-        self, handler: Callable, plugins: Mapping[Plugin, list[Annotation]],
+        self, handler: Callable, plugins: Mapping[Plugin, list[Annotation]], name: str, expects_request: bool,
     ) -> Callable:
-        # Check if endpoint handler declared request parameter
-        signature = inspect.signature(handler)
-        expects_request = "request" in signature.parameters
+        compiled = self._compile_handler(handler, expects_request, plugins, name)
+        # Results are serialized with our encoder, skipping FastAPI's serialization
+        response = self._response
+
+        # Errors are turned into responses within the route, so interceptors of the endpoint see them
+        error_response = self._error_response
+
+        if compiled is None:
+            # Plugins have nothing to do for the endpoint, so the handler is called directly
+            @functools.wraps(handler)
+            async def direct_handler(**kwargs):
+                try:
+                    return await response(await handler(**kwargs))
+                except HttpException as e:
+                    return error_response(e)
+
+            return direct_handler
 
         @functools.wraps(handler)
         async def route_handler(request: Request, **kwargs):
             try:
-                for plugin, annotations in plugins.items():
-                    await plugin.do_something(annotations, request, **kwargs)
-
-                if expects_request:
-                    # endpoint handler expects request parameter,
-                    # we have to pass it explicitly here
-                    return await handler(request=request, **kwargs)
-                else:
-                    # otherwise pass declared parameters only
-                    return await handler(**kwargs)
+                return await response(await compiled(request, kwargs))
             except HttpException as e:
-                return Response(
-                    status_code=e.status_code,
-                    headers=e.headers,
-                    content=e.content,
-                )
+                return error_response(e)
 
         if not expects_request:
             # We want to be able to access raw request from plugins,
             # so we update signature of the endpoint handler to include
             # request object there to convince FastAPI to pass request
+            signature = inspect.signature(handler)
+            request_parameter = inspect.Parameter(
+                "request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request,
+            )
             route_handler.__signature__ = signature.replace(
-                parameters=(inspect.Parameter("request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request), *tuple(signature.parameters.values())),
+                parameters=(request_parameter, *tuple(signature.parameters.values())),
             )
 
         return route_handler
 
     def _create_route(
         self,
-        router: APIRouter,
         controller: BaseController,
         endpoint: Endpoint,
         path: str,
         plugins: list[Plugin],
     ) -> None:
-        handler = functools.partial(endpoint.handler, controller)
-        print(
-            "INFO: Mounting controller endpoint at "
-            f"{endpoint.methods} {path}{endpoint.path}",
-        )
-        supported_plugins = self._supported_plugins(endpoint, plugins)
+        handler = self._endpoint_handler(controller, endpoint)
+        logger.info("Mounting controller endpoint at %s %s%s", endpoint.methods, path, endpoint.path)
+        plan = self._endpoint_plan(controller, endpoint, handler, path, plugins)
+        supported_plugins = self._planned_plugins(plan, endpoint, plugins)
 
         if supported_plugins:
-            print(
-                "INFO: The following plugins apply to the endpoint: "
-                f"{supported_plugins}",
-            )
+            logger.info("The following plugins apply to the endpoint: %s", supported_plugins)
 
-        route_handler = self._wrap(handler, supported_plugins)
+        # Endpoints are named by their handler in metrics and spans
+        name = endpoint.handler.__qualname__
+        route_handler = self._wrap(handler, supported_plugins, name, plan.expects_request)
 
-        router.add_api_route(
-            path=endpoint.path, endpoint=route_handler, methods=endpoint.methods,
+        interceptors = self._compile_interceptors(supported_plugins, name)
+        route_class = (
+            type("InterceptedRoute", (_InterceptedRoute,), {"interceptors": interceptors}) if interceptors else None
         )
 
-    def _create_router(
-        self, controller: BaseController, path: str, plugins: list[Plugin],
-    ) -> APIRouter:
-        # Some magic to mount a route and apply limiter to the route
-        router = APIRouter()
-
-        print(f"INFO:     Mounting controller at {path or '/'}")
-
-        for endpoint in controller.endpoints():
-            self._create_route(router, controller, endpoint, path, plugins)
-
-        return router
+        # Routes are added to the application directly, including a router would
+        # create each route and analyze its dependencies a second time
+        self.__api.router.add_api_route(
+            path=path + endpoint.path,
+            endpoint=route_handler,
+            methods=endpoint.methods,
+            name=endpoint.handler.__name__,
+            route_class_override=route_class,
+            openapi_extra=self._openapi_extra(supported_plugins),
+        )
 
     def mount_controller(
         self, controller: BaseController, path: str, plugins: list[Plugin],
     ) -> None:
-        router = self._create_router(controller, path, plugins)
-        self.__api.include_router(router, prefix=path)
+        logger.info("Mounting controller at %s", path or "/")
+
+        for endpoint in controller.endpoints():
+            self._create_route(controller, endpoint, path, plugins)
+
+        # The document has to be rendered again to include the new endpoints
+        self.__api.openapi_schema = None
+        self.__schema.invalidate()
 
     async def __call__(self, scope, receive, send) -> None:
         await self.__api(scope, receive, send)
 
     def add_event_handler(self, event: str, callback: Callable[..., None]):
         self.__api.add_event_handler(event, callback)
+
@@ -1,3 +1,11 @@
+import inspect
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+
 class Annotation:
     pass
 
@@ -6,3 +14,48 @@ def add_annotation(f, annotation: Annotation) -> None:
     annotations = getattr(f, "_annotations", [])
     annotations.append(annotation)
     f._annotations = annotations
+
+
+def key_parameters(key: Callable, method: Callable) -> set[str]:
+    """Return parameters of the key function, checking the handler declares them all."""
+    key_parameters = {
+        name
+        for name, value in inspect.signature(key).parameters.items()
+        if name != "self"
+    }
+    key_parameters_without_request = {
+        name for name in key_parameters if name != "request"
+    }
+    method_parameters = {
+        name
+        for name, value in inspect.signature(method).parameters.items()
+        if name != "self"
+    }
+
+    if not key_parameters_without_request.issubset(method_parameters):
+        missing = key_parameters_without_request.difference(method_parameters)
+        msg = (
+            f"Key function `{key.__qualname__}` expects parameters not present "
+            f"in handler `{method.__qualname__}`:{missing}"
+        )
+        raise ValueError(
+    msg,
+    )
+
+    return key_parameters
+
+
+def compile_key_func(
+    key: Callable, parameters: frozenset[str],
+) -> Callable[["Request", dict[str, Any]], Any]:
+    """Bind the key function to the request and handler arguments it declares."""
+    names = tuple(parameters - {"request"})
+
+    if "request" in parameters:
+        def evaluate(request: "Request", kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            return key(request=request, **{name: kwargs[name] for name in names})
+    else:
+        def evaluate(_: "Request", kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            return key(**{name: kwargs[name] for name in names})
+
+    return evaluate
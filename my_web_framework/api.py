@@ -1,19 +1,66 @@
-from collections.abc import Callable
-from typing import Mapping, Any
+from collections.abc import Callable, Mapping
+from typing import Any
 
-from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.adapters.base_adapter import BaseAdapter
 from my_web_framework.controller import BaseController
+from my_web_framework.encoders import Encoder
+from my_web_framework.instrumentation import Instrumentation
+from my_web_framework.mount_plan import MountPlan
+from my_web_framework.offloading import OffloadExecutor
 from my_web_framework.plugins._base import Plugin
 
 
 class SomeAPI:
-    def __init__(self, title: str, version: str, plugins: list[Plugin] = ()) -> None:
-        self.__adapter = FastAPIAdapter(title, version)
-        self.__plugins = plugins.copy()
+    def __init__(
+        self,
+        title: str,
+        version: str,
+        plugins: list[Plugin] = (),
+        adapter: type[BaseAdapter] | None = None,
+        encoder: Encoder | None = None,
+        instrumentation: Instrumentation | None = None,
+        mount_plan: MountPlan | None = None,
+    ) -> None:
+        if adapter is None:
+            # FastAPI and pydantic are only imported by applications using them
+            from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+
+            adapter = FastAPIAdapter
+
+        # Handler results are serialized with orjson if it is installed, unless an encoder is given
+        self.__adapter = adapter(
+            title, version, encoder=encoder, instrumentation=instrumentation, mount_plan=mount_plan,
+        )
+        self.__plugins = list(plugins)
+
+        for plugin in self.__plugins:
+            plugin.configure(self.__adapter.encoder)
+            if instrumentation is not None:
+                plugin.instrument(instrumentation)
+            self.__adapter.add_event_handler("startup", plugin.startup)
+            self.__adapter.add_event_handler("shutdown", plugin.shutdown)
 
     def mount(self, controller: BaseController, path: str = "") -> None:
         self.__adapter.mount_controller(controller, path, self.__plugins)
 
+    @property
+    def executors(self) -> Mapping[str, OffloadExecutor]:
+        """Executors synchronous endpoints run on, e.g. to monitor their `stats`."""
+        return self.__adapter.executors
+
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        """Metrics and spans collector, `None` if the application is not instrumented."""
+        return self.__adapter.instrumentation
+
+    @property
+    def mount_plan(self) -> MountPlan:
+        """Plan of the mounted endpoints, save it to speed up later startups."""
+        return self.__adapter.mount_plan
+
+    def on_startup(self, callback: Callable[..., None]) -> None:
+        self.__adapter.add_event_handler("startup", callback)
+
     def on_shutdown(self, callback: Callable[..., None]) -> None:
         self.__adapter.add_event_handler("shutdown", callback)
 
@@ -0,0 +1,140 @@
+import asyncio
+import inspect
+from collections.abc import Callable
+from typing import Any
+
+from my_web_framework.annotations import Annotation, add_annotation
+
+
+class BatchedAnnotation(Annotation):
+    def __init__(self, batch_method: str | None, max_size: int, max_wait_ms: float) -> None:
+        self.batch_method = batch_method
+        self.max_size = max_size
+        self.max_wait_ms = max_wait_ms
+
+    def __str__(self) -> str:
+        return f"Batched(batch_method={self.batch_method},max_size={self.max_size},max_wait_ms={self.max_wait_ms})"
+
+    def __repr__(self) -> str:
+        return f"Batched(batch_method={self.batch_method},max_size={self.max_size},max_wait_ms={self.max_wait_ms})"
+
+
+def batched(max_size: int = 64, max_wait_ms: float = 2.0, batch_method: str | None = None) -> Callable:
+    """Group concurrent calls of the endpoint into a single call of a batch method of the controller.
+
+    Calls are gathered for at most `max_wait_ms` milliseconds or until `max_size` calls are
+    pending. The batch method, an async method named `<handler name>_batch` by default, receives a list of values
+    for each handler parameter except `request`, and returns a list of results in the same
+    order. Exceptions returned in place of a result are raised for that call only, while an
+    exception raised by the batch method is raised for every call of the batch.
+    """
+    def marker(method: Callable) -> Callable:
+        add_annotation(method, BatchedAnnotation(batch_method, max_size, max_wait_ms))
+        return method
+
+    return marker
+
+
+class _Batcher:
+    def __init__(self, batch_method: Callable, parameters: tuple[str, ...], max_size: int, max_wait: float) -> None:
+        self.__batch_method = batch_method
+        self.__parameters = parameters
+        self.__max_size = max_size
+        self.__max_wait = max_wait
+        self.__pending: list[tuple[dict[str, Any], asyncio.Future]] = []
+        self.__timer: asyncio.TimerHandle | None = None
+        # Running batches are referenced until they finish
+        self.__tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.calls = 0
+
+    async def __call__(self, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.__pending.append((kwargs, future))
+        self.calls += 1
+
+        if len(self.__pending) >= self.__max_size:
+            self._flush()
+        elif self.__timer is None:
+            self.__timer = loop.call_later(self.__max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        batch, self.__pending = self.__pending, []
+        if batch:
+            self.batches += 1
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    @staticmethod
+    def _fail(batch: list[tuple[dict[str, Any], asyncio.Future]], e: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+
+    async def _run(self, batch: list[tuple[dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            results = await self.__batch_method(
+                **{name: [kwargs[name] for kwargs, _ in batch] for name in self.__parameters},
+            )
+        except Exception as e:  # noqa: BLE001
+            self._fail(batch, e)
+            return
+
+        if len(results) != len(batch):
+            msg = (
+                f"Batch method `{self.__batch_method.__qualname__}` "
+                f"returned {len(results)} results for {len(batch)} calls"
+            )
+            self._fail(batch, ValueError(msg))
+            return
+
+        for (_, future), result in zip(batch, results, strict=True):
+            # Callers may have been cancelled while waiting
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def batch_handler(controller: object, name: str, handler: Callable, annotation: BatchedAnnotation) -> Callable:
+    """Return a handler with the signature of `handler`, calling the batch method of the controller instead."""
+    signature = inspect.signature(handler)
+    parameters = tuple(name for name in signature.parameters if name != "request")
+
+    name = annotation.batch_method or f"{name}_batch"
+    batch_method = getattr(controller, name, None)
+    if batch_method is None:
+        msg = f"Batch method `{name}` is not defined by controller `{type(controller).__qualname__}`"
+        raise ValueError(msg)
+
+    # Batches run on the event loop, a blocking batch method would stall every request
+    if not inspect.iscoroutinefunction(batch_method):
+        msg = f"Batch method `{batch_method.__qualname__}` has to be a coroutine function"
+        raise ValueError(msg)
+
+    batch_parameters = set(inspect.signature(batch_method).parameters)
+    if batch_parameters != set(parameters):
+        msg = (
+            f"Batch method `{batch_method.__qualname__}` expects parameters {batch_parameters}, "
+            f"handler parameters are {set(parameters)}"
+        )
+        raise ValueError(msg)
+
+    batcher = _Batcher(batch_method, parameters, annotation.max_size, annotation.max_wait_ms / 1000)
+
+    async def batched_handler(**kwargs: Any) -> Any:  # noqa: ANN401
+        return await batcher(kwargs)
+
+    batched_handler.__signature__ = signature
+    batched_handler.batcher = batcher
+    return batched_handler
@@ -0,0 +1,107 @@
+import functools
+import importlib.util
+import zlib
+from collections.abc import Callable
+from typing import NamedTuple, Protocol
+
+# brotli and zstandard are only imported once a response is compressed with them
+_HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+_HAS_ZSTANDARD = importlib.util.find_spec("zstandard") is not None
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, flushing it so the client can decode it right away."""
+        ...
+
+    def finish(self) -> bytes:
+        ...
+
+
+class _ZlibCompressor:
+    def __init__(self, level: int, wbits: int) -> None:
+        self.__compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data) + self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        import brotli
+
+        self.__compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.process(data) + self.__compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.__compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        import zstandard
+
+        self.__compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self.__flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data) + self.__compressor.flush(self.__flush_block)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+
+class Codec(NamedTuple):
+    default_level: int
+    # Levels the compressor accepts, others are clamped to them
+    min_level: int
+    max_level: int
+    compressor: Callable[[int], Compressor]
+
+    def clamp(self, level: int) -> int:
+        return min(max(level, self.min_level), self.max_level)
+
+
+# Content codings by server preference
+CODECS = {
+    name: codec
+    for name, codec in {
+        "zstd": Codec(3, 1, 22, _ZstdCompressor) if _HAS_ZSTANDARD else None,
+        "br": Codec(4, 0, 11, _BrotliCompressor) if _HAS_BROTLI else None,
+        "gzip": Codec(6, 0, 9, functools.partial(_ZlibCompressor, wbits=16 + zlib.MAX_WBITS)),
+        "deflate": Codec(6, 0, 9, functools.partial(_ZlibCompressor, wbits=zlib.MAX_WBITS)),
+    }.items()
+    if codec is not None
+}
+# Codings levels can be given for, whether their packages are installed or not
+CODINGS = frozenset(("zstd", "br", "gzip", "deflate"))
+
+
+@functools.lru_cache(maxsize=256)
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick the preferred available coding accepted by the client, `None` for identity."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in CODECS:
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+
+    return best
@@ -20,12 +20,19 @@ class EndpointAnnotation(Annotation):
 
 class Endpoint:
     def __init__(
-        self, handler, path: str, methods: set[str], annotations: list[Annotation],
+        self,
+        handler,
+        path: str,
+        methods: set[str],
+        annotations: list[Annotation],
+        is_async: bool = True,
     ) -> None:
         self.handler = handler
         self.path = path
         self.methods = methods.copy()
         self.annotations = annotations.copy()
+        # Synchronous handlers are run on an executor by adapters
+        self.is_async = is_async
 
     def __str__(self) -> str:
         return (
@@ -72,6 +79,16 @@ def option(path: str) -> Callable:
     return route(path, methods={"OPTION"})
 
 
+def _runs_on_event_loop(handler: Callable) -> bool:
+    # Calling a generator function only creates the generator, its body runs while the response
+    # is streamed, sync generators on the default executor, so offloading the call buys nothing
+    return (
+        inspect.iscoroutinefunction(handler)
+        or inspect.isasyncgenfunction(handler)
+        or inspect.isgeneratorfunction(handler)
+    )
+
+
 class ControllerMeta(type):
     def __new__(
         cls: type[type], name: str, bases: tuple[type[Any]], attrs: dict[str, Any],
@@ -89,6 +106,7 @@ class ControllerMeta(type):
                                 path=annotation.path,
                                 methods=annotation.methods,
                                 annotations=annotations,
+                                is_async=_runs_on_event_loop(annotation.handler),
                             ),
                         )
         attrs["_endpoints"] = endpoints
@@ -97,6 +115,9 @@ class ControllerMeta(type):
 
 class BaseController(metaclass=ControllerMeta):
     _endpoints: list[Endpoint] = []
+    # Size of the executor synchronous endpoints of the controller run on,
+    # they share the default executor of the application if not set
+    max_workers: int | None = None
 
     def endpoints(self) -> list[Endpoint]:
         return self._endpoints
@@ -0,0 +1,43 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class Encoder(ABC):
+    """Serializes handler results into response bodies."""
+
+    media_type = "application/json"
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:  # noqa: ANN401
+        ...
+
+
+class JSONEncoder(Encoder):
+    def __init__(self) -> None:
+        self.__encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def encode(self, value: Any) -> bytes:  # noqa: ANN401
+        return self.__encoder.encode(value).encode("utf-8")
+
+
+class ORJSONEncoder(Encoder):
+    def __init__(self, option: int | None = None) -> None:
+        if orjson is None:
+            msg = "ORJSONEncoder requires orjson, install it with `pip install my-web-framework[orjson]`"
+            raise ImportError(msg)
+
+        self.__option = orjson.OPT_NON_STR_KEYS if option is None else option
+
+    def encode(self, value: Any) -> bytes:  # noqa: ANN401
+        return orjson.dumps(value, option=self.__option)
+
+
+def default_encoder() -> Encoder:
+    """orjson-backed encoder if orjson is installed, stdlib one otherwise."""
+    return ORJSONEncoder() if orjson is not None else JSONEncoder()
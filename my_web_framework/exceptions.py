@@ -1,4 +1,9 @@
+import functools
+import json
 from collections.abc import Mapping
+from types import MappingProxyType
+
+PROBLEM_MEDIA_TYPE = "application/problem+json"
 
 
 class HttpException(Exception):
@@ -9,7 +14,8 @@ class HttpException(Exception):
         content: str | bytes | dict | None,
     ) -> None:
         self.__status_code = status_code
-        self.__headers = dict(headers)
+        # Headers are not copied, exceptions are usually given a dict of their own
+        self.__headers = MappingProxyType(headers if isinstance(headers, dict) else dict(headers))
         self.__content = content
 
     @property
@@ -18,8 +24,25 @@ class HttpException(Exception):
 
     @property
     def headers(self) -> Mapping[str, str]:
-        return dict(self.__headers)
+        return self.__headers
 
     @property
     def content(self) -> str | bytes | dict | None:
         return self.__content
+
+
+@functools.cache
+def problem_content(status: int, title: str, detail: str) -> bytes:
+    """Problem details body of an error response, encoded once per distinct status, title and detail.
+
+    Rejections are raised on hot paths, so their bodies are not encoded on every request.
+    Details should not vary per request, e.g. they may come from annotations.
+    """
+    return json.dumps(
+        {
+            "type": f"https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/{status}",
+            "title": title,
+            "status": status,
+            "detail": detail,
+        },
+    ).encode("utf-8")
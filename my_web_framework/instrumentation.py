@@ -0,0 +1,213 @@
+import bisect
+import contextlib
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from contextlib import AbstractContextManager
+from typing import Any, Protocol
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, suited to whole requests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Seconds, suited to in-process work such as plugin stages and storage calls
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+
+class Counter(ABC):
+    @abstractmethod
+    def inc(self, amount: float = 1) -> None:
+        ...
+
+
+class Gauge(ABC):
+    @abstractmethod
+    def set(self, value: float) -> None:  # noqa: A003
+        ...
+
+
+class Histogram(ABC):
+    @abstractmethod
+    def observe(self, value: float) -> None:
+        ...
+
+
+class Tracer(Protocol):
+    """Subset of the OpenTelemetry tracer API used to record spans."""
+
+    def start_as_current_span(self, name: str, attributes: Mapping[str, Any] | None = None) -> AbstractContextManager:
+        ...
+
+
+class Instrumentation(ABC):
+    """Collects metrics and spans of the framework, plugins and handlers.
+
+    Metrics are created once for each set of labels, when endpoints are mounted,
+    so recording a value on a request is a single method call. Nothing is recorded
+    when `SomeAPI` is created without instrumentation.
+    """
+
+    @abstractmethod
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        ...
+
+    @abstractmethod
+    def gauge(self, name: str, description: str, **labels: str) -> Gauge:
+        ...
+
+    @abstractmethod
+    def histogram(
+        self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: str,
+    ) -> Histogram:
+        ...
+
+    @property
+    def tracing(self) -> bool:
+        """Whether spans are recorded, adapters skip creating them otherwise."""
+        return False
+
+    def span(self, name: str, attributes: Mapping[str, Any] | None = None) -> AbstractContextManager:  # noqa: ARG002
+        return contextlib.nullcontext()
+
+
+class _Counter(Counter):
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _Gauge(Gauge):
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def set(self, value: float) -> None:  # noqa: A003
+        self.value = value
+
+
+class _Histogram(Histogram):
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        # Observations per bucket, the last one counts those above all bounds
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class _Family:
+    __slots__ = ("kind", "description", "buckets", "metrics")
+
+    def __init__(self, kind: str, description: str, buckets: Sequence[float] = ()) -> None:
+        self.kind = kind
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.metrics: dict[tuple[tuple[str, str], ...], _Counter | _Gauge | _Histogram] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Sequence[tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}" if labels else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsCollector(Instrumentation):
+    """Keeps metrics in memory and renders them in the Prometheus text format.
+
+    Spans are recorded with `tracer` if given, e.g. `opentelemetry.trace.get_tracer(__name__)`.
+    """
+
+    def __init__(self, tracer: Tracer | None = None) -> None:
+        self.__tracer = tracer
+        self.__families: dict[str, _Family] = {}
+
+    def _family(self, name: str, kind: str, description: str, buckets: Sequence[float] = ()) -> _Family:
+        family = self.__families.get(name)
+        if family is None:
+            family = self.__families[name] = _Family(kind, description, buckets)
+        elif family.kind != kind:
+            msg = f"Metric {name} is a {family.kind}, not a {kind}"
+            raise ValueError(msg)
+        return family
+
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        family = self._family(name, "counter", description)
+        key = tuple(sorted(labels.items()))
+        metric = family.metrics.get(key)
+        if metric is None:
+            metric = family.metrics[key] = _Counter()
+        return metric
+
+    def gauge(self, name: str, description: str, **labels: str) -> Gauge:
+        family = self._family(name, "gauge", description)
+        key = tuple(sorted(labels.items()))
+        metric = family.metrics.get(key)
+        if metric is None:
+            metric = family.metrics[key] = _Gauge()
+        return metric
+
+    def histogram(
+        self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: str,
+    ) -> Histogram:
+        family = self._family(name, "histogram", description, buckets)
+        key = tuple(sorted(labels.items()))
+        metric = family.metrics.get(key)
+        if metric is None:
+            # All histograms of a family share the buckets it was created with
+            metric = family.metrics[key] = _Histogram(family.buckets)
+        return metric
+
+    @property
+    def tracing(self) -> bool:
+        return self.__tracer is not None
+
+    def span(self, name: str, attributes: Mapping[str, Any] | None = None) -> AbstractContextManager:
+        if self.__tracer is None:
+            return contextlib.nullcontext()
+        return self.__tracer.start_as_current_span(name, attributes=attributes)
+
+    def render(self) -> bytes:
+        lines = []
+        for name, family in sorted(self.__families.items()):
+            lines.append(f"# HELP {name} {_escape(family.description)}")
+            lines.append(f"# TYPE {name} {family.kind}")
+
+            for labels, metric in family.metrics.items():
+                if isinstance(metric, _Counter | _Gauge):
+                    lines.append(f"{name}{_labels(labels)} {_number(metric.value)}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip((*family.buckets, float("inf")), metric.counts, strict=True):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{name}_bucket{_labels((*labels, ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(metric.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    # The controller imports starlette, which plugins and adapters importing this module may not need
+    if name == "MetricsController":
+        from my_web_framework._metrics_controller import MetricsController
+
+        return MetricsController
+
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
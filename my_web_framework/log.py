@@ -0,0 +1,155 @@
+import logging
+import queue
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from logging.handlers import QueueHandler, QueueListener
+
+# Loggers of the framework and its plugins are children of this logger
+LOGGER_NAME = "my_web_framework"
+
+_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Let through at most `per_second` records of each message per second.
+
+    Records are told apart by their logger and message template, so a message
+    logged on every request is sampled regardless of its arguments. The number of
+    suppressed records is added to the first record let through afterwards.
+    Records at `sample_below` or above, warnings and errors by default, are never
+    sampled. At most `max_messages` messages are tracked, records of other messages
+    are let through until windows of tracked ones expire.
+    """
+
+    def __init__(
+        self, per_second: int = 10, *, sample_below: int = logging.WARNING, max_messages: int = 1000,
+    ) -> None:
+        super().__init__()
+        self.__per_second = per_second
+        self.__sample_below = sample_below
+        self.__max_messages = max_messages
+        self.__lock = threading.Lock()
+        # Window start, records let through and suppressed, by logger and message
+        self.__windows: dict[tuple[str, object], list] = {}
+
+    def _track(self, key: tuple[str, object], now: float) -> None:
+        windows = self.__windows
+        if len(windows) >= self.__max_messages:
+            # Messages formatted before logging are all distinct, expired windows make room for new ones
+            for expired in [tracked for tracked, window in windows.items() if now - window[0] >= 1]:
+                del windows[expired]
+            if len(windows) >= self.__max_messages:
+                return
+        windows[key] = [now, 1, 0]
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: A003
+        if record.levelno >= self.__sample_below:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+
+        with self.__lock:
+            window = self.__windows.get(key)
+            if window is None:
+                self._track(key, now)
+                return True
+
+            if now - window[0] >= 1:
+                suppressed = window[2]
+                window[:] = [now, 1, 0]
+            elif window[1] < self.__per_second:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            # Formatted eagerly, but at most once per message and second
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = ()
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records are formatted by the listener thread, not by the thread logging them.
+        # Arguments are formatted later then, so they should not be mutated after logging.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Records are dropped rather than blocking the event loop when the writer falls behind
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Writes records of the framework loggers from a background thread.
+
+    Logging calls only check the level, sample the record and put it on a bounded
+    queue, so writing to slow streams or files does not block the event loop.
+    Records are dropped when `max_queue` records are waiting to be written.
+
+    Start the pipeline with the application, so importing the module does not start its thread:
+
+        pipeline = LoggingPipeline(level=logging.INFO)
+        api.on_startup(pipeline.start)
+        api.on_shutdown(pipeline.stop)
+    """
+
+    def __init__(
+        self,
+        handlers: Sequence[logging.Handler] | None = None,
+        *,
+        level: int = logging.INFO,
+        max_queue: int = 10_000,
+        per_second: int | None = 10,
+        logger_name: str = LOGGER_NAME,
+    ) -> None:
+        if handlers is None:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter(_FORMAT))
+            handlers = [handler]
+
+        self.__logger = logging.getLogger(logger_name)
+        self.__level = level
+        self.__handler = _NonBlockingQueueHandler(queue.Queue(max_queue))
+        if per_second is not None:
+            self.__handler.addFilter(SamplingFilter(per_second))
+        self.__listener = QueueListener(self.__handler.queue, *handlers, respect_handler_level=True)
+        self.__started = False
+
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped because the queue was full."""
+        return self.__handler.dropped
+
+    def start(self) -> None:
+        if self.__started:
+            return
+
+        self.__listener.start()
+        self.__logger.addHandler(self.__handler)
+        self.__logger.setLevel(self.__level)
+        # Records are written by the pipeline only, not by handlers of the root logger as well
+        self.__logger.propagate = False
+        self.__started = True
+
+    def stop(self) -> None:
+        """Detach the pipeline and write the records still waiting in the queue."""
+        if not self.__started:
+            return
+
+        self.__logger.removeHandler(self.__handler)
+        self.__logger.propagate = True
+        self.__listener.stop()
+        self.__started = False
@@ -6,6 +6,7 @@ from starlette.requests import Request
 
 from my_web_framework.api import SomeAPI
 from my_web_framework.controller import BaseController, get, route
+from my_web_framework.log import LoggingPipeline
 from my_web_framework.plugins.awesome import AwesomePlugin, awesome
 from my_web_framework.plugins.rate_limiter import RateLimiterPlugin, limit
 
@@ -41,11 +42,17 @@ def shutdown() -> None:
     logger.info("Shutting down")
 
 
+# Framework records are written from a background thread, so they do not block the event loop.
+# The thread only runs while the application does, importing the module does not start it.
+logging_pipeline = LoggingPipeline(level=logging.DEBUG)
+
 api = SomeAPI(
     title="Some API", version="2023", plugins=[RateLimiterPlugin(), AwesomePlugin()],
 )
+api.on_startup(logging_pipeline.start)
 api.mount(Controller())
 api.on_shutdown(shutdown)
+api.on_shutdown(logging_pipeline.stop)
 
 
 if __name__ == "__main__":
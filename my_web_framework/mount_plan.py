@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import types
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from my_web_framework.controller import Endpoint
+
+_VERSION = 1
+# Defaults that survive a round trip through JSON
+_SERIALIZABLE_DEFAULTS = (str, int, float, bool, type(None))
+
+
+class ParameterPlan(NamedTuple):
+    name: str
+    in_path: bool
+    required: bool
+    default: Any = None
+
+
+class EndpointPlan(NamedTuple):
+    # Changes when the handler, its parameters or annotations change
+    fingerprint: str
+    # Indices of the plugins that apply to the endpoint, with indices of their annotations
+    plugins: tuple[tuple[int, tuple[int, ...]], ...]
+    expects_request: bool
+    # Parameters of the handler bound from the request, `request` excluded
+    parameters: tuple[ParameterPlan, ...]
+
+
+def _constant(value: Any) -> Any:  # noqa: ANN401
+    # Nested functions are compared by their code, not by the address in their repr
+    if isinstance(value, types.CodeType):
+        return _code(value)
+    # Sets of constants, e.g. of `x in {"a", "b"}`, are iterated in an order that varies between runs
+    if isinstance(value, frozenset):
+        return sorted(repr(_constant(item)) for item in value)
+    if isinstance(value, tuple):
+        return tuple(_constant(item) for item in value)
+    return value
+
+
+def _code(code: types.CodeType) -> tuple:
+    # Bytecode refers to constants and names by index, so they change the behaviour as much as it does
+    return code.co_code, _constant(code.co_consts), code.co_names
+
+
+def endpoint_fingerprint(endpoint: Endpoint) -> str | None:
+    """Fingerprint of the handler and annotations, `None` if the handler is not a plain function.
+
+    Only attributes of the function are read, so it is much cheaper than `inspect.signature`.
+    """
+    handler = endpoint.handler
+    code = getattr(handler, "__code__", None)
+    if code is None:
+        return None
+
+    description = repr(
+        (
+            handler.__qualname__,
+            _code(code),
+            code.co_varnames[: code.co_argcount + code.co_kwonlyargcount],
+            handler.__defaults__,
+            handler.__kwdefaults__,
+            {name: getattr(value, "__qualname__", repr(value)) for name, value in handler.__annotations__.items()},
+            [str(annotation) for annotation in endpoint.annotations],
+        ),
+    )
+    return hashlib.blake2b(description.encode(), digest_size=16).hexdigest()
+
+
+class MountPlan:
+    """Endpoints of mounted controllers, computed once and reused on later startups.
+
+    Adapters record the plugins that apply to each endpoint and its parameters when
+    controllers are mounted. A plan saved after mounting, e.g. at build time, can be
+    passed to `SomeAPI` to skip signature inspection and plugin matching on startup.
+    Endpoints whose handler changed since the plan was saved are computed again, and
+    the whole plan is ignored if the plugins of the application changed.
+    """
+
+    def __init__(
+        self, plugins: tuple[str, ...] | None = None, endpoints: dict[str, EndpointPlan] | None = None,
+    ) -> None:
+        self.__plugins = plugins
+        self.__endpoints = endpoints if endpoints is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.__endpoints)
+
+    @staticmethod
+    def _plugin_names(plugins: Sequence[object]) -> tuple[str, ...]:
+        return tuple(f"{type(plugin).__module__}.{type(plugin).__qualname__}" for plugin in plugins)
+
+    def get(self, key: str, fingerprint: str | None, plugins: Sequence[object]) -> EndpointPlan | None:
+        """Return the plan of the endpoint if it is still valid for the handler and plugins."""
+        plan = self.__endpoints.get(key)
+        if plan is None or fingerprint is None or plan.fingerprint != fingerprint:
+            return None
+        if self.__plugins != self._plugin_names(plugins):
+            return None
+        return plan
+
+    def add(self, key: str, plan: EndpointPlan, plugins: Sequence[object]) -> None:
+        names = self._plugin_names(plugins)
+        if self.__plugins != names:
+            # Indices of plugins recorded so far refer to other plugins
+            self.__plugins = names
+            self.__endpoints.clear()
+        self.__endpoints[key] = plan
+
+    def dumps(self) -> str:
+        endpoints = {
+            key: {
+                "fingerprint": plan.fingerprint,
+                "plugins": plan.plugins,
+                "expects_request": plan.expects_request,
+                "parameters": plan.parameters,
+            }
+            for key, plan in self.__endpoints.items()
+            # Endpoints with defaults JSON cannot represent are computed on every startup
+            if all(isinstance(parameter.default, _SERIALIZABLE_DEFAULTS) for parameter in plan.parameters)
+        }
+        return json.dumps({"version": _VERSION, "plugins": self.__plugins, "endpoints": endpoints})
+
+    @classmethod
+    def loads(cls, data: str) -> "MountPlan":
+        content = json.loads(data)
+        # Plans of other versions are ignored rather than misread
+        if content.get("version") != _VERSION:
+            return cls()
+
+        plugins = tuple(content["plugins"]) if content["plugins"] is not None else None
+        endpoints = {
+            key: EndpointPlan(
+                endpoint["fingerprint"],
+                tuple((index, tuple(annotations)) for index, annotations in endpoint["plugins"]),
+                endpoint["expects_request"],
+                tuple(ParameterPlan(*parameter) for parameter in endpoint["parameters"]),
+            )
+            for key, endpoint in content["endpoints"].items()
+        }
+        return cls(plugins, endpoints)
+
+    def save(self, path: str | os.PathLike) -> None:
+        with open(path, "w") as f:  # noqa: PTH123
+            f.write(self.dumps())
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "MountPlan":
+        """Load a saved plan, or return an empty one if there is no plan at `path` yet."""
+        try:
+            with open(path) as f:  # noqa: PTH123
+                return cls.loads(f.read())
+        except FileNotFoundError:
+            return cls()
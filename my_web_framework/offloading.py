@@ -0,0 +1,115 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+import time
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from my_web_framework.annotations import Annotation, add_annotation
+
+
+class OffloadAnnotation(Annotation):
+    def __init__(self, max_workers: int | None, *, processes: bool) -> None:
+        self.max_workers = max_workers
+        self.processes = processes
+
+    def __str__(self) -> str:
+        return f"Offload(max_workers={self.max_workers},processes={self.processes})"
+
+    def __repr__(self) -> str:
+        return f"Offload(max_workers={self.max_workers},processes={self.processes})"
+
+
+def offload(max_workers: int | None = None, *, processes: bool = False) -> Callable:
+    """Run the synchronous endpoint on its own executor instead of the one of its controller.
+
+    With `processes=True` the endpoint runs in a process pool, for CPU-bound handlers.
+    The controller and handler arguments have to be picklable then. Endpoints running on
+    the event loop, `async def` and generator functions, cannot be offloaded.
+    """
+    def marker(method: Callable) -> Callable:
+        add_annotation(method, OffloadAnnotation(max_workers, processes=processes))
+        return method
+
+    return marker
+
+
+class ExecutorStats(NamedTuple):
+    max_workers: int
+    # Calls running on the executor and calls waiting for a free worker
+    running: int
+    waiting: int
+    completed: int
+    # Time calls spent waiting for a free worker, in seconds
+    total_wait_time: float
+    max_wait_time: float
+
+    @property
+    def saturation(self) -> float:
+        return self.running / self.max_workers
+
+
+def default_max_workers() -> int:
+    # Same default as `ThreadPoolExecutor`
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class OffloadExecutor:
+    """Bounded executor running synchronous handlers off the event loop.
+
+    Calls wait for a free worker on the event loop rather than in the queue of
+    the underlying pool, so the time they wait can be measured and the pool
+    never holds more work than it has workers.
+    """
+
+    def __init__(self, name: str, max_workers: int | None = None, *, processes: bool = False) -> None:
+        self.name = name
+        self.__max_workers = max_workers or default_max_workers()
+        self.__pool: concurrent.futures.Executor = (
+            concurrent.futures.ProcessPoolExecutor(self.__max_workers)
+            if processes
+            else concurrent.futures.ThreadPoolExecutor(self.__max_workers, thread_name_prefix=name)
+        )
+        self.__semaphore = asyncio.Semaphore(self.__max_workers)
+        self.__running = 0
+        self.__waiting = 0
+        self.__completed = 0
+        self.__total_wait_time = 0.0
+        self.__max_wait_time = 0.0
+
+    @property
+    def stats(self) -> ExecutorStats:
+        return ExecutorStats(
+            self.__max_workers,
+            self.__running,
+            self.__waiting,
+            self.__completed,
+            self.__total_wait_time,
+            self.__max_wait_time,
+        )
+
+    async def run(self, func: Callable, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+        started_at = time.perf_counter()
+        self.__waiting += 1
+        try:
+            await self.__semaphore.acquire()
+        finally:
+            self.__waiting -= 1
+
+        wait_time = time.perf_counter() - started_at
+        self.__total_wait_time += wait_time
+        self.__max_wait_time = max(self.__max_wait_time, wait_time)
+
+        self.__running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.__pool, functools.partial(func, **kwargs),
+            )
+        finally:
+            self.__running -= 1
+            self.__completed += 1
+            self.__semaphore.release()
+
+    async def shutdown(self) -> None:
+        self.__pool.shutdown(wait=False, cancel_futures=True)
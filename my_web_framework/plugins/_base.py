@@ -1,15 +1,91 @@
-from typing import Any
-
-from starlette.requests import Request
+import logging
+from collections.abc import Awaitable, Callable, Mapping, MutableMapping
+from typing import TYPE_CHECKING, Any
 
 from my_web_framework.annotations import Annotation
+from my_web_framework.encoders import Encoder
+from my_web_framework.instrumentation import Instrumentation
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# A plugin compiled for a particular endpoint, receives the request and handler arguments
+Stage = Callable[["Request", dict[str, Any]], Awaitable[None]]
+# Calls the endpoint handler with the request and handler arguments and returns its result
+Handler = Callable[["Request", dict[str, Any]], Awaitable[Any]]
+# ASGI send callable
+Send = Callable[[MutableMapping[str, Any]], Awaitable[None]]
+# Returns the send callable the response of the request is sent with
+Interceptor = Callable[["Request", Send], Send]
 
 
 class Plugin:
     def is_supported_annotation(self, annotation: Annotation) -> bool:  # noqa: ARG002
         return False
 
+    def is_global(self) -> bool:
+        """Global plugins are applied to every endpoint, even without annotations."""
+        return False
+
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        """Called before endpoints are mounted when the application is instrumented.
+
+        Plugins may keep the instrumentation to create their metrics when endpoints are compiled.
+        """
+
+    def configure(self, encoder: Encoder) -> None:
+        """Called before endpoints are mounted with the encoder handler results are serialized with.
+
+        Plugins sending bodies of their own, e.g. from a cache, use it to encode them like the adapter does.
+        """
+
+    async def startup(self) -> None:
+        """Called on application startup, e.g. to start background tasks."""
+
+    async def shutdown(self) -> None:
+        """Called on application shutdown."""
+
+    def compile(self, annotations: list[Annotation]) -> Stage | None:
+        """Prepare the plugin for an endpoint once, when the endpoint is mounted.
+
+        Plugins may override this method to process annotations upfront
+        and return a specialized stage, or `None` if nothing has to be done
+        for the endpoint. By default `do_something` is called on each request.
+        """
+
+        async def stage(request: "Request", kwargs: dict[str, Any]) -> None:
+            await self.do_something(annotations, request, **kwargs)
+
+        return stage
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler | None:  # noqa: ARG002
+        """Wrap the endpoint handler once, when the endpoint is mounted.
+
+        Unlike stages, wrappers can return a result without calling the handler
+        or process its result. Returns `None` if the handler is left as is.
+        """
+        return None
+
+    def intercept(self, annotations: list[Annotation]) -> Interceptor | None:  # noqa: ARG002
+        """Prepare an interceptor of ASGI messages of responses, `None` if not needed.
+
+        The interceptor is called for each request with the send callable of the
+        response and returns the one to use instead, so plugins can observe or
+        change the status, headers and body chunks as they are sent, including
+        streamed and error responses of the endpoint.
+        """
+        return None
+
+    def openapi(self, annotations: list[Annotation]) -> Mapping[str, Any] | None:  # noqa: ARG002
+        """OpenAPI metadata of the endpoint, merged into its operation, `None` if there is none.
+
+        Called once when the endpoint is mounted, e.g. to document responses the plugin sends.
+        """
+        return None
+
     async def do_something(
-        self, annotations: list[Annotation], request: Request, **kwargs: Any,  # noqa: ARG002
+        self, annotations: list[Annotation], request: "Request", **kwargs: Any,  # noqa: ARG002
     ):
-        print("Plugin is being called")
+        logger.debug("%s is being called", type(self).__name__)
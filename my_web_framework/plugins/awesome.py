@@ -1,3 +1,4 @@
+import logging
 from typing import Any
 
 from starlette.requests import Request
@@ -5,6 +6,8 @@ from starlette.requests import Request
 from my_web_framework.annotations import Annotation, add_annotation
 from my_web_framework.plugins._base import Plugin
 
+logger = logging.getLogger(__name__)
+
 
 class AwesomeAnnotation(Annotation):
     def __str__(self) -> str:
@@ -21,7 +24,8 @@ class AwesomePlugin(Plugin):
     async def do_something(
         self, annotations: list[Annotation], request: Request, **kwargs: Any,
     ):
-        print(f"AwesomePlugin is being called: {annotations}, {request}, {kwargs}")
+        # Formatted lazily by the logging pipeline, if the level is enabled at all
+        logger.debug("AwesomePlugin is being called: %s, %s, %s", annotations, request.scope["path"], kwargs)
 
 
 def awesome():
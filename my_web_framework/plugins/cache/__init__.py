@@ -0,0 +1,10 @@
+from my_web_framework.plugins.cache.annotations import cached
+from my_web_framework.plugins.cache.plugin import CachePlugin
+from my_web_framework.plugins.cache.stores import CacheStore, MemoryCacheStore
+
+__all__ = (
+    "cached",
+    "CachePlugin",
+    "CacheStore",
+    "MemoryCacheStore",
+)
@@ -0,0 +1,46 @@
+from collections.abc import Callable
+
+from my_web_framework.annotations import Annotation, add_annotation, key_parameters
+
+
+class _CachedAnnotation(Annotation):
+    def __init__(self, ttl: float, key: Callable | None, parameters: set[str], namespace: str) -> None:
+        self.__ttl = ttl
+        self.__key = key
+        self.__parameters = frozenset(parameters.copy())
+        self.__has_request_parameter = "request" in self.__parameters
+        self.__namespace = namespace
+
+    def __str__(self) -> str:
+        return f"CachedAnnotation(ttl={self.__ttl}, parameters={self.__parameters})"
+
+    def __repr__(self) -> str:
+        return f"CachedAnnotation(ttl={self.__ttl}, parameters={self.__parameters})"
+
+    def ttl(self) -> float:
+        return self.__ttl
+
+    def key(self) -> Callable | None:
+        return self.__key
+
+    def parameters(self) -> frozenset[str]:
+        return self.__parameters
+
+    def has_request_parameter(self) -> bool:
+        return self.__has_request_parameter
+
+    def namespace(self) -> str:
+        return self.__namespace
+
+
+def cached(ttl: float, key: Callable | None = None) -> Callable:
+    """Cache results of the handler for `ttl` seconds.
+
+    Results are cached per value of the key function, or per handler arguments if no key is given.
+    """
+    def marker(method: Callable) -> Callable:
+        parameters = key_parameters(key, method) if key is not None else set()
+        add_annotation(method, _CachedAnnotation(ttl, key, parameters, method.__qualname__))
+        return method
+
+    return marker
@@ -0,0 +1,119 @@
+import json
+import logging
+from collections.abc import Callable
+from typing import Any, cast
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from my_web_framework.annotations import Annotation, compile_key_func
+from my_web_framework.encoders import Encoder, default_encoder
+from my_web_framework.plugins._base import Handler, Plugin
+from my_web_framework.plugins.cache.annotations import _CachedAnnotation
+from my_web_framework.plugins.cache.stores import CacheStore, MemoryCacheStore
+from my_web_framework.streaming import can_resend
+
+logger = logging.getLogger(__name__)
+
+# Only results of safe methods are served from and stored in the cache
+_CACHEABLE_METHODS = frozenset(("GET", "HEAD"))
+
+
+def _encode_response(body: bytes, status_code: int, headers: list[tuple[bytes, bytes]]) -> bytes:
+    # Status and headers are prepended as a line of JSON, which escapes any newlines
+    head = json.dumps([status_code, [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers]])
+    return head.encode("latin-1") + b"\n" + body
+
+
+def _decode_response(value: bytes) -> Response:
+    head, _, body = value.partition(b"\n")
+    status_code, headers = json.loads(head)
+    response = Response(body, status_code=status_code)
+    response.raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    return response
+
+
+class CachePlugin(Plugin):
+    """Serves results of annotated endpoints from a cache store.
+
+    Results are stored as bytes holding the status, headers and body encoded by
+    the encoder of the application, so every hit gets a response of its own and
+    stores can keep them anywhere.
+    """
+
+    def __init__(self, store: CacheStore | None = None) -> None:
+        self.__store = store if store is not None else MemoryCacheStore()
+        self.__encoder = default_encoder()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> CacheStore:
+        return self.__store
+
+    def configure(self, encoder: Encoder) -> None:
+        self.__encoder = encoder
+
+    async def shutdown(self) -> None:
+        await self.__store.close()
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _CachedAnnotation)
+
+    @staticmethod
+    def _compile_key_func(annotation: _CachedAnnotation) -> Callable[[Request, dict[str, Any]], str]:
+        namespace = annotation.namespace()
+
+        if annotation.key() is None:
+            # Cache per handler arguments
+            def evaluate(_: Request, kwargs: dict[str, Any]) -> str:
+                return f"{namespace}:{sorted(kwargs.items())!r}"
+        else:
+            key_func = compile_key_func(annotation.key(), annotation.parameters())
+
+            def evaluate(request: Request, kwargs: dict[str, Any]) -> str:
+                return f"{namespace}:{key_func(request, kwargs)}"
+
+        return evaluate
+
+    def _freeze(self, result: Any) -> bytes:  # noqa: ANN401
+        if isinstance(result, Response):
+            return _encode_response(bytes(result.body), result.status_code, result.raw_headers)
+
+        # Encoded like the adapter encodes results
+        body = result if isinstance(result, bytes) else self.__encoder.encode(result)
+        response = Response(body, media_type=self.__encoder.media_type)
+        return _encode_response(body, response.status_code, response.raw_headers)
+
+    def compile(self, annotations: list[Annotation]) -> None:  # noqa: ARG002
+        # Everything is done by the handler wrapper
+        return None
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler:
+        # The last annotation wins if a handler is annotated several times
+        annotation = cast(list[_CachedAnnotation], annotations)[-1]
+        key_func = self._compile_key_func(annotation)
+        ttl = annotation.ttl()
+        store = self.__store
+
+        async def cached_handler(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            if request.method not in _CACHEABLE_METHODS:
+                return await handler(request, kwargs)
+
+            key = key_func(request, kwargs)
+            cached = await store.get(key)
+            if cached is not None:
+                self.hits += 1
+                return _decode_response(cached)
+
+            self.misses += 1
+            result = await handler(request, kwargs)
+
+            # Streams, streaming and file responses can only be sent once
+            if result is not None and can_resend(result):
+                await store.set(key, self._freeze(result), ttl)
+                logger.debug("CachePlugin stored %s for %ss", key, ttl)
+
+            return result
+
+        return cached_handler
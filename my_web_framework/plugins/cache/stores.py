@@ -0,0 +1,78 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class CacheStore(ABC):
+    """Async storage of cached responses, kept as bytes so they can be stored anywhere."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the cached value, `None` if it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        """Release resources of the store, such as connections, there are none by default."""
+        return
+
+
+class MemoryCacheStore(CacheStore):
+    """In-process LRU cache bounded by the size of its keys and values.
+
+    Expired entries are removed lazily when they are read, the least recently
+    used entries are evicted once the cache grows over `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.__max_bytes = max_bytes
+        self.__size = 0
+        # Key to value, expiration time and size
+        self.__entries: OrderedDict[str, tuple[bytes, float, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self.__entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if size > self.__max_bytes:
+            return
+
+        self._remove(key)
+        self.__entries[key] = (value, time.monotonic() + ttl, size)
+        self.__size += size
+
+        while self.__size > self.__max_bytes:
+            self._remove(next(iter(self.__entries)))
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__size -= entry[2]
@@ -0,0 +1,7 @@
+from my_web_framework.plugins.coalesce.annotations import coalesce
+from my_web_framework.plugins.coalesce.plugin import CoalescePlugin
+
+__all__ = (
+    "coalesce",
+    "CoalescePlugin",
+)
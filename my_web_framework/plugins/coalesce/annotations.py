@@ -0,0 +1,44 @@
+from collections.abc import Callable
+
+from my_web_framework.annotations import Annotation, add_annotation, key_parameters
+
+
+class _CoalesceAnnotation(Annotation):
+    def __init__(
+        self, key: Callable | None, parameters: set[str], namespace: str, max_waiters: int | None,
+    ) -> None:
+        self.__key = key
+        self.__parameters = frozenset(parameters.copy())
+        self.__namespace = namespace
+        self.__max_waiters = max_waiters
+
+    def __str__(self) -> str:
+        return f"CoalesceAnnotation(parameters={self.__parameters}, max_waiters={self.__max_waiters})"
+
+    def __repr__(self) -> str:
+        return f"CoalesceAnnotation(parameters={self.__parameters}, max_waiters={self.__max_waiters})"
+
+    def key(self) -> Callable | None:
+        return self.__key
+
+    def parameters(self) -> frozenset[str]:
+        return self.__parameters
+
+    def namespace(self) -> str:
+        return self.__namespace
+
+    def max_waiters(self) -> int | None:
+        return self.__max_waiters
+
+
+def coalesce(key: Callable | None = None, max_waiters: int | None = None) -> Callable:
+    """Share one in-flight call of the handler between concurrent requests with the same key.
+
+    Requests are coalesced per value of the key function, or per handler arguments if no key is given.
+    """
+    def marker(method: Callable) -> Callable:
+        parameters = key_parameters(key, method) if key is not None else set()
+        add_annotation(method, _CoalesceAnnotation(key, parameters, method.__qualname__, max_waiters))
+        return method
+
+    return marker
@@ -0,0 +1,15 @@
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE, HttpException, problem_content
+
+_CONTENT = problem_content(503, "Service unavailable", "Too many requests are waiting for the same result")
+
+
+class TooManyWaitersError(HttpException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=503,
+            headers={
+                "Content-Type": PROBLEM_MEDIA_TYPE,
+                "Retry-After": "1",
+            },
+            content=_CONTENT,
+        )
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any, cast
+
+from starlette.requests import Request
+
+from my_web_framework.annotations import Annotation, compile_key_func
+from my_web_framework.instrumentation import Instrumentation
+from my_web_framework.plugins._base import Handler, Plugin
+from my_web_framework.plugins.coalesce.annotations import _CoalesceAnnotation
+from my_web_framework.plugins.coalesce.exceptions import TooManyWaitersError
+from my_web_framework.streaming import can_resend
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _CoalesceMetrics:
+    __slots__ = ("calls", "coalesced", "rejected")
+
+    def __init__(self, instrumentation: Instrumentation, endpoint: str) -> None:
+        name, description = "coalesce_requests_total", "Requests of coalesced endpoints, by outcome"
+        self.calls = instrumentation.counter(name, description, endpoint=endpoint, outcome="call")
+        self.coalesced = instrumentation.counter(name, description, endpoint=endpoint, outcome="coalesced")
+        self.rejected = instrumentation.counter(name, description, endpoint=endpoint, outcome="rejected")
+
+
+class CoalescePlugin(Plugin):
+    """Runs a single call of the handler for concurrent requests with the same key.
+
+    The call runs in its own task, so a waiting request that is cancelled does
+    not cancel it for the others. Results and exceptions are shared by all waiters,
+    except for streams and streaming responses, which can only be sent once: the
+    request that started the call gets those, and waiters call the handler themselves.
+    Requests whose key cannot be hashed, e.g. with list arguments, are not coalesced.
+    """
+
+    def __init__(self, max_waiters: int | None = 1000) -> None:
+        self.__max_waiters = max_waiters
+        self.__flights: dict[Any, _Flight] = {}
+        self.__instrumentation: Instrumentation | None = None
+        # Requests that ran the handler and requests that shared a result
+        self.calls = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Share of requests served by a call of another request."""
+        total = self.calls + self.coalesced
+        return self.coalesced / total if total else 0.0
+
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+
+    def _count_call(self, metrics: _CoalesceMetrics | None) -> None:
+        self.calls += 1
+        if metrics is not None:
+            metrics.calls.inc()
+
+    def _count_coalesced(self, metrics: _CoalesceMetrics | None) -> None:
+        self.coalesced += 1
+        if metrics is not None:
+            metrics.coalesced.inc()
+
+    def _count_rejected(self, metrics: _CoalesceMetrics | None) -> None:
+        self.rejected += 1
+        if metrics is not None:
+            metrics.rejected.inc()
+
+    def _land(self, key: Any, task: asyncio.Task) -> None:  # noqa: ANN401
+        self.__flights.pop(key, None)
+        # Mark the exception as retrieved in case all waiters were cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _CoalesceAnnotation)
+
+    @staticmethod
+    def _compile_key_func(annotation: _CoalesceAnnotation) -> Callable[[Request, dict[str, Any]], Any]:
+        namespace = annotation.namespace()
+
+        if annotation.key() is None:
+            # Coalesce per handler arguments
+            def evaluate(_: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+                return namespace, tuple(sorted(kwargs.items()))
+        else:
+            key_func = compile_key_func(annotation.key(), annotation.parameters())
+
+            def evaluate(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+                return namespace, key_func(request, kwargs)
+
+        return evaluate
+
+    def compile(self, annotations: list[Annotation]) -> None:  # noqa: ARG002
+        # Everything is done by the handler wrapper
+        return None
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler:
+        # The last annotation wins if a handler is annotated several times
+        annotation = cast(list[_CoalesceAnnotation], annotations)[-1]
+        key_func = self._compile_key_func(annotation)
+        max_waiters = annotation.max_waiters() if annotation.max_waiters() is not None else self.__max_waiters
+        flights = self.__flights
+
+        # Metrics are only recorded when the application is instrumented
+        metrics = None
+        if self.__instrumentation is not None:
+            metrics = _CoalesceMetrics(self.__instrumentation, annotation.namespace())
+
+        async def call(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            self._count_call(metrics)
+            return await handler(request, kwargs)
+
+        async def coalesced_handler(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            key = key_func(request, kwargs)
+            try:
+                flight = flights.get(key)
+            except TypeError:
+                # Unhashable arguments, e.g. lists of query parameters or request bodies
+                return await call(request, kwargs)
+
+            if flight is None:
+                flight = flights[key] = _Flight(asyncio.ensure_future(call(request, kwargs)))
+                flight.task.add_done_callback(lambda task: self._land(key, task))
+                return await asyncio.shield(flight.task)
+
+            if max_waiters is not None and flight.waiters >= max_waiters:
+                self._count_rejected(metrics)
+                logger.warning("CoalescePlugin rejected a request, %s requests wait for %s", flight.waiters, key)
+                raise TooManyWaitersError
+
+            flight.waiters += 1
+            try:
+                result = await asyncio.shield(flight.task)
+            except Exception:
+                # Exceptions are shared like results
+                self._count_coalesced(metrics)
+                raise
+            finally:
+                flight.waiters -= 1
+
+            # Sharing a stream would make requests consume the same iterator
+            if not can_resend(result):
+                return await call(request, kwargs)
+
+            self._count_coalesced(metrics)
+            return result
+
+        return coalesced_handler
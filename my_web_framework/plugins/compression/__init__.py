@@ -0,0 +1,7 @@
+from my_web_framework.plugins.compression.annotations import compress
+from my_web_framework.plugins.compression.plugin import CompressionPlugin
+
+__all__ = (
+    "compress",
+    "CompressionPlugin",
+)
@@ -0,0 +1,43 @@
+from collections.abc import Callable, Mapping
+
+from my_web_framework.annotations import Annotation, add_annotation
+from my_web_framework.content_coding import CODINGS
+
+
+class _CompressAnnotation(Annotation):
+    def __init__(self, min_size: int, level: int | Mapping[str, int] | None, name: str) -> None:
+        self.__min_size = min_size
+        self.__level = level
+        self.__name = name
+
+    def __str__(self) -> str:
+        return f"CompressAnnotation(min_size={self.__min_size}, level={self.__level})"
+
+    def __repr__(self) -> str:
+        return f"CompressAnnotation(min_size={self.__min_size}, level={self.__level})"
+
+    def min_size(self) -> int:
+        return self.__min_size
+
+    def level(self) -> int | Mapping[str, int] | None:
+        return self.__level
+
+    def name(self) -> str:
+        return self.__name
+
+
+def compress(min_size: int = 500, level: int | Mapping[str, int] | None = None) -> Callable:
+    """Compress responses of the endpoint of at least `min_size` bytes.
+
+    `level` overrides the default compression level, either of every coding, clamped
+    to the levels each of them supports, or per coding, e.g. `{"br": 5, "gzip": 6}`.
+    """
+    if isinstance(level, Mapping) and not CODINGS.issuperset(level):
+        msg = f"Unknown content codings {set(level) - CODINGS}, expected some of {set(CODINGS)}"
+        raise ValueError(msg)
+
+    def marker(method: Callable) -> Callable:
+        add_annotation(method, _CompressAnnotation(min_size, level, method.__qualname__))
+        return method
+
+    return marker
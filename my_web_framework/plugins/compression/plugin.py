@@ -0,0 +1,260 @@
+import functools
+import time
+from collections.abc import Callable, Mapping, MutableMapping
+from typing import Any, cast
+
+from starlette.requests import Request
+
+from my_web_framework.annotations import Annotation
+from my_web_framework.content_coding import CODECS, Codec, Compressor, negotiate
+from my_web_framework.instrumentation import Instrumentation
+from my_web_framework.plugins._base import Interceptor, Plugin, Send
+from my_web_framework.plugins.compression.annotations import _CompressAnnotation
+
+# Media types that are compressed already
+_COMPRESSED_TYPES = (
+    b"image/",
+    b"video/",
+    b"audio/",
+    b"font/woff",
+    b"application/zip",
+    b"application/gzip",
+    b"application/x-gzip",
+    b"application/zstd",
+    b"application/x-7z-compressed",
+)
+# Compressed images are skipped, but SVG is text
+_TEXT_IMAGE_TYPES = (b"image/svg+xml",)
+_VARY = (b"vary", b"Accept-Encoding")
+
+
+def _vary(start: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+    """Start message telling caches the response depends on `Accept-Encoding`."""
+    headers = start.get("headers", ())
+    for name, value in headers:
+        if name == b"vary" and b"accept-encoding" in value.lower():
+            return start
+    return {**start, "headers": [*headers, _VARY]}
+
+
+def _level(codec: Codec, coding: str, level: int | Mapping[str, int] | None) -> int:
+    if isinstance(level, Mapping):
+        level = level.get(coding)
+    return codec.clamp(level) if level is not None else codec.default_level
+
+
+class _CompressionMetrics:
+    __slots__ = ("compressed", "skipped", "bytes_in", "bytes_out", "cpu_time")
+
+    def __init__(self, instrumentation: Instrumentation, endpoint: str) -> None:
+        name, description = "compression_responses_total", "Responses to clients accepting a coding, by outcome"
+        self.compressed = instrumentation.counter(name, description, endpoint=endpoint, outcome="compressed")
+        self.skipped = instrumentation.counter(name, description, endpoint=endpoint, outcome="skipped")
+        self.bytes_in = instrumentation.counter(
+            "compression_input_bytes_total", "Sizes of compressed bodies before compression", endpoint=endpoint,
+        )
+        self.bytes_out = instrumentation.counter(
+            "compression_output_bytes_total", "Sizes of compressed bodies after compression", endpoint=endpoint,
+        )
+        self.cpu_time = instrumentation.counter(
+            "compression_cpu_seconds_total", "CPU time spent compressing", endpoint=endpoint,
+        )
+
+
+def _compressible(message: MutableMapping[str, Any], min_size: int) -> bool:
+    status = message["status"]
+    if status < 200 or status in (204, 304):  # noqa: PLR2004
+        return False
+
+    for name, value in message.get("headers", ()):
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            media_type = value.lower()
+            if media_type.startswith(_COMPRESSED_TYPES) and not media_type.startswith(_TEXT_IMAGE_TYPES):
+                return False
+        elif name == b"content-length" and int(value) < min_size:
+            return False
+
+    return True
+
+
+class _VaryingSend:
+    __slots__ = ("send",)
+
+    def __init__(self, send: Send) -> None:
+        self.send = send
+
+    async def __call__(self, message: MutableMapping[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            message = _vary(message)
+        await self.send(message)
+
+
+class _CompressingSend:
+    """Compresses the body of a response as it is sent.
+
+    The start message is held back until the first body chunk: bodies sent at
+    once are only compressed if they are large enough and actually get smaller,
+    streamed bodies are compressed chunk by chunk.
+    """
+
+    __slots__ = ("send", "coding", "compressor_factory", "compressor", "min_size", "metrics", "start", "passthrough")
+
+    def __init__(
+        self,
+        send: Send,
+        *,
+        coding: str,
+        compressor_factory: Callable[[], Compressor],
+        min_size: int,
+        metrics: _CompressionMetrics | None,
+    ) -> None:
+        self.send = send
+        self.coding = coding
+        # Compressors allocate their buffers, so they are only created for responses being compressed
+        self.compressor_factory = compressor_factory
+        self.compressor: Compressor | None = None
+        self.min_size = min_size
+        self.metrics = metrics
+        self.start: MutableMapping[str, Any] | None = None
+        self.passthrough = False
+
+    def _compress(self, body: bytes, *, finish: bool) -> bytes:
+        started_at = time.thread_time()
+        if self.compressor is None:
+            self.compressor = self.compressor_factory()
+        compressed = self.compressor.compress(body) if body else b""
+        if finish:
+            compressed += self.compressor.finish()
+        if self.metrics is not None:
+            self.metrics.cpu_time.inc(time.thread_time() - started_at)
+        return compressed
+
+    def _count(self, body: bytes, compressed: bytes) -> None:
+        if self.metrics is not None:
+            self.metrics.bytes_in.inc(len(body))
+            self.metrics.bytes_out.inc(len(compressed))
+
+    def _start(self, start: MutableMapping[str, Any], content_length: int | None) -> MutableMapping[str, Any]:
+        headers = []
+        for name, value in start.get("headers", ()):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # The compressed body is not byte for byte the one the strong validator was computed for
+                value = b"W/" + value  # noqa: PLW2901
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.coding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+
+        if self.metrics is not None:
+            self.metrics.compressed.inc()
+        return _vary({**start, "headers": headers})
+
+    async def _send_as_is(self, start: MutableMapping[str, Any], message: MutableMapping[str, Any] | None) -> None:
+        self.passthrough = True
+        if self.metrics is not None:
+            self.metrics.skipped.inc()
+        await self.send(_vary(start))
+        if message is not None:
+            await self.send(message)
+
+    async def __call__(self, message: MutableMapping[str, Any]) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if _compressible(message, self.min_size):
+                self.start = message
+            else:
+                await self._send_as_is(message, None)
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+
+            if not more_body:
+                # The whole body is known, skip it if it is small or does not compress
+                if len(body) < self.min_size:
+                    await self._send_as_is(start, message)
+                    return
+
+                compressed = self._compress(body, finish=True)
+                if len(compressed) >= len(body):
+                    await self._send_as_is(start, message)
+                    return
+
+                self._count(body, compressed)
+                await self.send(self._start(start, len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # The size of streamed bodies is not known upfront
+            await self.send(self._start(start, None))
+
+        compressed = self._compress(body, finish=not more_body)
+        self._count(body, compressed)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+
+class CompressionPlugin(Plugin):
+    """Compresses responses of endpoints annotated with `compress`.
+
+    The content coding is negotiated from `Accept-Encoding`, preferring zstd and
+    brotli when their packages are installed, then gzip and deflate.
+    """
+
+    def __init__(self) -> None:
+        self.__instrumentation: Instrumentation | None = None
+
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _CompressAnnotation)
+
+    def compile(self, annotations: list[Annotation]) -> None:  # noqa: ARG002
+        # Everything is done by the interceptor
+        return None
+
+    def intercept(self, annotations: list[Annotation]) -> Interceptor:
+        # The last annotation wins if a handler is annotated several times
+        annotation = cast(list[_CompressAnnotation], annotations)[-1]
+        min_size = annotation.min_size()
+        level = annotation.level()
+        # Levels are resolved once, each coding accepts a range of its own
+        compressor_factories = {
+            coding: functools.partial(codec.compressor, _level(codec, coding, level))
+            for coding, codec in CODECS.items()
+        }
+
+        # Metrics are only recorded when the application is instrumented
+        metrics = None
+        if self.__instrumentation is not None:
+            metrics = _CompressionMetrics(self.__instrumentation, annotation.name())
+
+        def interceptor(request: Request, send: Send) -> Send:
+            coding = negotiate(request.headers.get("accept-encoding", ""))
+            if coding is None:
+                # Caches must not serve this response to clients accepting a coding
+                return _VaryingSend(send)
+
+            return _CompressingSend(
+                send,
+                coding=coding,
+                compressor_factory=compressor_factories[coding],
+                min_size=min_size,
+                metrics=metrics,
+            )
+
+        return interceptor
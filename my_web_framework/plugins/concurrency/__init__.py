@@ -0,0 +1,8 @@
+from my_web_framework.plugins.concurrency.annotations import max_concurrency, timeout
+from my_web_framework.plugins.concurrency.plugin import ConcurrencyPlugin
+
+__all__ = (
+    "max_concurrency",
+    "timeout",
+    "ConcurrencyPlugin",
+)
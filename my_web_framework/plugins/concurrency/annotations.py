@@ -0,0 +1,98 @@
+from collections.abc import Callable
+
+from my_web_framework.annotations import Annotation, add_annotation, key_parameters
+
+
+class _MaxConcurrencyAnnotation(Annotation):
+    def __init__(
+        self,
+        limit: int,
+        key: Callable | None,
+        parameters: set[str],
+        namespace: str,
+        *,
+        max_queue: int | None,
+        max_wait: float | None,
+    ) -> None:
+        self.__limit = limit
+        self.__key = key
+        self.__parameters = frozenset(parameters.copy())
+        self.__namespace = namespace
+        self.__max_queue = max_queue
+        self.__max_wait = max_wait
+
+    def __str__(self) -> str:
+        return f"MaxConcurrencyAnnotation(limit={self.__limit}, parameters={self.__parameters})"
+
+    def __repr__(self) -> str:
+        return f"MaxConcurrencyAnnotation(limit={self.__limit}, parameters={self.__parameters})"
+
+    def limit(self) -> int:
+        return self.__limit
+
+    def key(self) -> Callable | None:
+        return self.__key
+
+    def parameters(self) -> frozenset[str]:
+        return self.__parameters
+
+    def namespace(self) -> str:
+        return self.__namespace
+
+    def max_queue(self) -> int | None:
+        return self.__max_queue
+
+    def max_wait(self) -> float | None:
+        return self.__max_wait
+
+
+class _TimeoutAnnotation(Annotation):
+    def __init__(self, seconds: float) -> None:
+        self.__seconds = seconds
+
+    def __str__(self) -> str:
+        return f"TimeoutAnnotation(seconds={self.__seconds})"
+
+    def __repr__(self) -> str:
+        return f"TimeoutAnnotation(seconds={self.__seconds})"
+
+    def seconds(self) -> float:
+        return self.__seconds
+
+
+def max_concurrency(
+    limit: int,
+    *,
+    key: Callable | None = None,
+    max_queue: int | None = None,
+    max_wait: float | None = None,
+) -> Callable:
+    """Allow at most `limit` concurrent calls of the handler, per value of the key function if given.
+
+    `max_queue` and `max_wait` override the defaults of the plugin.
+    """
+    def marker(method: Callable) -> Callable:
+        parameters = key_parameters(key, method) if key is not None else set()
+        add_annotation(
+            method,
+            _MaxConcurrencyAnnotation(
+                limit,
+                key,
+                parameters,
+                method.__qualname__,
+                max_queue=max_queue,
+                max_wait=max_wait,
+            ),
+        )
+        return method
+
+    return marker
+
+
+def timeout(seconds: float) -> Callable:
+    """Cancel the handler if the request is not handled within `seconds`."""
+    def marker(method: Callable) -> Callable:
+        add_annotation(method, _TimeoutAnnotation(seconds))
+        return method
+
+    return marker
@@ -0,0 +1,24 @@
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE, HttpException, problem_content
+
+
+class ConcurrencyLimitExceededError(HttpException):
+    def __init__(self, limit: int) -> None:
+        super().__init__(
+            status_code=503,
+            headers={
+                "Content-Type": PROBLEM_MEDIA_TYPE,
+                "Retry-After": "1",
+            },
+            content=problem_content(503, "Service unavailable", f"Concurrency limit of {limit} exceeded"),
+        )
+
+
+class DeadlineExceededError(HttpException):
+    def __init__(self, seconds: float) -> None:
+        super().__init__(
+            status_code=504,
+            headers={
+                "Content-Type": PROBLEM_MEDIA_TYPE,
+            },
+            content=problem_content(504, "Gateway timeout", f"Request was not handled within {seconds}s"),
+        )
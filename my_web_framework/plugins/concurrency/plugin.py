@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from starlette.requests import Request
+
+from my_web_framework.annotations import Annotation, compile_key_func
+from my_web_framework.plugins._base import Handler, Plugin
+from my_web_framework.plugins.concurrency.annotations import _MaxConcurrencyAnnotation, _TimeoutAnnotation
+from my_web_framework.plugins.concurrency.exceptions import ConcurrencyLimitExceededError, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+
+class _Bulkhead:
+    __slots__ = ("semaphore", "waiting", "users")
+
+    def __init__(self, limit: int) -> None:
+        self.semaphore = asyncio.Semaphore(limit)
+        # Requests waiting for a slot and requests holding or waiting for one
+        self.waiting = 0
+        self.users = 0
+
+
+class ConcurrencyPlugin(Plugin):
+    """Enforces `max_concurrency` and `timeout` annotations around the handler call.
+
+    Requests over the concurrency limit wait in a queue of at most `max_queue` requests
+    for at most `max_wait` seconds, and are rejected with 503 otherwise. Requests not
+    handled within their timeout are cancelled and rejected with 504. The timeout
+    includes the time spent in the queue.
+    """
+
+    def __init__(self, max_queue: int = 100, max_wait: float = 1.0) -> None:
+        self.__max_queue = max_queue
+        self.__max_wait = max_wait
+        # Bulkheads in use, keyed by handler and key function value
+        self.__bulkheads: dict[Any, _Bulkhead] = {}
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a concurrency slot."""
+        return sum(bulkhead.waiting for bulkhead in self.__bulkheads.values())
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _MaxConcurrencyAnnotation | _TimeoutAnnotation)
+
+    def compile(self, annotations: list[Annotation]) -> None:  # noqa: ARG002
+        # Everything is done by the handler wrapper
+        return None
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler:
+        # Limits are applied in the order of annotations, timeouts around all of them
+        for annotation in reversed(annotations):
+            if isinstance(annotation, _MaxConcurrencyAnnotation):
+                handler = self._wrap_max_concurrency(annotation, handler)
+
+        for annotation in annotations:
+            if isinstance(annotation, _TimeoutAnnotation):
+                handler = self._wrap_timeout(annotation.seconds(), handler)
+
+        return handler
+
+    @staticmethod
+    def _compile_key_func(annotation: _MaxConcurrencyAnnotation) -> Callable[[Request, dict[str, Any]], Any]:
+        namespace = (annotation.namespace(), id(annotation))
+
+        if annotation.key() is None:
+            # A single bulkhead per handler
+            def evaluate(_: Request, __: dict[str, Any]) -> Any:  # noqa: ANN401
+                return namespace
+        else:
+            key_func = compile_key_func(annotation.key(), annotation.parameters())
+
+            def evaluate(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+                return namespace, key_func(request, kwargs)
+
+        return evaluate
+
+    def _wrap_max_concurrency(self, annotation: _MaxConcurrencyAnnotation, handler: Handler) -> Handler:
+        limit = annotation.limit()
+        key_func = self._compile_key_func(annotation)
+        max_queue = annotation.max_queue() if annotation.max_queue() is not None else self.__max_queue
+        max_wait = annotation.max_wait() if annotation.max_wait() is not None else self.__max_wait
+        bulkheads = self.__bulkheads
+
+        async def limited_handler(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            key = key_func(request, kwargs)
+            bulkhead = bulkheads.get(key)
+            if bulkhead is None:
+                bulkhead = bulkheads[key] = _Bulkhead(limit)
+
+            if bulkhead.semaphore.locked() and bulkhead.waiting >= max_queue:
+                self.rejected += 1
+                raise ConcurrencyLimitExceededError(limit)
+
+            bulkhead.users += 1
+            try:
+                if bulkhead.semaphore.locked():
+                    bulkhead.waiting += 1
+                    try:
+                        async with asyncio.timeout(max_wait):
+                            await bulkhead.semaphore.acquire()
+                    except TimeoutError:
+                        self.rejected += 1
+                        raise ConcurrencyLimitExceededError(limit) from None
+                    finally:
+                        bulkhead.waiting -= 1
+                else:
+                    await bulkhead.semaphore.acquire()
+
+                try:
+                    return await handler(request, kwargs)
+                finally:
+                    bulkhead.semaphore.release()
+            finally:
+                bulkhead.users -= 1
+                # Keyed bulkheads are only kept while they are in use
+                if bulkhead.users == 0:
+                    del bulkheads[key]
+
+        return limited_handler
+
+    def _wrap_timeout(self, seconds: float, handler: Handler) -> Handler:
+        async def deadline_handler(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            deadline = asyncio.timeout(seconds)
+            try:
+                async with deadline:
+                    return await handler(request, kwargs)
+            except TimeoutError:
+                # Timeouts raised by the handler itself are not ours to report
+                if not deadline.expired():
+                    raise
+                self.timed_out += 1
+                logger.warning("Request was not handled within %ss: %s", seconds, request.url.path)
+                raise DeadlineExceededError(seconds) from None
+
+        return deadline_handler
@@ -0,0 +1,8 @@
+from my_web_framework.plugins.load_shedding.annotations import Priority, priority
+from my_web_framework.plugins.load_shedding.plugin import LoadSheddingPlugin
+
+__all__ = (
+    "priority",
+    "Priority",
+    "LoadSheddingPlugin",
+)
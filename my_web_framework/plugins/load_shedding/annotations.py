@@ -0,0 +1,35 @@
+import enum
+from collections.abc import Callable
+
+from my_web_framework.annotations import Annotation, add_annotation
+
+
+class Priority(enum.IntEnum):
+    # Never shed, e.g. health checks
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class _PriorityAnnotation(Annotation):
+    def __init__(self, tier: Priority) -> None:
+        self.__tier = tier
+
+    def __str__(self) -> str:
+        return f"PriorityAnnotation(tier={self.__tier.name})"
+
+    def __repr__(self) -> str:
+        return f"PriorityAnnotation(tier={self.__tier.name})"
+
+    def tier(self) -> Priority:
+        return self.__tier
+
+
+def priority(tier: Priority) -> Callable:
+    """Set the priority tier of the endpoint, lower tiers are shed first under overload."""
+    def marker(method: Callable) -> Callable:
+        add_annotation(method, _PriorityAnnotation(Priority(tier)))
+        return method
+
+    return marker
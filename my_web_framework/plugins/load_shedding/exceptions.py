@@ -0,0 +1,15 @@
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE, HttpException, problem_content
+
+_CONTENT = problem_content(503, "Service unavailable", "Server is overloaded")
+
+
+class LoadSheddingError(HttpException):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=503,
+            headers={
+                "Content-Type": PROBLEM_MEDIA_TYPE,
+                "Retry-After": str(retry_after),
+            },
+            content=_CONTENT,
+        )
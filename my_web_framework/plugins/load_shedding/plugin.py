@@ -0,0 +1,170 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, cast
+
+from starlette.requests import Request
+
+from my_web_framework.annotations import Annotation
+from my_web_framework.plugins._base import Handler, Plugin
+from my_web_framework.plugins.load_shedding.annotations import Priority, _PriorityAnnotation
+from my_web_framework.plugins.load_shedding.exceptions import LoadSheddingError
+
+logger = logging.getLogger(__name__)
+
+# Share of the concurrency limit available to each priority tier
+_TIER_SHARES = {
+    Priority.HIGH: 1.0,
+    Priority.NORMAL: 0.9,
+    Priority.LOW: 0.75,
+}
+
+
+class _EndpointLatency:
+    __slots__ = ("requests", "average", "baseline")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        # Moving average and the lowest latency seen recently, in seconds
+        self.average = 0.0
+        self.baseline = float("inf")
+
+
+class LoadSheddingPlugin(Plugin):
+    """Rejects requests early when the application is overloaded.
+
+    The number of requests handled at the same time is capped by a limit adapted
+    with AIMD: the limit grows by one while sampled latencies stay close to the
+    baseline latency of their endpoint and the event loop lag is low, and it is
+    cut by `backoff` otherwise. Requests over the share of the limit of their
+    priority tier are rejected with 503 before the controller runs. `CRITICAL`
+    endpoints are never shed.
+
+    The plugin is global and should be listed first, so requests are shed before
+    other plugins do any work.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 100,
+        min_limit: int = 10,
+        max_limit: int = 1000,
+        backoff: float = 0.9,
+        latency_tolerance: float = 2.0,
+        max_loop_lag: float = 0.05,
+        lag_check_interval: float = 0.1,
+        sample_every: int = 10,
+        retry_after: int = 1,
+        default_priority: Priority = Priority.NORMAL,
+    ) -> None:
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__backoff = backoff
+        self.__latency_tolerance = latency_tolerance
+        self.__max_loop_lag = max_loop_lag
+        self.__lag_check_interval = lag_check_interval
+        self.__sample_every = sample_every
+        self.__retry_after = retry_after
+        self.__default_priority = default_priority
+
+        self.__limit = float(initial_limit)
+        self.__in_flight = 0
+        self.__loop_lag = 0.0
+        self.__task: asyncio.Task | None = None
+        self.shed = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def loop_lag(self) -> float:
+        return self.__loop_lag
+
+    def is_global(self) -> bool:
+        return True
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _PriorityAnnotation)
+
+    async def startup(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.get_running_loop().create_task(self._measure_loop_lag())
+
+    async def shutdown(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__task
+            self.__task = None
+
+    async def _measure_loop_lag(self) -> None:
+        # A sleep finishing late means other callbacks kept the event loop busy
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.__lag_check_interval)
+            lag = time.perf_counter() - started_at - self.__lag_check_interval
+            self.__loop_lag = 0.8 * self.__loop_lag + 0.2 * max(0.0, lag)
+
+    def _adjust(self, latency: _EndpointLatency, elapsed: float) -> None:
+        latency.average = elapsed if latency.average == 0.0 else 0.9 * latency.average + 0.1 * elapsed
+        # The baseline follows the lowest latency, slowly drifting up to forget old minimums
+        latency.baseline = min(elapsed, latency.baseline + 0.01 * (elapsed - latency.baseline))
+
+        if elapsed > latency.baseline * self.__latency_tolerance or self.__loop_lag > self.__max_loop_lag:
+            limit = max(self.__min_limit, self.__limit * self.__backoff)
+            if int(limit) < int(self.__limit):
+                logger.warning(
+                    "Overload detected, concurrency limit lowered to %s (latency %.3fs, loop lag %.3fs)",
+                    int(limit), elapsed, self.__loop_lag,
+                )
+            self.__limit = limit
+        elif self.__in_flight >= self.__limit / 2:
+            # Only grow the limit when it is actually used
+            self.__limit = min(self.__max_limit, self.__limit + 1)
+
+    def compile(self, annotations: list[Annotation]) -> None:  # noqa: ARG002
+        # Everything is done by the handler wrapper
+        return None
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler | None:
+        anns = cast(list[_PriorityAnnotation], annotations)
+        # The last annotation wins if a handler is annotated several times
+        tier = anns[-1].tier() if anns else self.__default_priority
+        if tier is Priority.CRITICAL:
+            return None
+
+        share = _TIER_SHARES[tier]
+        latency = _EndpointLatency()
+        sample_every = self.__sample_every
+
+        async def shedding_handler(request: Request, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            if self.__in_flight >= self.__limit * share:
+                self.shed += 1
+                raise LoadSheddingError(self.__retry_after)
+
+            self.__in_flight += 1
+            latency.requests += 1
+            # Only a sample of requests is timed
+            if latency.requests % sample_every:
+                try:
+                    return await handler(request, kwargs)
+                finally:
+                    self.__in_flight -= 1
+
+            started_at = time.perf_counter()
+            try:
+                result = await handler(request, kwargs)
+            finally:
+                self.__in_flight -= 1
+            # Requests rejected or failed further in are fast for the wrong reasons, so only completed ones count
+            self._adjust(latency, time.perf_counter() - started_at)
+            return result
+
+        return shedding_handler
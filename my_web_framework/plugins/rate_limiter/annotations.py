@@ -1,18 +1,18 @@
-import inspect
 from collections.abc import Callable
 
 from limits import RateLimitItem, parse_many
 
-from my_web_framework.annotations import Annotation, add_annotation
+from my_web_framework.annotations import Annotation, add_annotation, key_parameters
 
 
 class _LimitAnnotation(Annotation):
-    def __init__(self, expression: str, key: Callable, parameters: set[str]) -> None:
+    def __init__(self, expression: str, key: Callable, parameters: set[str], endpoint: str) -> None:
         self.__expression = expression
         self.__limits = parse_many(expression)
         self.__key = key
         self.__parameters = frozenset(parameters.copy())
         self.__has_request_parameter = "request" in self.__parameters
+        self.__endpoint = endpoint
 
     def __str__(self) -> str:
         return (
@@ -38,30 +38,13 @@ class _LimitAnnotation(Annotation):
     def limits(self) -> list[RateLimitItem]:
         return self.__limits
 
+    def endpoint(self) -> str:
+        return self.__endpoint
+
 
 def limit(expression: str, key: Callable) -> Callable:
     def marker(method: Callable) -> Callable:
-        key_parameters = {
-            name
-            for name, value in inspect.signature(key).parameters.items()
-            if name != "self"
-        }
-        key_parameters_without_request = {
-            name for name in key_parameters if name != "request"
-        }
-        method_parameters = {
-            name
-            for name, value in inspect.signature(method).parameters.items()
-            if name != "self"
-        }
-
-        if not key_parameters_without_request.issubset(method_parameters):
-            msg = f"Key function `{key.__qualname__}` expects parameters not present in handler `{method.__qualname__}`:{key_parameters_without_request.difference(method_parameters)}"
-            raise ValueError(
-        msg,
-        )
-
-        add_annotation(method, _LimitAnnotation(expression, key, key_parameters))
+        add_annotation(method, _LimitAnnotation(expression, key, key_parameters(key, method), method.__qualname__))
         return method
 
     return marker
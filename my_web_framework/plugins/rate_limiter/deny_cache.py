@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+
+from limits import RateLimitItem
+
+
+class DenyCache:
+    """Remembers rejected limit keys until their reset time.
+
+    Requests for remembered keys can be rejected without touching the storage.
+    Expired entries are removed lazily, and the least recently rejected keys are
+    evicted once `max_size` keys are remembered.
+    """
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self.__max_size = max_size
+        self.__reset_times: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__reset_times)
+
+    def get(self, limit: RateLimitItem, key: str) -> float | None:
+        """Return the reset time of the limit if the key is known to be over it."""
+        storage_key = limit.key_for(key)
+        reset_time = self.__reset_times.get(storage_key)
+
+        if reset_time is None:
+            return None
+
+        if reset_time <= time.time():
+            del self.__reset_times[storage_key]
+            return None
+
+        return reset_time
+
+    def add(self, limit: RateLimitItem, key: str, reset_time: float) -> None:
+        storage_key = limit.key_for(key)
+        self.__reset_times[storage_key] = reset_time
+        self.__reset_times.move_to_end(storage_key)
+
+        while len(self.__reset_times) > self.__max_size:
+            self.__reset_times.popitem(last=False)
@@ -0,0 +1,79 @@
+import asyncio
+from collections.abc import Sequence
+from typing import NamedTuple, Protocol, runtime_checkable
+
+from limits import RateLimitItem
+from limits.aio.strategies import MovingWindowRateLimiter, RateLimiter
+
+
+class EvaluationResult(NamedTuple):
+    # Index of the first limit that rejected the request, `None` if all limits passed
+    failed: int | None
+    # Remaining amount and reset time of the failed limit, storages may also
+    # report them for the first limit when the request is admitted
+    remaining: int | None = None
+    reset_time: float | None = None
+
+
+@runtime_checkable
+class MultiLimitSupport(Protocol):
+    """Storages able to check and acquire moving window entries for several limits atomically."""
+
+    async def acquire_entries(self, entries: Sequence[tuple[str, int, int]]) -> EvaluationResult:
+        """Acquire an entry for each `(key, limit, expiry)` only if all of them have room."""
+        ...
+
+
+def _supports_multi_limit(limiter: RateLimiter) -> bool:
+    # Wrapping limiters may keep their own state, so only a plain moving window limiter qualifies
+    return type(limiter) is MovingWindowRateLimiter and isinstance(limiter.storage, MultiLimitSupport)
+
+
+async def _failed(limiter: RateLimiter, index: int, limit: RateLimitItem, key: str) -> EvaluationResult:
+    stats = await limiter.get_window_stats(limit, key)
+    return EvaluationResult(index, stats.remaining, stats.reset_time)
+
+
+async def evaluate_limits(
+    limiter: RateLimiter, limits: Sequence[tuple[RateLimitItem, str]],
+) -> EvaluationResult:
+    """Consume all limits if none of them is exceeded.
+
+    Limits are expected in the order they should be checked, the tightest first.
+    Storages implementing `MultiLimitSupport` check and consume all of them in one call.
+    Other storages take 2n - 1 calls for an admitted request with n limits, and a
+    request consuming a limit between the test and the hit of another one may still
+    make the latter consume the limits it is hit before being rejected.
+    """
+    if not limits:
+        return EvaluationResult(None)
+
+    if _supports_multi_limit(limiter):
+        return await limiter.storage.acquire_entries(
+            [(limit.key_for(key), limit.amount, limit.get_expiry()) for limit, key in limits],
+        )
+
+    # Without an atomic path, every limit but the last one is tested without consuming it.
+    # Tests are sent together, so checking costs one round trip of latency regardless of n.
+    tested = await asyncio.gather(*[limiter.test(limit, key) for limit, key in limits[:-1]])
+    for index, passed in enumerate(tested):
+        if not passed:
+            limit, key = limits[index]
+            return await _failed(limiter, index, limit, key)
+
+    # A moving window hit only consumes the limit when it passes,
+    # so the last limit is hit first instead of being tested
+    index = len(limits) - 1
+    limit, key = limits[index]
+    if not await limiter.hit(limit, key):
+        return await _failed(limiter, index, limit, key)
+
+    results = await asyncio.gather(*[limiter.hit(limit, key) for limit, key in limits[:-1]])
+
+    # Limits could have been consumed by concurrent requests since they were tested
+    for index, result in enumerate(results):
+        if not result:
+            limit, key = limits[index]
+            return await _failed(limiter, index, limit, key)
+
+    return EvaluationResult(None)
@@ -1,6 +1,6 @@
-import json
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE, HttpException, problem_content
 
-from my_web_framework.exceptions import HttpException
+_CONTENT = problem_content(429, "Too many requests", "Rate-limit policy exceeded")
 
 
 class RateLimitExceededError(HttpException):
@@ -8,23 +8,14 @@ class RateLimitExceededError(HttpException):
         super().__init__(
             status_code=429,
             headers={
-                "Content-Type": "application/problem+json",
+                "Content-Type": PROBLEM_MEDIA_TYPE,
                 "Retry-After": str(reset_time),
                 # https://datatracker.ietf.org/doc/draft-ietf-httpapi-ratelimit-headers/
                 "RateLimit-Limit": str(limit),
                 "RateLimit-Policy": policy,
                 "RateLimit-Reset": str(reset_time),
             },
-            content=json.dumps(
-                {
-                    "type": (
-                        "https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/429"
-                    ),
-                    "title": "Too many requests",
-                    "status": 429,
-                    "detail": "Rate-limit policy exceeded",
-                },
-            ),
+            content=_CONTENT,
         )
 
 
@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import enum
+import logging
+from collections import Counter
+from collections.abc import Callable
+
+from limits.aio.storage import Storage
+
+from my_web_framework.instrumentation import Gauge, Instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class StorageState(enum.Enum):
+    HEALTHY = "healthy"
+    # Recent probes failed, but not enough of them to give up on the storage yet
+    DEGRADED = "degraded"
+    FAILED = "failed"
+
+
+class StorageHealthMonitor:
+    """Periodically probes a rate limiter storage in the background.
+
+    The storage becomes `FAILED` after `failure_threshold` consecutive failed probes
+    and `HEALTHY` again only after `recovery_threshold` consecutive successful ones,
+    so a flapping storage does not make the limiter switch back and forth.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        on_transition: Callable[[StorageState, StorageState], None],
+        interval: float = 5.0,
+        unhealthy_interval: float = 1.0,
+        timeout: float = 1.0,
+        failure_threshold: int = 3,
+        recovery_threshold: int = 3,
+    ) -> None:
+        self.__storage = storage
+        self.__on_transition = on_transition
+        self.__interval = interval
+        self.__unhealthy_interval = unhealthy_interval
+        self.__timeout = timeout
+        self.__failure_threshold = failure_threshold
+        self.__recovery_threshold = recovery_threshold
+
+        self.__state = StorageState.HEALTHY
+        self.__failures = 0
+        self.__successes = 0
+        self.__task: asyncio.Task | None = None
+        self.transitions: Counter[tuple[StorageState, StorageState]] = Counter()
+        self.__instrumentation: Instrumentation | None = None
+        # Set to 1 for the current state and 0 for the others
+        self.__state_gauges: dict[StorageState, Gauge] = {}
+
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+        self.__state_gauges = {
+            state: instrumentation.gauge(
+                "rate_limit_storage_state", "Current state of the rate limiter storage", state=state.value,
+            )
+            for state in StorageState
+        }
+        self._record_state()
+
+    def _record_state(self) -> None:
+        for state, gauge in self.__state_gauges.items():
+            gauge.set(1 if state is self.__state else 0)
+
+    @property
+    def state(self) -> StorageState:
+        return self.__state
+
+    async def _check(self) -> bool:
+        try:
+            # `wait_for` may swallow a cancellation racing with the check, keeping `stop` waiting
+            async with asyncio.timeout(self.__timeout):
+                return await self.__storage.check()
+        except Exception:  # noqa: BLE001
+            logger.debug("Rate limiter storage health check failed", exc_info=True)
+            return False
+
+    async def probe(self) -> StorageState:
+        if await self._check():
+            self.__failures = 0
+            self.__successes += 1
+            if self.__state is StorageState.DEGRADED or (
+                self.__state is StorageState.FAILED and self.__successes >= self.__recovery_threshold
+            ):
+                self._transition(StorageState.HEALTHY)
+        else:
+            self.__successes = 0
+            self.__failures += 1
+            if self.__failures >= self.__failure_threshold:
+                self._transition(StorageState.FAILED)
+            elif self.__state is StorageState.HEALTHY:
+                self._transition(StorageState.DEGRADED)
+
+        return self.__state
+
+    def _transition(self, state: StorageState) -> None:
+        previous, self.__state = self.__state, state
+        if previous is state:
+            return
+
+        self.transitions[previous, state] += 1
+        if self.__instrumentation is not None:
+            # Transitions are rare, so their counters are looked up when they happen
+            self.__instrumentation.counter(
+                "rate_limit_storage_transitions_total",
+                "State transitions of the rate limiter storage",
+                **{"from": previous.value, "to": state.value},
+            ).inc()
+            self._record_state()
+        logger.warning("Rate limiter storage state changed from %s to %s", previous.value, state.value)
+        self.__on_transition(previous, state)
+
+    async def _run(self) -> None:
+        while True:
+            state = await self.probe()
+            await asyncio.sleep(
+                self.__interval if state is StorageState.HEALTHY else self.__unhealthy_interval,
+            )
+
+    def start(self) -> None:
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__task
+            self.__task = None
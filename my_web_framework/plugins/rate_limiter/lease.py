@@ -0,0 +1,94 @@
+import time
+
+from limits import RateLimitItem
+from limits.aio.strategies import RateLimiter
+from limits.util import WindowStats
+
+
+class _Lease:
+    __slots__ = ("remaining", "expires_at", "exhausted")
+
+    def __init__(self, remaining: int, expires_at: float, *, exhausted: bool = False) -> None:
+        self.remaining = remaining
+        self.expires_at = expires_at
+        # Set when the storage had no room for a whole lease
+        self.exhausted = exhausted
+
+
+class LeasedRateLimiter(RateLimiter):
+    """Rate limiter that acquires shared quota in batches and draws it down in memory.
+
+    When a key has no local budget, `lease_size` hits are acquired from the wrapped
+    limiter with a single storage call and handed out locally, so hot keys reach the
+    shared storage once per `lease_size` requests. When there is no room left for a
+    whole lease, hits go to the storage one at a time.
+
+    Leased hits are recorded when the lease is acquired, so they leave the moving window
+    up to `lease_ttl` seconds early. This bounds over-admission to `lease_size` hits per
+    worker and key. Budget left over when a lease expires is not returned to the storage.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        lease_size: int,
+        lease_ttl: float = 1.0,
+        max_leases: int = 100_000,
+    ) -> None:
+        super().__init__(limiter.storage)
+        self.__limiter = limiter
+        self.__lease_size = lease_size
+        self.__lease_ttl = lease_ttl
+        self.__max_leases = max_leases
+        self.__leases: dict[str, _Lease] = {}
+
+    def _lease(self, key: str, now: float) -> _Lease | None:
+        lease = self.__leases.get(key)
+        if lease is not None and lease.expires_at <= now:
+            del self.__leases[key]
+            return None
+        return lease
+
+    async def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        key = item.key_for(*identifiers)
+        now = time.monotonic()
+
+        lease = self._lease(key, now)
+        if lease is not None:
+            if lease.remaining >= cost:
+                lease.remaining -= cost
+                return True
+            if lease.exhausted:
+                return await self.__limiter.hit(item, *identifiers, cost=cost)
+
+        size = min(self.__lease_size, item.amount)
+        if size > cost and await self.__limiter.hit(item, *identifiers, cost=size):
+            # Another request could have acquired a lease for the same key meanwhile
+            lease = self._lease(key, now)
+            if lease is None:
+                self._store(key, _Lease(size - cost, now + self.__lease_ttl))
+            else:
+                lease.remaining += size - cost
+            return True
+
+        # Not enough quota left for a whole lease, fall back to exact hits until the lease expires
+        self._store(key, _Lease(0, now + self.__lease_ttl, exhausted=True))
+        return await self.__limiter.hit(item, *identifiers, cost=cost)
+
+    def _store(self, key: str, lease: _Lease) -> None:
+        if key not in self.__leases and len(self.__leases) >= self.__max_leases:
+            del self.__leases[next(iter(self.__leases))]
+        self.__leases[key] = lease
+
+    async def test(self, item: RateLimitItem, *identifiers: str) -> bool:
+        lease = self._lease(item.key_for(*identifiers), time.monotonic())
+        if lease is not None and lease.remaining > 0:
+            return True
+        return await self.__limiter.test(item, *identifiers)
+
+    async def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        return await self.__limiter.get_window_stats(item, *identifiers)
+
+    async def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        self.__leases.pop(item.key_for(*identifiers), None)
+        await self.__limiter.clear(item, *identifiers)
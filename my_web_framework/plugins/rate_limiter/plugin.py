@@ -1,112 +1,243 @@
-import asyncio
 import logging
 import time
+from collections.abc import Mapping, MutableMapping
 from typing import Any, cast
 
 from limits import RateLimitItem
 from limits.aio import storage, strategies
 from limits.aio.strategies import RateLimiter
-from limits.storage import storage_from_string
 from starlette.requests import Request
 
-from my_web_framework.annotations import Annotation
-from my_web_framework.plugins._base import Plugin
+from my_web_framework.annotations import Annotation, compile_key_func
+from my_web_framework.exceptions import PROBLEM_MEDIA_TYPE
+from my_web_framework.instrumentation import FAST_BUCKETS, Instrumentation
+from my_web_framework.plugins._base import Interceptor, Plugin, Send, Stage
 from my_web_framework.plugins.rate_limiter.annotations import _LimitAnnotation
+from my_web_framework.plugins.rate_limiter.deny_cache import DenyCache
+from my_web_framework.plugins.rate_limiter.evaluation import EvaluationResult, evaluate_limits
 from my_web_framework.plugins.rate_limiter.exceptions import RateLimitExceededError, UnsupportedRateLimiterStorageError
+from my_web_framework.plugins.rate_limiter.health import StorageHealthMonitor, StorageState
+from my_web_framework.plugins.rate_limiter.lease import LeasedRateLimiter
+from my_web_framework.plugins.rate_limiter.storages import storage_from_string
 
 logger = logging.getLogger(__name__)
 
 
+class _LimitMetrics:
+    __slots__ = ("allowed", "denied", "fallback", "storage", "fallback_storage")
+
+    def __init__(self, instrumentation: Instrumentation, endpoint: str) -> None:
+        name, description = "rate_limit_decisions_total", "Requests checked against rate limits, by decision"
+        self.allowed = instrumentation.counter(name, description, endpoint=endpoint, decision="allow")
+        self.denied = instrumentation.counter(name, description, endpoint=endpoint, decision="deny")
+        # Requests checked against the fallback storage while the configured one failed
+        self.fallback = instrumentation.counter(
+            "rate_limit_fallback_total", "Requests checked against the fallback storage", endpoint=endpoint,
+        )
+
+        name = "rate_limit_storage_duration_seconds"
+        description = "Time spent evaluating limits of a request in the storage"
+        self.storage = instrumentation.histogram(name, description, FAST_BUCKETS, storage="configured")
+        self.fallback_storage = instrumentation.histogram(name, description, FAST_BUCKETS, storage="fallback")
+
+
 class RateLimiterPlugin(Plugin):
-    def __init__(self, storage_uri: str = "async+memory://") -> None:
+    def __init__(
+        self,
+        storage_uri: str = "async+memory://",
+        *,
+        storage_options: Mapping[str, Any] | None = None,
+        health_check_interval: float = 5.0,
+        unhealthy_health_check_interval: float = 1.0,
+        health_check_timeout: float = 1.0,
+        failure_threshold: int = 3,
+        recovery_threshold: int = 3,
+        lease_size: int | None = None,
+        lease_ttl: float = 1.0,
+        deny_cache_size: int | None = None,
+    ) -> None:
         if not storage_uri.startswith("async+"):
             msg = "Only async rate limiter storages are supported"
-            raise UnsupportedRateLimiterStorageError(
-        msg,
-        )
+            raise UnsupportedRateLimiterStorageError(msg)
 
-        self.__storage = storage_from_string(storage_uri)
-        self.__rate_limiter = strategies.MovingWindowRateLimiter(self.__storage)
+        # Options such as `connection_pool` are passed to the storage constructor
+        self.__storage = storage_from_string(storage_uri, **(storage_options or {}))
+        self.__rate_limiter: RateLimiter = strategies.MovingWindowRateLimiter(self.__storage)
+        if lease_size is not None:
+            # Draw shared quota down in memory to avoid a storage round trip per hit
+            self.__rate_limiter = LeasedRateLimiter(self.__rate_limiter, lease_size, lease_ttl)
+
+        # Rejected keys are remembered until their reset time to spare storage round trips
+        self.__deny_cache = DenyCache(deny_cache_size) if deny_cache_size else None
 
         self.__fallback_storage = storage.MemoryStorage()
         self.__fallback_rate_limiter = strategies.MovingWindowRateLimiter(
             self.__fallback_storage,
         )
 
-    def is_supported_annotation(self, annotation: Annotation) -> bool:
-        return isinstance(annotation, _LimitAnnotation)
+        self.__instrumentation: Instrumentation | None = None
+
+        # Limiter used by requests, swapped by the health monitor when storage state changes
+        self.__active_rate_limiter: RateLimiter = self.__rate_limiter
+        self.__health_monitor = StorageHealthMonitor(
+            self.__storage,
+            on_transition=self._on_storage_transition,
+            interval=health_check_interval,
+            unhealthy_interval=unhealthy_health_check_interval,
+            timeout=health_check_timeout,
+            failure_threshold=failure_threshold,
+            recovery_threshold=recovery_threshold,
+        )
 
-    def _evaluate_key_func(
-            self, annotation: _LimitAnnotation, request: Request, kwargs: dict[str, Any],
-    ) -> str:
-        kwargs = {
-            name: value
-            for name, value in kwargs.items()
-            if name in annotation.parameters()
-        }
-        key_func = annotation.key()
+    @property
+    def health_monitor(self) -> StorageHealthMonitor:
+        return self.__health_monitor
 
-        if annotation.has_request_parameter():
-            return key_func(request=request, **kwargs)
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+        self.__health_monitor.instrument(instrumentation)
 
-        return key_func(**kwargs)
+    async def startup(self) -> None:
+        self.__health_monitor.start()
 
-    async def _evaluate_limit(
-            self, limit: RateLimitItem, key: str,
-    ) -> tuple[RateLimitItem, str, bool]:
-        return limit, key, await self._limiter.hit(limit, key)
+    async def shutdown(self) -> None:
+        await self.__health_monitor.stop()
 
-    def _collect_limits(
-            self, annotation: _LimitAnnotation, request: Request, kwargs: dict[str, Any],
-    ) -> list[tuple[RateLimitItem, str]]:
-        key = self._evaluate_key_func(annotation, request, kwargs)
-        return [(limit, key) for limit in annotation.limits()]
+    def _on_storage_transition(self, _: StorageState, state: StorageState) -> None:
+        # Degraded storage is still used until it is considered failed
+        if state is StorageState.FAILED:
+            self.__active_rate_limiter = self.__fallback_rate_limiter
+        else:
+            self.__active_rate_limiter = self.__rate_limiter
+
+    def is_supported_annotation(self, annotation: Annotation) -> bool:
+        return isinstance(annotation, _LimitAnnotation)
 
     @property
     def _limiter(self) -> RateLimiter:
-        # Check if storage is healthy and use fallback storage otherwise
-        # TODO: we should not check storage health on each limit check
-        if self.__storage.check():
-            return self.__rate_limiter
+        # Storage health is checked in the background by the health monitor
+        return self.__active_rate_limiter
 
-        return self.__fallback_rate_limiter
+    @staticmethod
+    def _policy(annotations: list[_LimitAnnotation]) -> str:
+        # Collect rate limit policy
+        return ", ".join(
+            [
+                f"{limit.amount};w={limit.get_expiry()}"
+                for annotation in annotations
+                for limit in annotation.limits()
+            ],
+        )
+
+    def openapi(self, annotations: list[Annotation]) -> Mapping[str, Any]:
+        integer = {"schema": {"type": "integer"}}
+        return {
+            "x-ratelimit-policy": self._policy(cast(list[_LimitAnnotation], annotations)),
+            "responses": {
+                "429": {
+                    "description": "Too many requests",
+                    "headers": {
+                        "Retry-After": integer,
+                        "RateLimit-Limit": integer,
+                        "RateLimit-Policy": {"schema": {"type": "string"}},
+                        "RateLimit-Reset": integer,
+                    },
+                    "content": {PROBLEM_MEDIA_TYPE: {"schema": {"type": "object"}}},
+                },
+            },
+        }
+
+    def intercept(self, annotations: list[Annotation]) -> Interceptor:
+        # Rejections carry the policy already, admitted requests get it as well
+        header = (b"ratelimit-policy", self._policy(cast(list[_LimitAnnotation], annotations)).encode("latin-1"))
 
-    async def do_something(
-            self, annotations: list[Annotation], request: Request, **kwargs: Any,  # noqa: ANN401
+        def interceptor(_: Request, send: Send) -> Send:
+            async def send_with_policy(message: MutableMapping[str, Any]) -> None:
+                if message["type"] == "http.response.start" and message["status"] < 400:  # noqa: PLR2004
+                    message["headers"] = [*message.get("headers", ()), header]
+                await send(message)
+
+            return send_with_policy
+
+        return interceptor
+
+    def _check_deny_cache(
+        self, limits: list[tuple[RateLimitItem, str]], policy: str, metrics: _LimitMetrics | None,
     ) -> None:
+        for limit, key in limits:
+            reset_time = self.__deny_cache.get(limit, key)
+            if reset_time is not None:
+                if metrics is not None:
+                    metrics.denied.inc()
+                raise RateLimitExceededError(
+                    reset_time=int(reset_time - time.time()) + 1,
+                    limit=limit.amount,
+                    policy=policy,
+                )
+
+    async def _evaluate(
+        self, limits: list[tuple[RateLimitItem, str]], metrics: _LimitMetrics | None,
+    ) -> EvaluationResult:
+        limiter = self._limiter
+        if metrics is None:
+            return await evaluate_limits(limiter, limits)
+
+        started_at = time.perf_counter()
+        result = await evaluate_limits(limiter, limits)
+        if limiter is self.__fallback_rate_limiter:
+            metrics.fallback_storage.observe(time.perf_counter() - started_at)
+            metrics.fallback.inc()
+        else:
+            metrics.storage.observe(time.perf_counter() - started_at)
+        if result.failed is None:
+            metrics.allowed.inc()
+        else:
+            metrics.denied.inc()
+        return result
+
+    def compile(self, annotations: list[Annotation]) -> Stage:
         anns = cast(list[_LimitAnnotation], annotations)
 
-        # Collect all rate limits
-        limits = []
-        for annotation in anns:
-            limits.extend(self._collect_limits(annotation, request, kwargs))
+        # Key functions and limits do not change between requests
+        key_funcs = [compile_key_func(annotation.key(), annotation.parameters()) for annotation in anns]
 
-        # Collect rate limit policy
-        policy = ", ".join(
-            [f"{limit.amount};w={limit.get_expiry()}" for limit, _ in limits],
+        # Limits are checked starting from the tightest window,
+        # along with the index of the key function they are evaluated with
+        ordered_limits = sorted(
+            [(index, limit) for index, annotation in enumerate(anns) for limit in annotation.limits()],
+            key=lambda item: (item[1].get_expiry(), item[1].amount),
         )
 
-        # Check all rate limits concurrently
-        results = await asyncio.gather(
-            *[self._evaluate_limit(limit, key) for limit, key in limits],
-        )
+        policy = self._policy(anns)
+        # Metrics are only recorded when the application is instrumented
+        metrics = None
+        if self.__instrumentation is not None:
+            metrics = _LimitMetrics(self.__instrumentation, anns[0].endpoint())
+
+        async def check_limits(request: Request, kwargs: dict[str, Any]) -> None:
+            # Collect all rate limits
+            keys = [key_func(request, kwargs) for key_func in key_funcs]
+            limits = [(limit, keys[index]) for index, limit in ordered_limits]
+
+            # Reject known offenders without touching the storage
+            if self.__deny_cache is not None:
+                self._check_deny_cache(limits, policy, metrics)
+
+            # Limits are only consumed if none of them is exceeded
+            result = await self._evaluate(limits, metrics)
+
+            if result.failed is not None:
+                failed_rate_limit, failed_rate_limit_key = limits[result.failed]
+
+                if self.__deny_cache is not None:
+                    self.__deny_cache.add(failed_rate_limit, failed_rate_limit_key, result.reset_time)
+
+                raise RateLimitExceededError(
+                    reset_time=int(result.reset_time - time.time()) + 1,
+                    limit=failed_rate_limit.amount,
+                    policy=policy,
+                )
+
+            logger.debug("RateLimiterPlugin admitted a request: %s, %s", request.scope["path"], kwargs)
 
-        failed_rate_limit = None
-        failed_rate_limit_stats = None
-
-        # Check rate limiting results
-        for limit, key, result in results:
-            if not result and not failed_rate_limit:
-                stats = await self._limiter.get_window_stats(limit, key)
-                failed_rate_limit = limit
-                failed_rate_limit_stats = stats
-
-        if failed_rate_limit:
-            reset_time = int(failed_rate_limit_stats.reset_time - time.time()) + 1
-            raise RateLimitExceededError(
-                reset_time=reset_time,
-                limit=failed_rate_limit.amount,
-                policy=policy,
-            )
-
-        logger.info("RateLimiterPlugin is being called: %s, %s, %s", annotations, request, kwargs)
+        return check_limits
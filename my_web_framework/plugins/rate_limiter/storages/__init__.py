@@ -0,0 +1,26 @@
+from typing import Any
+from urllib.parse import urlparse
+
+from limits.aio.storage import RedisStorage, Storage
+from limits.storage import storage_from_string as limits_storage_from_string
+
+# Storages register their URI schemes with `limits` when imported
+from my_web_framework.plugins.rate_limiter.storages.redis import RedisMultiLimitStorage
+from my_web_framework.plugins.rate_limiter.storages.sharded_memory import ShardedMemoryStorage
+from my_web_framework.plugins.rate_limiter.storages.shared_memory import SharedMemoryStorage
+
+
+def storage_from_string(storage_uri: str, **options: Any) -> Storage:  # noqa: ANN401
+    """Create a storage from its URI, preferring framework storages over `limits` ones for the same scheme."""
+    if urlparse(storage_uri).scheme in RedisStorage.STORAGE_SCHEME:
+        return RedisMultiLimitStorage(storage_uri, **options)
+
+    return limits_storage_from_string(storage_uri, **options)
+
+
+__all__ = (
+    "RedisMultiLimitStorage",
+    "ShardedMemoryStorage",
+    "SharedMemoryStorage",
+    "storage_from_string",
+)
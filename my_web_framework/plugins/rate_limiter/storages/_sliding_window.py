@@ -0,0 +1,11 @@
+def window_start(now: float, expiry: int) -> float:
+    return now - now % expiry
+
+
+def estimate(previous: int, current: int, start: float, expiry: int, now: float) -> float:
+    """Approximate the number of hits in the moving window ending now.
+
+    Hits of the previous fixed window are weighted by how much of it
+    still overlaps with the moving window.
+    """
+    return previous * (1 - (now - start) / expiry) + current
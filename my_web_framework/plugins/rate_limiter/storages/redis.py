@@ -0,0 +1,76 @@
+import time
+from collections.abc import Sequence
+
+from limits.aio.storage import RedisStorage
+
+from my_web_framework.plugins.rate_limiter.evaluation import EvaluationResult
+
+
+class RedisMultiLimitStorage(RedisStorage):
+    """Redis storage evaluating all limits of a request with a single script call.
+
+    The script checks the moving window of every key and only records the hit when all
+    of them have room. It returns the index of the failed limit along with its remaining
+    amount and reset time, or those of the first limit when the request is admitted, so
+    a request costs exactly one round trip over the pooled client connection.
+
+    Keys of a request are not guaranteed to hash to the same slot, so this storage is
+    not used with Redis Cluster.
+    """
+
+    SCRIPT_ACQUIRE_ENTRIES = """
+local timestamp = tonumber(ARGV[1])
+
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local expiry = tonumber(ARGV[i * 2 + 1])
+    local entry = redis.call('lindex', KEYS[i], limit - 1)
+
+    if entry and tonumber(entry) >= timestamp - expiry then
+        return {i, 0, tostring(tonumber(entry) + expiry)}
+    end
+end
+
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local expiry = tonumber(ARGV[i * 2 + 1])
+
+    redis.call('lpush', KEYS[i], ARGV[1])
+    redis.call('ltrim', KEYS[i], 0, limit - 1)
+    redis.call('expire', KEYS[i], expiry)
+end
+
+local limit = tonumber(ARGV[2])
+local expiry = tonumber(ARGV[3])
+local items = redis.call('lrange', KEYS[1], 0, limit - 1)
+local count = 0
+local oldest = timestamp
+
+for idx = 1, #items do
+    local item = tonumber(items[idx])
+    if item < timestamp - expiry then
+        break
+    end
+    count = count + 1
+    oldest = item
+end
+
+return {0, limit - count, tostring(oldest + expiry)}
+"""
+
+    def initialize_storage(self, uri: str) -> None:
+        super().initialize_storage(uri)
+        self.lua_acquire_entries = self.storage.register_script(self.SCRIPT_ACQUIRE_ENTRIES)
+
+    async def acquire_entries(self, entries: Sequence[tuple[str, int, int]]) -> EvaluationResult:
+        args: list[float | int] = [time.time()]
+        for _, limit, expiry in entries:
+            args.extend((limit, expiry))
+
+        failed, remaining, reset_time = await self.lua_acquire_entries.execute(
+            [key for key, _, _ in entries], args,
+        )
+
+        return EvaluationResult(
+            None if failed == 0 else int(failed) - 1, int(remaining), float(reset_time),
+        )
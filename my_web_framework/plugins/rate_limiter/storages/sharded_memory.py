@@ -0,0 +1,192 @@
+import itertools
+import logging
+import sys
+import time
+from collections.abc import Sequence
+from urllib.parse import parse_qs, urlparse
+
+from limits.aio.storage import MovingWindowSupport, Storage
+
+from my_web_framework.plugins.rate_limiter.evaluation import EvaluationResult
+from my_web_framework.plugins.rate_limiter.storages._sliding_window import estimate, window_start
+
+logger = logging.getLogger(__name__)
+
+
+class _Counter:
+    __slots__ = ("window_start", "expiry", "current", "previous")
+
+    def __init__(self, window_start: float, expiry: int) -> None:
+        self.window_start = window_start
+        self.expiry = expiry
+        self.current = 0
+        self.previous = 0
+
+    def expired(self, now: float) -> bool:
+        # Hits of a window are still weighted in during the following window
+        return self.window_start + 2 * self.expiry <= now
+
+
+class ShardedMemoryStorage(Storage, MovingWindowSupport):
+    """In-memory storage with a bounded number of fixed size counters.
+
+    The moving window is approximated with a sliding window counter: hits are
+    counted in fixed windows, and the previous window is weighted by how much of it
+    still overlaps with the moving window. Each key needs a single counter instead
+    of an entry per hit.
+
+    Expired counters are removed lazily when they are accessed or when a shard is
+    full. Shards keep counters ordered by the last window they were used in, so the
+    oldest ones are checked for expiry first. Live counters are never evicted, since
+    that would let their keys exceed the limit: when a shard is full and none of its
+    oldest counters expired, hits of new keys are rejected and a warning is logged,
+    so memory stays bounded by `max_entries`.
+
+    Usage: `async+sharded-memory://?shards=64&max_entries=1000000`
+    """
+
+    STORAGE_SCHEME = ["async+sharded-memory"]
+
+    # Number of oldest counters inspected for expiry when a shard is full
+    EVICTION_BATCH = 16
+
+    def __init__(self, uri: str | None = None, **options: str) -> None:
+        query = {name: values[-1] for name, values in parse_qs(urlparse(uri or "").query).items()}
+        query.update(options)
+        shards = int(query.get("shards", 64))
+        max_entries = int(query.get("max_entries", 1_000_000))
+
+        self.__shards: list[dict[str, _Counter]] = [{} for _ in range(shards)]
+        self.__shard_capacity = max(1, max_entries // shards)
+        super().__init__(uri)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.__shards)
+
+    def _shard(self, key: str) -> dict[str, _Counter]:
+        return self.__shards[hash(key) % len(self.__shards)]
+
+    def _insert(self, shard: dict[str, _Counter], key: str, counter: _Counter, now: float) -> bool:
+        if len(shard) >= self.__shard_capacity:
+            oldest = list(itertools.islice(shard.items(), self.EVICTION_BATCH))
+            expired = [name for name, candidate in oldest if candidate.expired(now)]
+            if not expired:
+                # Evicting a live counter would let its key exceed the limit, so the hit is rejected instead
+                logger.warning("Sharded memory rate limit storage is full, rejecting a hit, consider more max_entries")
+                return False
+            for name in expired:
+                del shard[name]
+        shard[key] = counter
+        return True
+
+    def _counter(self, key: str, expiry: int, now: float, create: bool) -> _Counter | None:
+        shard = self._shard(key)
+        start = window_start(now, expiry)
+        counter = shard.get(key)
+
+        if counter is None:
+            if create:
+                counter = _Counter(start, expiry)
+                if not self._insert(shard, key, counter, now):
+                    return None
+            return counter
+
+        if counter.window_start != start:
+            # Roll the windows over, the previous window is only kept if it is adjacent
+            counter.previous = counter.current if counter.window_start + expiry == start else 0
+            counter.current = 0
+            counter.window_start = start
+
+            # Keep counters used in recent windows at the end of the shard
+            del shard[key]
+            if not counter.previous and not create:
+                return None
+            shard[key] = counter
+
+        return counter
+
+    @staticmethod
+    def _estimate(counter: _Counter, expiry: int, now: float) -> float:
+        return estimate(counter.previous, counter.current, counter.window_start, expiry, now)
+
+    async def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        now = time.time()
+        counter = self._counter(key, expiry, now, create=True)
+
+        if counter is None or self._estimate(counter, expiry, now) + amount > limit:
+            return False
+
+        counter.current += amount
+        return True
+
+    async def acquire_entries(self, entries: Sequence[tuple[str, int, int]]) -> EvaluationResult:
+        now = time.time()
+        counters = []
+        for index, (key, _, expiry) in enumerate(entries):
+            counter = self._counter(key, expiry, now, create=True)
+            if counter is None:
+                return EvaluationResult(index, 0, now + expiry)
+            counters.append(counter)
+
+        # Nothing is awaited between checking and updating counters, so this is atomic
+        for index, (counter, (_, limit, expiry)) in enumerate(zip(counters, entries, strict=True)):
+            count = self._estimate(counter, expiry, now)
+            if count + 1 > limit:
+                return EvaluationResult(index, max(0, limit - int(count)), counter.window_start + expiry)
+
+        for counter in counters:
+            counter.current += 1
+
+        return EvaluationResult(None)
+
+    async def get_moving_window(self, key: str, limit: int, expiry: int) -> tuple[int, int]:  # noqa: ARG002
+        now = time.time()
+        counter = self._counter(key, expiry, now, create=False)
+
+        if counter is None:
+            return int(now), 0
+
+        # The approximated window is considered reset when the current fixed window ends
+        return int(counter.window_start), int(self._estimate(counter, expiry, now))
+
+    async def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        now = time.time()
+        shard = self._shard(key)
+        counter = shard.get(key)
+
+        # Fixed window strategies store the start of the window and the number of hits
+        if counter is None or counter.window_start + counter.expiry <= now:
+            counter = _Counter(now, expiry)
+            shard.pop(key, None)
+            if not self._insert(shard, key, counter, now):
+                # Above any limit, so fixed window strategies reject the hit
+                return sys.maxsize
+        elif elastic_expiry:
+            counter.window_start = now
+
+        counter.current += amount
+        return counter.current
+
+    async def get(self, key: str) -> int:
+        counter = self._shard(key).get(key)
+        if counter is None or counter.window_start + counter.expiry <= time.time():
+            return 0
+        return counter.current
+
+    async def get_expiry(self, key: str) -> int:
+        counter = self._shard(key).get(key)
+        if counter is None:
+            return int(time.time())
+        return int(counter.window_start + counter.expiry)
+
+    async def check(self) -> bool:
+        return True
+
+    async def reset(self) -> int | None:
+        count = len(self)
+        for shard in self.__shards:
+            shard.clear()
+        return count
+
+    async def clear(self, key: str) -> None:
+        self._shard(key).pop(key, None)
@@ -0,0 +1,325 @@
+import asyncio
+import contextlib
+import errno
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from limits.aio.storage import MovingWindowSupport, Storage
+
+from my_web_framework.plugins.rate_limiter.evaluation import EvaluationResult
+from my_web_framework.plugins.rate_limiter.storages._sliding_window import estimate, window_start
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Not available on Windows, the storage cannot be used there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"MWFRL001"
+# Magic, number of stripes and number of slots per stripe
+_HEADER = struct.Struct("<8sII")
+# Key fingerprint, window start, expiry, hits in the current and the previous window
+_SLOT = struct.Struct("<QdIII4x")
+# Delays between attempts to lock a stripe held by another process
+_LOCK_BACKOFF = 0.0001
+_MAX_LOCK_BACKOFF = 0.01
+
+
+class _Slot:
+    __slots__ = ("offset", "fingerprint", "window_start", "expiry", "current", "previous")
+
+    def __init__(self, offset: int, values: tuple[int, float, int, int, int]) -> None:
+        self.offset = offset
+        self.fingerprint, self.window_start, self.expiry, self.current, self.previous = values
+
+
+class SharedMemoryStorage(Storage, MovingWindowSupport):
+    """Storage shared by all processes on a host through a memory mapped file.
+
+    Counters live in a fixed-size hash table in the file, so workers of the same
+    application enforce limits together without a network round trip. The table is
+    split into stripes, each guarded by its own `fcntl` byte range lock, and a key is
+    only ever stored within a short probe sequence of its stripe. Counters are only
+    replaced once they expired, so when all slots of a probe sequence hold live
+    counters, hits of a new key are rejected and a warning is logged. Size `slots`
+    well above the number of keys expected within the longest window.
+
+    Stripe locks are taken without blocking the event loop: while another process
+    holds a stripe, the lock is retried after a short sleep. Stripes are only held
+    for a few table lookups, so this is rare.
+
+    Like `async+sharded-memory://` the moving window is approximated with a sliding
+    window counter.
+
+    Usage: `async+shared-memory:///my-api-limits?stripes=1024&slots=1048576&directory=/dev/shm`.
+    The path is the name of the file in `directory`, the temporary directory by default.
+    """
+
+    STORAGE_SCHEME = ["async+shared-memory"]
+
+    # Number of slots a key can be stored in
+    PROBE_LENGTH = 8
+
+    def __init__(self, uri: str | None = None, **options: str) -> None:
+        if fcntl is None:
+            msg = "SharedMemoryStorage requires fcntl, which is only available on POSIX systems"
+            raise ImportError(msg)
+
+        parsed = urlparse(uri or "")
+        query = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+        query.update(options)
+
+        name = parsed.path.strip("/") or "my-web-framework-limits"
+        directory = query.get("directory") or tempfile.gettempdir()
+        stripes = int(query.get("stripes", 1024))
+        slots = int(query.get("slots", 1 << 20))
+
+        self.__stripes = stripes
+        self.__stripe_slots = max(self.PROBE_LENGTH, slots // stripes)
+        size = _HEADER.size + stripes * self.__stripe_slots * _SLOT.size
+
+        self.__fd = os.open(Path(directory) / name, os.O_RDWR | os.O_CREAT, 0o600)
+        # Record locks are owned by the process, so its coroutines take them one at a time
+        self.__process_lock = asyncio.Lock()
+        with self._locked_file():
+            # The first process to open the file initializes it
+            if os.fstat(self.__fd).st_size == 0:
+                os.ftruncate(self.__fd, size)
+                os.pwrite(self.__fd, _HEADER.pack(_MAGIC, stripes, self.__stripe_slots), 0)
+
+            magic, file_stripes, file_stripe_slots = _HEADER.unpack(os.pread(self.__fd, _HEADER.size, 0))
+            if (magic, file_stripes, file_stripe_slots) != (_MAGIC, stripes, self.__stripe_slots):
+                msg = f"Shared memory file {name} was created with a different layout"
+                raise ValueError(msg)
+
+        self.__memory = mmap.mmap(self.__fd, size)
+        super().__init__(uri)
+
+    @contextlib.contextmanager
+    def _locked_file(self) -> Iterator[None]:
+        # Length 0 locks the whole file, including bytes used to lock stripes
+        fcntl.lockf(self.__fd, fcntl.LOCK_EX, 0, 0)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.__fd, fcntl.LOCK_UN, 0, 0)
+
+    async def _lock(self, length: int, start: int) -> None:
+        delay = _LOCK_BACKOFF
+        while True:
+            try:
+                fcntl.lockf(self.__fd, fcntl.LOCK_EX | fcntl.LOCK_NB, length, start)
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+            else:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_LOCK_BACKOFF)
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, stripes: Sequence[int]) -> AsyncIterator[None]:
+        # Stripes are locked in a consistent order to avoid deadlocks
+        ordered = sorted(set(stripes))
+        async with self.__process_lock:
+            locked = []
+            try:
+                for stripe in ordered:
+                    await self._lock(1, stripe)
+                    locked.append(stripe)
+                yield
+            finally:
+                for stripe in reversed(locked):
+                    fcntl.lockf(self.__fd, fcntl.LOCK_UN, 1, stripe)
+
+    @contextlib.asynccontextmanager
+    async def _locked_table(self) -> AsyncIterator[None]:
+        async with self.__process_lock:
+            await self._lock(0, 0)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.__fd, fcntl.LOCK_UN, 0, 0)
+
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        # Python's `hash` is randomized per process, so a stable hash is needed
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return fingerprint or 1
+
+    def _stripe(self, fingerprint: int) -> int:
+        return fingerprint % self.__stripes
+
+    def _find(self, fingerprint: int, now: float) -> tuple[_Slot | None, bool]:
+        """Return the slot of the key and whether it was found, or the slot it can be stored in.
+
+        The slot is `None` if the key was not found and all slots it can be stored in hold live counters.
+        """
+        stripe_offset = _HEADER.size + self._stripe(fingerprint) * self.__stripe_slots * _SLOT.size
+        start = (fingerprint // self.__stripes) % self.__stripe_slots
+        candidate = None
+
+        for probe in range(self.PROBE_LENGTH):
+            offset = stripe_offset + (start + probe) % self.__stripe_slots * _SLOT.size
+            slot = _Slot(offset, _SLOT.unpack_from(self.__memory, offset))
+
+            if slot.fingerprint == fingerprint:
+                return slot, True
+
+            # Prefer empty slots, otherwise reuse one whose counter no longer counts towards any window
+            if slot.fingerprint == 0:
+                if candidate is None or candidate.fingerprint != 0:
+                    candidate = slot
+            elif candidate is None and slot.window_start + 2 * slot.expiry <= now:
+                candidate = slot
+
+        return candidate, False
+
+    @staticmethod
+    def _warn_full() -> None:
+        # Evicting a live counter would let its key exceed the limit, so the hit is rejected instead
+        logger.warning("Shared memory rate limit table is full, rejecting a hit, consider more slots")
+
+    def _claim(self, slot: _Slot, fingerprint: int, start: float, expiry: int) -> None:
+        slot.fingerprint = fingerprint
+        slot.window_start = start
+        slot.expiry = expiry
+        slot.current = 0
+        slot.previous = 0
+        # Claim the slot right away, so other keys of the same call do not pick it too
+        self._write(slot)
+
+    def _write(self, slot: _Slot) -> None:
+        _SLOT.pack_into(
+            self.__memory,
+            slot.offset,
+            slot.fingerprint,
+            slot.window_start,
+            slot.expiry,
+            slot.current,
+            slot.previous,
+        )
+
+    @staticmethod
+    def _roll(slot: _Slot, expiry: int, now: float) -> None:
+        start = window_start(now, expiry)
+        if slot.window_start != start:
+            slot.previous = slot.current if slot.window_start + expiry == start else 0
+            slot.current = 0
+            slot.window_start = start
+            slot.expiry = expiry
+
+    def _acquire(self, entries: Sequence[tuple[int, int, int]], amount: int, now: float) -> EvaluationResult:
+        slots = []
+        for index, (fingerprint, _, expiry) in enumerate(entries):
+            slot, found = self._find(fingerprint, now)
+            if slot is None:
+                self._warn_full()
+                return EvaluationResult(index, 0, now + expiry)
+            if not found:
+                self._claim(slot, fingerprint, window_start(now, expiry), expiry)
+            slots.append(slot)
+
+        for index, (slot, (_, limit, expiry)) in enumerate(zip(slots, entries, strict=True)):
+            self._roll(slot, expiry, now)
+            count = estimate(slot.previous, slot.current, slot.window_start, expiry, now)
+            if count + amount > limit:
+                return EvaluationResult(index, max(0, limit - int(count)), slot.window_start + expiry)
+
+        for slot in slots:
+            slot.current += amount
+            self._write(slot)
+
+        return EvaluationResult(None)
+
+    async def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        fingerprint = self._fingerprint(key)
+        async with self._locked([self._stripe(fingerprint)]):
+            return self._acquire([(fingerprint, limit, expiry)], amount, time.time()).failed is None
+
+    async def acquire_entries(self, entries: Sequence[tuple[str, int, int]]) -> EvaluationResult:
+        fingerprints = [(self._fingerprint(key), limit, expiry) for key, limit, expiry in entries]
+        async with self._locked([self._stripe(fingerprint) for fingerprint, _, _ in fingerprints]):
+            return self._acquire(fingerprints, 1, time.time())
+
+    async def get_moving_window(self, key: str, limit: int, expiry: int) -> tuple[int, int]:  # noqa: ARG002
+        fingerprint = self._fingerprint(key)
+        now = time.time()
+        async with self._locked([self._stripe(fingerprint)]):
+            slot, found = self._find(fingerprint, now)
+
+        if not found:
+            return int(now), 0
+
+        self._roll(slot, expiry, now)
+        return int(slot.window_start), int(estimate(slot.previous, slot.current, slot.window_start, expiry, now))
+
+    async def incr(self, key: str, expiry: int, *, elastic_expiry: bool = False, amount: int = 1) -> int:
+        fingerprint = self._fingerprint(key)
+        now = time.time()
+        async with self._locked([self._stripe(fingerprint)]):
+            slot, found = self._find(fingerprint, now)
+            if slot is None:
+                self._warn_full()
+                # Above any limit, so fixed window strategies reject the hit
+                return sys.maxsize
+            if not found:
+                self._claim(slot, fingerprint, now, expiry)
+
+            # Fixed window strategies store the start of the window and the number of hits
+            if slot.window_start + slot.expiry <= now:
+                slot.window_start = now
+                slot.expiry = expiry
+                slot.current = 0
+            elif elastic_expiry:
+                slot.window_start = now
+
+            slot.current += amount
+            self._write(slot)
+            return slot.current
+
+    async def get(self, key: str) -> int:
+        fingerprint = self._fingerprint(key)
+        now = time.time()
+        async with self._locked([self._stripe(fingerprint)]):
+            slot, found = self._find(fingerprint, now)
+
+        if not found or slot.window_start + slot.expiry <= now:
+            return 0
+        return slot.current
+
+    async def get_expiry(self, key: str) -> int:
+        fingerprint = self._fingerprint(key)
+        now = time.time()
+        async with self._locked([self._stripe(fingerprint)]):
+            slot, found = self._find(fingerprint, now)
+
+        if not found:
+            return int(now)
+        return int(slot.window_start + slot.expiry)
+
+    async def check(self) -> bool:
+        return not self.__memory.closed
+
+    async def reset(self) -> int | None:
+        async with self._locked_table():
+            self.__memory[_HEADER.size:] = bytes(len(self.__memory) - _HEADER.size)
+        return None
+
+    async def clear(self, key: str) -> None:
+        fingerprint = self._fingerprint(key)
+        async with self._locked([self._stripe(fingerprint)]):
+            slot, found = self._find(fingerprint, time.time())
+            if found:
+                self._write(_Slot(slot.offset, (0, 0.0, 0, 0, 0)))
@@ -0,0 +1,153 @@
+import re
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_PATH_PARAMETER = re.compile(r"{([a-zA-Z_][a-zA-Z0-9_]*)}")
+
+
+class RouteNotFoundError(Exception):
+    pass
+
+
+class MethodNotAllowedError(Exception):
+    def __init__(self, allowed: Iterable[str]) -> None:
+        super().__init__(allowed)
+        self.allowed = frozenset(allowed)
+
+
+def path_parameters(path: str) -> list[str]:
+    return _PATH_PARAMETER.findall(path)
+
+
+def _split(path: str) -> list[str]:
+    return path.removeprefix("/").split("/")
+
+
+class _Leaf(Generic[T]):
+    __slots__ = ("value", "names")
+
+    def __init__(self, value: T, names: tuple[str, ...]) -> None:
+        self.value = value
+        self.names = names
+
+
+class _Node(Generic[T]):
+    __slots__ = ("static", "patterns", "parameter", "leaves")
+
+    def __init__(self) -> None:
+        # Children reachable through a literal segment
+        self.static: dict[str, _Node[T]] = {}
+        # Children for segments mixing literals and parameters, e.g. `{name}.json`
+        self.patterns: dict[str, tuple[re.Pattern, _Node[T]]] = {}
+        # Child for a segment consisting of a single parameter, e.g. `{name}`
+        self.parameter: _Node[T] | None = None
+        # Values stored at this node keyed by HTTP method
+        self.leaves: dict[str, _Leaf[T]] = {}
+
+
+class Router(Generic[T]):
+    """Segment trie compiled from endpoint path templates.
+
+    Lookups cost O(number of path segments) regardless of how many routes are registered.
+    Routes without parameters are additionally kept in a flat dictionary, so they are
+    resolved with a single hash lookup.
+    """
+
+    def __init__(self) -> None:
+        self.__root: _Node[T] = _Node()
+        self.__static: dict[str, dict[str, T]] = {}
+
+    def add(self, path: str, methods: Iterable[str], value: T) -> None:
+        names = tuple(path_parameters(path))
+        node = self.__root
+
+        for segment in _split(path):
+            match = _PATH_PARAMETER.fullmatch(segment)
+            if match is not None:
+                if node.parameter is None:
+                    node.parameter = _Node()
+                node = node.parameter
+            elif _PATH_PARAMETER.search(segment):
+                if segment not in node.patterns:
+                    node.patterns[segment] = (_compile_segment(segment), _Node())
+                node = node.patterns[segment][1]
+            else:
+                node = node.static.setdefault(segment, _Node())
+
+        for method in methods:
+            if method in node.leaves:
+                msg = f"Route {method} {path} is already registered"
+                raise ValueError(msg)
+            node.leaves[method] = _Leaf(value, names)
+
+        if not names:
+            self.__static.setdefault(path, {}).update(dict.fromkeys(methods, value))
+
+    def match(self, method: str, path: str) -> tuple[T, dict[str, str]]:
+        """Return the value registered for the method and path along with the path parameters."""
+        static = self.__static.get(path)
+        if static is not None:
+            value = static.get(method)
+            if value is not None:
+                return value, {}
+            # A parameterized route may still accept the method, e.g. `POST /a/{x}` next to `GET /a/b`
+
+        values: list[str] = []
+        allowed: set[str] = set()
+        leaf = self._find(self.__root, _split(path), 0, method, values, allowed)
+        if leaf is None:
+            if allowed:
+                raise MethodNotAllowedError(allowed)
+            raise RouteNotFoundError(path)
+
+        # Parameter names are stored per method as different templates
+        # may share the same node, e.g. `/items/{id}` and `/items/{item_id}`
+        return leaf.value, dict(zip(leaf.names, values, strict=True))
+
+    def _find(  # noqa: PLR0913
+        self, node: _Node[T], segments: list[str], index: int, method: str, values: list[str], allowed: set[str],
+    ) -> _Leaf[T] | None:
+        if index == len(segments):
+            leaf = node.leaves.get(method)
+            if leaf is None:
+                # Methods of every matching route make up the `Allow` header if none accepts the method
+                allowed.update(node.leaves)
+            return leaf
+
+        segment = segments[index]
+
+        # Static segments take precedence over parameters
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._find(child, segments, index + 1, method, values, allowed)
+            if found is not None:
+                return found
+
+        for pattern, child in node.patterns.values():
+            match = pattern.fullmatch(segment)
+            if match is not None:
+                values.extend(match.groups())
+                found = self._find(child, segments, index + 1, method, values, allowed)
+                if found is not None:
+                    return found
+                del values[len(values) - len(match.groups()):]
+
+        if node.parameter is not None and segment:
+            values.append(segment)
+            found = self._find(node.parameter, segments, index + 1, method, values, allowed)
+            if found is not None:
+                return found
+            values.pop()
+
+        return None
+
+
+def _compile_segment(segment: str) -> re.Pattern:
+    pattern = ""
+    position = 0
+    for match in _PATH_PARAMETER.finditer(segment):
+        pattern += re.escape(segment[position:match.start()]) + "(.+?)"
+        position = match.end()
+    return re.compile(pattern + re.escape(segment[position:]))
@@ -0,0 +1,128 @@
+import hashlib
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from my_web_framework.content_coding import CODECS, negotiate
+from my_web_framework.encoders import JSONEncoder
+
+
+def merge_operation(operation: dict[str, Any], extra: Mapping[str, Any]) -> dict[str, Any]:
+    """Merge OpenAPI metadata of a plugin into the operation, nested objects are merged as well."""
+    for name, value in extra.items():
+        current = operation.get(name)
+        if isinstance(current, dict) and isinstance(value, Mapping):
+            merge_operation(current, value)
+        else:
+            operation[name] = dict(value) if isinstance(value, Mapping) else value
+    return operation
+
+
+class _Representation:
+    __slots__ = ("etag", "start", "body")
+
+    def __init__(self, body: bytes, media_type: str, etag: str, coding: str | None) -> None:
+        self.etag = etag.encode("latin-1")
+        headers = [
+            (b"content-type", media_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"etag", self.etag),
+            (b"vary", b"Accept-Encoding"),
+            # Clients may keep the document, but have to revalidate it before using it
+            (b"cache-control", b"no-cache"),
+        ]
+        if coding is not None:
+            headers.append((b"content-encoding", coding.encode("latin-1")))
+        self.start = {"type": "http.response.start", "status": 200, "headers": headers}
+        self.body = {"type": "http.response.body", "body": body}
+
+
+class StaticResponse:
+    """ASGI app serving a body that never changes, encoded and compressed upfront.
+
+    The body is compressed with every available content coding once, and each
+    representation gets a strong ETag, so requests are answered with prepared
+    messages, or with 304 Not Modified when the client has the document already.
+    """
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.__identity = _Representation(body, media_type, f'"{digest}"', None)
+        self.__compressed: dict[str, _Representation] = {}
+
+        for coding, codec in CODECS.items():
+            # Compressed only once, so the highest levels are affordable
+            compressor = codec.compressor(codec.max_level)
+            compressed = compressor.compress(body) + compressor.finish()
+            if len(compressed) < len(body):
+                # Each representation needs an ETag of its own
+                self.__compressed[coding] = _Representation(compressed, media_type, f'"{digest}-{coding}"', coding)
+
+    @property
+    def etag(self) -> str:
+        return self.__identity.etag.decode("latin-1")
+
+    def _representation(self, accept_encoding: bytes | None) -> _Representation:
+        if accept_encoding is None or not self.__compressed:
+            return self.__identity
+
+        coding = negotiate(accept_encoding.decode("latin-1"))
+        return self.__compressed.get(coding, self.__identity) if coding is not None else self.__identity
+
+    async def __call__(self, scope: Mapping[str, Any], receive: Callable, send: Callable) -> None:  # noqa: ARG002
+        accept_encoding = if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+            elif name == b"if-none-match":
+                if_none_match = value
+
+        representation = self._representation(accept_encoding)
+
+        # If-None-Match uses the weak comparison, ETags weakened e.g. by a compressing proxy still match
+        if if_none_match is not None and (
+            if_none_match.strip() == b"*"
+            or representation.etag in (tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b","))
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(b"etag", representation.etag), (b"vary", b"Accept-Encoding")],
+                },
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Middleware may change headers of the messages they pass on, so prepared ones are not shared
+        await send({**representation.start, "headers": list(representation.start["headers"])})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await send(representation.body)
+
+
+class SchemaDocument:
+    """ASGI app serving an OpenAPI document rendered once.
+
+    The document is rendered when `prepare` is called, e.g. on application startup,
+    or on the first request otherwise. Mounting more endpoints invalidates it.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, render: Callable[[], Mapping[str, Any]]) -> None:
+        self.__render = render
+        self.__response: StaticResponse | None = None
+
+    def prepare(self) -> StaticResponse:
+        if self.__response is None:
+            body = JSONEncoder().encode(self.__render())
+            self.__response = StaticResponse(body, self.media_type)
+        return self.__response
+
+    def invalidate(self) -> None:
+        self.__response = None
+
+    async def __call__(self, scope: Mapping[str, Any], receive: Callable, send: Callable) -> None:
+        response = self.__response if self.__response is not None else self.prepare()
+        await response(scope, receive, send)
@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping
+from typing import Any, NamedTuple
+
+from starlette.responses import Response
+
+from my_web_framework.encoders import Encoder
+
+_END = object()
+
+
+def _render_chunk(item: Any, encoder: Encoder) -> bytes:  # noqa: ANN401
+    if isinstance(item, bytes):
+        return item
+    if isinstance(item, str):
+        return item.encode("utf-8")
+    return encoder.encode(item)
+
+
+def _render_line(item: Any, encoder: Encoder) -> bytes:  # noqa: ANN401
+    return encoder.encode(item) + b"\n"
+
+
+class Stream:
+    """Response body sent chunk by chunk as items of `iterable` are produced.
+
+    Async iterables are consumed on the event loop, sync ones on the default
+    executor, so blocking iterators do not block other requests. Each item of a
+    sync iterable costs a hop to the executor and back, so such iterables should
+    yield chunks of a reasonable size rather than single bytes or rows.
+
+    Each item is rendered into a chunk with `render`, by default bytes and strings
+    are sent as they are and other items are encoded with the encoder of the
+    application. Without a media type, it is chosen from the first item: bytes and
+    strings are sent as `application/octet-stream`, other items as newline delimited
+    JSON, so they can be told apart by clients.
+    """
+
+    def __init__(
+        self,
+        iterable: Any,  # noqa: ANN401
+        media_type: str | None = None,
+        headers: Mapping[str, str] | None = None,
+        render: Callable[[Any, Encoder], bytes] = _render_chunk,
+    ) -> None:
+        self.iterable = iterable
+        self.media_type = media_type
+        self.headers = dict(headers or {})
+        self.render = render
+        # Items are taken before the response starts when the media type depends on the first one
+        self.__items: AsyncIterator[Any] | None = None
+        self.__first: Any = _END
+
+    async def _items(self) -> AsyncIterator[Any]:
+        if hasattr(self.iterable, "__aiter__"):
+            iterator = aiter(self.iterable)
+            try:
+                async for item in iterator:
+                    yield item
+            finally:
+                # Let the generator clean up when the client goes away
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+            return
+
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.iterable)
+        try:
+            while (item := await loop.run_in_executor(None, next, iterator, _END)) is not _END:
+                yield item
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    async def prepare(self) -> None:
+        """Choose the media type from the first item if none was given, called before the response starts."""
+        if self.media_type is not None:
+            return
+
+        self.__items = self._items()
+        self.__first = await anext(self.__items, _END)
+        if self.__first is _END or isinstance(self.__first, bytes | str):
+            self.media_type = "application/octet-stream"
+        else:
+            self.media_type = "application/x-ndjson"
+            if self.render is _render_chunk:
+                self.render = _render_line
+
+    async def chunks(self, encoder: Encoder) -> AsyncIterator[bytes]:
+        render = self.render
+        items = self.__items if self.__items is not None else self._items()
+
+        async with contextlib.aclosing(items):
+            if self.__first is not _END:
+                yield render(self.__first, encoder)
+            async for item in items:
+                yield render(item, encoder)
+
+
+def as_stream(result: Any) -> Stream | None:  # noqa: ANN401
+    """Return the stream for handler results producing the body incrementally, `None` otherwise."""
+    if isinstance(result, Stream):
+        return result
+    # Lists, dicts and strings are whole values, only iterators are streamed
+    if hasattr(result, "__aiter__") or isinstance(result, Iterator):
+        return Stream(result)
+    return None
+
+
+def can_resend(result: Any) -> bool:  # noqa: ANN401
+    """Whether the result can be sent more than once, streams and streaming or file responses cannot."""
+    if as_stream(result) is not None:
+        return False
+    # Responses without a body produce it while they are sent
+    return not isinstance(result, Response) or hasattr(result, "body")
+
+
+def ndjson(iterable: Any) -> Stream:  # noqa: ANN401
+    """Stream items as newline delimited JSON."""
+    return Stream(iterable, media_type="application/x-ndjson", render=_render_line)
+
+
+class ServerSentEvent(NamedTuple):
+    # Strings are sent as they are, other data is encoded with the encoder of the application
+    data: Any
+    event: str | None = None
+    id: str | None = None
+    retry: int | None = None
+
+
+def _render_event(item: Any, encoder: Encoder) -> bytes:  # noqa: ANN401
+    event = item if isinstance(item, ServerSentEvent) else ServerSentEvent(item)
+
+    lines = []
+    if event.event is not None:
+        lines.append(f"event: {event.event}")
+    if event.id is not None:
+        lines.append(f"id: {event.id}")
+    if event.retry is not None:
+        lines.append(f"retry: {event.retry}")
+
+    data = event.data if isinstance(event.data, str) else encoder.encode(event.data).decode("utf-8")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def sse(iterable: Any) -> Stream:  # noqa: ANN401
+    """Stream items as Server-Sent Events, items may be `ServerSentEvent` or event data."""
+    return Stream(
+        iterable,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        render=_render_event,
+    )
+
+
+async def send_stream(send: Callable, status_code: int, stream: Stream, encoder: Encoder) -> None:
+    """Send the stream as an ASGI response, each chunk waits until the server accepts the previous one."""
+    await stream.prepare()
+    raw_headers = [(b"content-type", stream.media_type.encode("latin-1"))]
+    raw_headers.extend(
+        (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in stream.headers.items()
+    )
+
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    async with contextlib.aclosing(stream.chunks(encoder)) as chunks:
+        async for chunk in chunks:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
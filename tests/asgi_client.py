@@ -0,0 +1,88 @@
+"""In-process ASGI client, requests are passed to the application without a network."""
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Any, NamedTuple
+
+
+class Response(NamedTuple):
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class ASGIClient:
+    def __init__(self, app: Callable) -> None:
+        self.__app = app
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        query_string: bytes = b"",
+        headers: Sequence[tuple[bytes, bytes]] = (),
+        body: bytes = b"",
+    ) -> Response:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("latin-1"),
+            "root_path": "",
+            "query_string": query_string,
+            "headers": list(headers),
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        request_sent = False
+        response_complete = asyncio.Event()
+        status = 0
+        response_headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Report a disconnect only once the response was sent, like a client waiting for it
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        await self.__app(scope, receive, send)
+        return Response(status, response_headers, b"".join(chunks))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self) -> AsyncIterator[None]:
+        """Run startup handlers of the application on enter and shutdown handlers on exit."""
+        events: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        completed: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+        await events.put({"type": "lifespan.startup"})
+        task = asyncio.get_running_loop().create_task(
+            self.__app({"type": "lifespan", "asgi": {"version": "3.0"}}, events.get, completed.put),
+        )
+        message = await completed.get()
+        if message["type"] != "lifespan.startup.complete":
+            msg = f"Application startup failed: {message.get('message', '')}"
+            raise RuntimeError(msg)
+
+        try:
+            yield
+        finally:
+            await events.put({"type": "lifespan.shutdown"})
+            await completed.get()
+            await task
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get, post
+from tests.asgi_client import ASGIClient, Response
+
+
+class _Controller(BaseController):
+    @get("/items/{item_id}")
+    async def item(self, item_id: int, q: str | None = None, ratio: float = 1.0, flag: bool = False) -> dict:
+        return {"item_id": item_id, "q": q, "ratio": ratio, "flag": flag}
+
+    @post("/items")
+    async def create(self) -> str:
+        return "created"
+
+    @get("/fail")
+    async def fail(self) -> None:
+        raise RuntimeError
+
+
+def _api() -> SomeAPI:
+    api = SomeAPI("Test", "1", adapter=ASGIAdapter)
+    api.mount(_Controller())
+    return api
+
+
+def _request(method: str, path: str, query_string: bytes = b"") -> Response:
+    return asyncio.run(ASGIClient(_api()).request(method, path, query_string))
+
+
+def test_parameters_are_converted_from_string_annotations() -> None:
+    response = _request("GET", "/items/3", b"q=a&ratio=0.5&flag=yes")
+
+    assert response.status == 200
+    assert json.loads(response.body) == {"item_id": 3, "q": "a", "ratio": 0.5, "flag": True}
+
+
+def test_invalid_parameter() -> None:
+    response = _request("GET", "/items/x")
+
+    assert response.status == 422
+    assert json.loads(response.body) == {
+        "detail": [{"loc": ["path", "item_id"], "msg": "value is not a valid int"}],
+    }
+
+
+def test_unknown_path() -> None:
+    assert _request("GET", "/unknown").status == 404
+
+
+def test_method_not_allowed() -> None:
+    response = _request("DELETE", "/items")
+
+    assert response.status == 405
+    assert (b"allow", b"POST") in response.headers
+
+
+def test_allow_includes_head_for_get_endpoints() -> None:
+    response = _request("POST", "/items/3")
+
+    assert response.status == 405
+    assert (b"allow", b"GET, HEAD") in response.headers
+
+
+def test_head_is_answered_by_get_endpoint_without_body() -> None:
+    get_response = _request("GET", "/items/3")
+    head_response = _request("HEAD", "/items/3")
+
+    assert head_response.status == 200
+    assert head_response.headers == get_response.headers
+    assert head_response.body == b""
+
+
+def test_unhandled_exception() -> None:
+    response = _request("GET", "/fail")
+
+    assert response.status == 500
+    assert (b"content-type", b"application/problem+json") in response.headers
+    assert json.loads(response.body)["status"] == 500
+
+
+def test_lifespan_runs_event_handlers() -> None:
+    api = _api()
+    events: list[str] = []
+
+    async def startup() -> None:
+        events.append("startup")
+
+    def shutdown() -> None:
+        events.append("shutdown")
+
+    api.on_startup(startup)
+    api.on_shutdown(shutdown)
+
+    async def run() -> None:
+        async with ASGIClient(api).lifespan():
+            assert events == ["startup"]
+
+    asyncio.run(run())
+
+    assert events == ["startup", "shutdown"]
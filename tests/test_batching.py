@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from my_web_framework.batching import BatchedAnnotation, batch_handler
+
+
+class _Controller:
+    def __init__(self) -> None:
+        self.sizes: list[int] = []
+
+    async def item(self, item_id: int) -> dict:  # noqa: ARG002
+        raise AssertionError
+
+    async def item_batch(self, item_id: list[int]) -> list:
+        self.sizes.append(len(item_id))
+        return [ValueError(item) if item < 0 else {"id": item} for item in item_id]
+
+    def sync_batch(self, item_id: list[int]) -> list:
+        return item_id
+
+    async def short_batch(self, item_id: list[int]) -> list:
+        return item_id[1:]
+
+
+def _handler(controller: _Controller, batch_method: str | None = None, max_size: int = 4) -> object:
+    return batch_handler(controller, "item", controller.item, BatchedAnnotation(batch_method, max_size, 5))
+
+
+def test_concurrent_calls_are_batched() -> None:
+    controller = _Controller()
+    handler = _handler(controller)
+
+    async def run() -> list:
+        return await asyncio.gather(*[handler(item_id=item) for item in range(-1, 5)], return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], ValueError)
+    assert results[1:] == [{"id": item} for item in range(5)]
+    assert controller.sizes == [4, 2]
+
+
+def test_sync_batch_method_is_rejected_when_mounted() -> None:
+    with pytest.raises(ValueError, match="coroutine function"):
+        _handler(_Controller(), "sync_batch")
+
+
+def test_wrong_number_of_results_fails_every_call() -> None:
+    handler = _handler(_Controller(), "short_batch")
+
+    async def run() -> list:
+        return await asyncio.gather(*[handler(item_id=item) for item in range(2)], return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
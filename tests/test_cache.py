@@ -0,0 +1,115 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.encoders import Encoder
+from my_web_framework.plugins.cache import CachePlugin, MemoryCacheStore, cached
+from my_web_framework.plugins.cache.annotations import _CachedAnnotation
+from tests.asgi_client import ASGIClient
+
+
+def _cached_handler(plugin: CachePlugin, result: Any) -> Any:  # noqa: ANN401
+    async def handler(_: Any, __: dict[str, Any]) -> Any:  # noqa: ANN401
+        return result
+
+    return plugin.wrap([_CachedAnnotation(30, None, set(), "handler")], handler)
+
+
+def test_hits_do_not_share_mutable_results() -> None:
+    plugin = CachePlugin()
+    handler = _cached_handler(plugin, {"items": [1, 2]})
+    request = SimpleNamespace(method="GET")
+
+    async def run() -> None:
+        await handler(request, {})
+        first = await handler(request, {})
+        first.body = b"changed"
+        second = await handler(request, {})
+
+        assert first is not second
+        assert second.body == b'{"items":[1,2]}'
+        assert dict(second.headers)["content-type"] == "application/json"
+
+    asyncio.run(run())
+
+
+def test_hits_get_responses_of_their_own() -> None:
+    plugin = CachePlugin()
+    handler = _cached_handler(plugin, Response(b"body", status_code=201, headers={"x-item": "1"}))
+    request = SimpleNamespace(method="GET")
+
+    async def run() -> None:
+        await handler(request, {})
+        first = await handler(request, {})
+        first.headers["x-item"] = "2"
+        second = await handler(request, {})
+
+        assert second.status_code == 201
+        assert second.body == b"body"
+        assert second.headers["x-item"] == "1"
+
+    asyncio.run(run())
+
+
+class _Item(BaseModel):
+    name: str
+
+
+class _Controller(BaseController):
+    @get("/items/{item_id}")
+    @cached(ttl=30)
+    async def item(self, item_id: int) -> dict:
+        return {"id": item_id, "name": "é"}
+
+    @get("/models")
+    @cached(ttl=30)
+    async def model(self) -> _Item:
+        return _Item(name="a")
+
+
+class _ASCIIEncoder(Encoder):
+    def encode(self, value: Any) -> bytes:  # noqa: ANN401
+        return json.dumps(value).encode("ascii")
+
+
+class _RecordingStore(MemoryCacheStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.stored: list[Any] = []
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.stored.append(value)
+        await super().set(key, value, ttl)
+
+
+@pytest.mark.parametrize(
+    ("adapter", "path"),
+    [(ASGIAdapter, "/items/1"), (FastAPIAdapter, "/items/1"), (FastAPIAdapter, "/models")],
+    ids=["asgi", "fastapi", "fastapi-model"],
+)
+def test_hits_are_encoded_like_misses(adapter: type, path: str) -> None:
+    store = _RecordingStore()
+    plugin = CachePlugin(store)
+    # Escapes non-ASCII characters unlike the default encoders
+    api = SomeAPI("Test", "1", plugins=[plugin], adapter=adapter, encoder=_ASCIIEncoder())
+    api.mount(_Controller())
+
+    async def run() -> list[tuple[int, bytes, bytes]]:
+        client = ASGIClient(api)
+        responses = [await client.request("GET", path) for _ in range(2)]
+        return [(response.status, dict(response.headers)[b"content-type"], response.body) for response in responses]
+
+    miss, hit = asyncio.run(run())
+
+    assert (plugin.misses, plugin.hits) == (1, 1)
+    assert miss == hit
+    assert [type(value) for value in store.stored] == [bytes]
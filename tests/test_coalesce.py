@@ -0,0 +1,130 @@
+import asyncio
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+from my_web_framework.encoders import JSONEncoder
+from my_web_framework.instrumentation import MetricsCollector
+from my_web_framework.plugins.coalesce import CoalescePlugin
+from my_web_framework.plugins.coalesce.annotations import _CoalesceAnnotation
+from my_web_framework.plugins.coalesce.exceptions import TooManyWaitersError
+from my_web_framework.streaming import as_stream
+
+REQUEST = SimpleNamespace()
+
+
+def _annotation() -> _CoalesceAnnotation:
+    return _CoalesceAnnotation(None, set(), "handler", None)
+
+
+def test_concurrent_requests_share_a_result() -> None:
+    plugin = CoalescePlugin()
+    calls = 0
+
+    async def handler(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"calls": calls}
+
+    coalesced = plugin.wrap([_annotation()], handler)
+
+    async def run() -> list:
+        return await asyncio.gather(*[coalesced(REQUEST, {}) for _ in range(3)])
+
+    assert asyncio.run(run()) == [{"calls": 1}] * 3
+    assert (plugin.calls, plugin.coalesced) == (1, 2)
+
+
+def test_streams_are_not_shared() -> None:
+    plugin = CoalescePlugin()
+
+    async def handler(_: Any, __: dict[str, Any]) -> AsyncIterator[int]:  # noqa: ANN401
+        await asyncio.sleep(0.01)
+
+        async def items() -> AsyncIterator[int]:
+            for item in range(3):
+                await asyncio.sleep(0)
+                yield item
+
+        return items()
+
+    coalesced = plugin.wrap([_annotation()], handler)
+
+    async def consume() -> list[bytes]:
+        stream = as_stream(await coalesced(REQUEST, {}))
+        return [chunk async for chunk in stream.chunks(JSONEncoder())]
+
+    async def run() -> list:
+        return await asyncio.gather(*[consume() for _ in range(3)])
+
+    assert asyncio.run(run()) == [[b"0", b"1", b"2"]] * 3
+    assert (plugin.calls, plugin.coalesced) == (3, 0)
+
+
+def test_unhashable_arguments_are_not_coalesced() -> None:
+    plugin = CoalescePlugin()
+
+    async def handler(_: Any, kwargs: dict[str, Any]) -> list[int]:  # noqa: ANN401
+        await asyncio.sleep(0.01)
+        return kwargs["ids"]
+
+    coalesced = plugin.wrap([_annotation()], handler)
+
+    async def run() -> list:
+        return await asyncio.gather(*[coalesced(REQUEST, {"ids": [1, 2]}) for _ in range(2)])
+
+    assert asyncio.run(run()) == [[1, 2]] * 2
+    assert (plugin.calls, plugin.coalesced) == (2, 0)
+
+
+def test_waiters_are_counted_while_they_wait() -> None:
+    plugin = CoalescePlugin()
+    released = asyncio.Event()
+
+    async def handler(_: Any, __: dict[str, Any]) -> str:  # noqa: ANN401
+        await released.wait()
+        return "result"
+
+    coalesced = plugin.wrap([_CoalesceAnnotation(None, set(), "handler", 1)], handler)
+
+    async def run() -> str:
+        leader = asyncio.ensure_future(coalesced(REQUEST, {}))
+        cancelled = asyncio.ensure_future(coalesced(REQUEST, {}))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+
+        # The cancelled request no longer takes the only place of a waiter
+        waiter = asyncio.ensure_future(coalesced(REQUEST, {}))
+        await asyncio.sleep(0)
+        released.set()
+        await leader
+        return await waiter
+
+    assert asyncio.run(run()) == "result"
+    assert (plugin.calls, plugin.coalesced, plugin.rejected) == (1, 1, 0)
+
+
+def test_requests_are_counted_in_instrumentation() -> None:
+    plugin = CoalescePlugin()
+    metrics = MetricsCollector()
+    plugin.instrument(metrics)
+
+    async def handler(_: Any, __: dict[str, Any]) -> str:  # noqa: ANN401
+        await asyncio.sleep(0.01)
+        return "result"
+
+    coalesced = plugin.wrap([_CoalesceAnnotation(None, set(), "handler", 1)], handler)
+
+    async def run() -> list:
+        return await asyncio.gather(*[coalesced(REQUEST, {}) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert results[:2] == ["result", "result"]
+    assert isinstance(results[2], TooManyWaitersError)
+    rendered = metrics.render().decode()
+    assert 'coalesce_requests_total{endpoint="handler",outcome="call"} 1' in rendered
+    assert 'coalesce_requests_total{endpoint="handler",outcome="coalesced"} 1' in rendered
+    assert 'coalesce_requests_total{endpoint="handler",outcome="rejected"} 1' in rendered
@@ -0,0 +1,97 @@
+import asyncio
+import gzip
+
+import pytest
+from starlette.responses import Response
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.instrumentation import MetricsCollector
+from my_web_framework.plugins.compression import CompressionPlugin, compress
+from tests.asgi_client import ASGIClient
+
+BODY = "text " * 200
+
+
+class _Controller(BaseController):
+    @get("/large")
+    @compress(level=11)
+    async def large(self) -> str:
+        return BODY
+
+    @get("/per-coding")
+    @compress(level={"gzip": 1})
+    async def per_coding(self) -> str:
+        return BODY
+
+    @get("/etag")
+    @compress()
+    async def etag(self) -> Response:
+        return Response(BODY, headers={"ETag": '"v1"'})
+
+    @get("/small")
+    @compress(min_size=10_000)
+    async def small(self) -> str:
+        return BODY
+
+
+def _get(
+    path: str, accept_encoding: bytes | None, instrumentation: MetricsCollector | None = None,
+) -> tuple[int, dict[bytes, list[bytes]], bytes]:
+    api = SomeAPI("Test", "1", plugins=[CompressionPlugin()], adapter=ASGIAdapter, instrumentation=instrumentation)
+    api.mount(_Controller())
+    headers = [(b"accept-encoding", accept_encoding)] if accept_encoding is not None else []
+
+    async def run() -> tuple[int, dict[bytes, list[bytes]], bytes]:
+        response = await ASGIClient(api).request("GET", path, headers=headers)
+        grouped: dict[bytes, list[bytes]] = {}
+        for name, value in response.headers:
+            grouped.setdefault(name, []).append(value)
+        return response.status, grouped, response.body
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path", ["/large", "/per-coding"])
+def test_levels_are_valid_for_each_coding(path: str) -> None:
+    status, headers, body = _get(path, b"gzip")
+
+    assert status == 200
+    assert headers[b"content-encoding"] == [b"gzip"]
+    assert headers[b"vary"] == [b"Accept-Encoding"]
+    assert gzip.decompress(body).decode() == f'"{BODY}"'
+
+
+@pytest.mark.parametrize(("path", "accept_encoding"), [("/large", None), ("/large", b"identity"), ("/small", b"gzip")])
+def test_uncompressed_responses_vary_by_accept_encoding(path: str, accept_encoding: bytes | None) -> None:
+    status, headers, _ = _get(path, accept_encoding)
+
+    assert status == 200
+    assert b"content-encoding" not in headers
+    assert headers[b"vary"] == [b"Accept-Encoding"]
+
+
+def test_unknown_coding_level() -> None:
+    with pytest.raises(ValueError, match="Unknown content codings"):
+        compress(level={"lzma": 5})
+
+
+@pytest.mark.parametrize(("accept_encoding", "etag"), [(b"gzip", b'W/"v1"'), (b"identity", b'"v1"')])
+def test_compressed_responses_get_weak_etags(accept_encoding: bytes, etag: bytes) -> None:
+    _, headers, _ = _get("/etag", accept_encoding)
+
+    assert headers[b"etag"] == [etag]
+
+
+def test_compression_is_recorded_per_endpoint() -> None:
+    metrics = MetricsCollector()
+
+    _, _, body = _get("/large", b"gzip", metrics)
+    _get("/small", b"gzip", metrics)
+
+    rendered = metrics.render().decode().splitlines()
+    assert 'compression_responses_total{endpoint="_Controller.large",outcome="compressed"} 1' in rendered
+    assert 'compression_responses_total{endpoint="_Controller.small",outcome="skipped"} 1' in rendered
+    assert f'compression_input_bytes_total{{endpoint="_Controller.large"}} {len(BODY) + 2}' in rendered
+    assert f'compression_output_bytes_total{{endpoint="_Controller.large"}} {len(body)}' in rendered
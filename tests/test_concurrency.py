@@ -0,0 +1,157 @@
+import asyncio
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from my_web_framework.annotations import Annotation
+from my_web_framework.plugins._base import Handler
+from my_web_framework.plugins.concurrency import ConcurrencyPlugin
+from my_web_framework.plugins.concurrency.annotations import _MaxConcurrencyAnnotation, _TimeoutAnnotation
+from my_web_framework.plugins.concurrency.exceptions import ConcurrencyLimitExceededError, DeadlineExceededError
+
+REQUEST = SimpleNamespace(url=SimpleNamespace(path="/"))
+
+
+def _limit(
+    limit: int,
+    key: Callable | None = None,
+    *,
+    max_queue: int | None = None,
+    max_wait: float | None = None,
+) -> _MaxConcurrencyAnnotation:
+    parameters = {"tenant"} if key is not None else set()
+    return _MaxConcurrencyAnnotation(limit, key, parameters, "handler", max_queue=max_queue, max_wait=max_wait)
+
+
+def _tracking_handler(seconds: float) -> tuple[Handler, Callable[[], int]]:
+    running = 0
+    peak = 0
+
+    async def handler(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            running -= 1
+        return {}
+
+    return handler, lambda: peak
+
+
+async def _gather(handler: Handler, kwargs: list[dict[str, Any]]) -> list:
+    return await asyncio.gather(*[handler(REQUEST, item) for item in kwargs], return_exceptions=True)
+
+
+def _wrap(plugin: ConcurrencyPlugin, annotations: list[Annotation], handler: Handler) -> Handler:
+    plugin.compile(annotations)
+    return plugin.wrap(annotations, handler)
+
+
+def test_calls_over_the_limit_wait_for_a_slot() -> None:
+    plugin = ConcurrencyPlugin()
+    handler, peak = _tracking_handler(0.01)
+    limited = _wrap(plugin, [_limit(2)], handler)
+
+    results = asyncio.run(_gather(limited, [{}] * 5))
+
+    assert results == [{}] * 5
+    assert peak() == 2
+    assert plugin.rejected == 0
+    assert plugin.waiting == 0
+
+
+def test_bulkheads_are_kept_per_key() -> None:
+    plugin = ConcurrencyPlugin()
+    handler, peak = _tracking_handler(0.01)
+    limited = _wrap(plugin, [_limit(1, lambda tenant: tenant)], handler)
+
+    async def run() -> tuple[list, int]:
+        task = asyncio.ensure_future(_gather(limited, [{"tenant": "a"}, {"tenant": "a"}, {"tenant": "b"}]))
+        await asyncio.sleep(0.005)
+        waiting = plugin.waiting
+        return await task, waiting
+
+    results, waiting = asyncio.run(run())
+
+    assert results == [{}] * 3
+    # One call per tenant runs at a time, so only the second call of tenant "a" waits
+    assert peak() == 2
+    assert waiting == 1
+
+
+def test_calls_are_rejected_when_the_queue_is_full() -> None:
+    plugin = ConcurrencyPlugin()
+    handler, _ = _tracking_handler(0.01)
+    limited = _wrap(plugin, [_limit(1, max_queue=1)], handler)
+
+    results = asyncio.run(_gather(limited, [{}] * 3))
+
+    assert results[:2] == [{}] * 2
+    assert isinstance(results[2], ConcurrencyLimitExceededError)
+    assert results[2].status_code == 503
+    assert plugin.rejected == 1
+
+
+def test_calls_are_rejected_after_waiting_too_long() -> None:
+    plugin = ConcurrencyPlugin(max_wait=10)
+    handler, _ = _tracking_handler(0.05)
+    limited = _wrap(plugin, [_limit(1, max_wait=0.01)], handler)
+
+    results = asyncio.run(_gather(limited, [{}] * 2))
+
+    assert results[0] == {}
+    assert isinstance(results[1], ConcurrencyLimitExceededError)
+    assert plugin.rejected == 1
+    assert plugin.waiting == 0
+
+
+def test_slow_calls_are_cancelled_with_504() -> None:
+    plugin = ConcurrencyPlugin()
+    cancelled = False
+
+    async def handler(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return {}
+
+    limited = _wrap(plugin, [_TimeoutAnnotation(0.01)], handler)
+
+    with pytest.raises(DeadlineExceededError) as error:
+        asyncio.run(limited(REQUEST, {}))
+
+    assert error.value.status_code == 504
+    assert cancelled
+    assert plugin.timed_out == 1
+
+
+def test_timeouts_raised_by_the_handler_are_passed_through() -> None:
+    plugin = ConcurrencyPlugin()
+
+    async def handler(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        raise TimeoutError
+
+    limited = _wrap(plugin, [_TimeoutAnnotation(1)], handler)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(limited(REQUEST, {}))
+
+    assert plugin.timed_out == 0
+
+
+def test_the_timeout_includes_the_time_spent_waiting() -> None:
+    plugin = ConcurrencyPlugin()
+    handler, _ = _tracking_handler(0.05)
+    limited = _wrap(plugin, [_limit(1), _TimeoutAnnotation(0.03)], handler)
+
+    results = asyncio.run(_gather(limited, [{}] * 2))
+
+    assert all(isinstance(result, DeadlineExceededError) for result in results)
+    assert plugin.timed_out == 2
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+from limits import parse
+
+from my_web_framework.plugins.rate_limiter import deny_cache
+from my_web_framework.plugins.rate_limiter.deny_cache import DenyCache
+
+LIMIT = parse("1/minute")
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(deny_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_keys_are_remembered_until_reset_time(clock: SimpleNamespace) -> None:
+    cache = DenyCache()
+    cache.add(LIMIT, "a", 160.0)
+
+    assert cache.get(LIMIT, "a") == 160.0
+    assert cache.get(LIMIT, "b") is None
+
+    clock.now = 160.0
+    assert cache.get(LIMIT, "a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.usefixtures("clock")
+def test_least_recently_rejected_keys_are_evicted() -> None:
+    cache = DenyCache(max_size=2)
+    cache.add(LIMIT, "a", 160.0)
+    cache.add(LIMIT, "b", 160.0)
+    # Rejecting a key again makes it the most recent one
+    cache.add(LIMIT, "a", 170.0)
+    cache.add(LIMIT, "c", 160.0)
+
+    assert len(cache) == 2
+    assert cache.get(LIMIT, "b") is None
+    assert cache.get(LIMIT, "a") == 170.0
+    assert cache.get(LIMIT, "c") == 160.0
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from my_web_framework import encoders
+from my_web_framework.adapters.fastapi_adapter import _JSONableEncoder
+from my_web_framework.encoders import JSONEncoder, ORJSONEncoder, default_encoder
+from my_web_framework.exceptions import problem_content
+
+
+class _Item(BaseModel):
+    name: str
+
+
+def test_default_encoder_uses_orjson_if_installed() -> None:
+    pytest.importorskip("orjson")
+
+    assert isinstance(default_encoder(), ORJSONEncoder)
+
+
+def test_default_encoder_falls_back_to_json(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(encoders, "orjson", None)
+
+    assert isinstance(default_encoder(), JSONEncoder)
+    with pytest.raises(ImportError, match="orjson"):
+        ORJSONEncoder()
+
+
+def test_encoders_produce_compact_utf8() -> None:
+    pytest.importorskip("orjson")
+    value = {"name": "café", "tags": [1, None]}
+
+    assert JSONEncoder().encode(value) == '{"name":"café","tags":[1,null]}'.encode()
+    assert ORJSONEncoder().encode(value) == JSONEncoder().encode(value)
+    assert ORJSONEncoder().encode({1: True}) == b'{"1":true}'
+
+
+@pytest.mark.parametrize("encoder", [JSONEncoder, default_encoder], ids=["json", "default"])
+def test_jsonable_encoder_is_only_a_fallback(encoder: type) -> None:
+    jsonable = _JSONableEncoder(encoder())
+
+    assert jsonable.encode([1, 2]) == b"[1,2]"
+    assert jsonable.encode({"item": _Item(name="a")}) == b'{"item":{"name":"a"}}'
+    assert jsonable.media_type == "application/json"
+
+
+def test_problem_content_is_encoded_once() -> None:
+    content = problem_content(503, "Service unavailable", "Try again later")
+
+    assert problem_content(503, "Service unavailable", "Try again later") is content
+    assert json.loads(content) == {
+        "type": "https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/503",
+        "title": "Service unavailable",
+        "status": 503,
+        "detail": "Try again later",
+    }
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.batching import batched
+from my_web_framework.controller import BaseController, get
+from my_web_framework.offloading import offload
+from tests.asgi_client import ASGIClient, Response
+
+ADAPTERS = pytest.mark.parametrize("adapter", [ASGIAdapter, FastAPIAdapter], ids=["asgi", "fastapi"])
+
+
+class _Controller(BaseController):
+    def __init__(self) -> None:
+        self.threads: set[str] = set()
+
+    @get("/async-generator")
+    async def async_generator(self, n: int = 3):  # noqa: ANN202
+        for i in range(n):
+            self.threads.add(threading.current_thread().name)
+            yield {"i": i}
+
+    @get("/generator")
+    def generator(self, n: int = 2):  # noqa: ANN202
+        for i in range(n):
+            yield f"{i},"
+
+    @get("/offloaded")
+    @offload(max_workers=1)
+    def offloaded(self) -> str:
+        return threading.current_thread().name
+
+    @get("/items/{item_id}")
+    @batched()
+    async def item(self, item_id: int) -> int:  # noqa: ARG002
+        raise AssertionError
+
+    async def item_batch(self, item_id: list[int]) -> list[int]:
+        return item_id
+
+
+def _request(api: SomeAPI, path: str) -> Response:
+    return asyncio.run(ASGIClient(api).request("GET", path))
+
+
+def _get(api: SomeAPI, path: str) -> tuple[int, bytes]:
+    response = _request(api, path)
+    return response.status, response.body
+
+
+def _content_type(response: Response) -> bytes:
+    return dict(response.headers)[b"content-type"]
+
+
+@ADAPTERS
+def test_generator_endpoints_are_streamed_without_offloading(adapter: type) -> None:
+    controller = _Controller()
+    api = SomeAPI("Test", "1", adapter=adapter)
+    api.mount(controller)
+
+    response = _request(api, "/async-generator")
+    # Items that are not bytes or strings are sent as newline delimited JSON
+    assert (response.status, response.body) == (200, b'{"i":0}\n{"i":1}\n{"i":2}\n')
+    assert _content_type(response) == b"application/x-ndjson"
+    response = _request(api, "/generator")
+    assert (response.status, response.body) == (200, b"0,1,")
+    assert _content_type(response) == b"application/octet-stream"
+    assert controller.threads == {threading.main_thread().name}
+
+
+@ADAPTERS
+def test_framework_annotations_need_no_plugin(adapter: type, caplog: pytest.LogCaptureFixture) -> None:
+    api = SomeAPI("Test", "1", adapter=adapter)
+    with caplog.at_level(logging.WARNING, logger="my_web_framework"):
+        api.mount(_Controller())
+
+    assert not [record for record in caplog.records if "No plugin" in record.getMessage()]
+    assert _get(api, "/items/3") == (200, b"3")
+    assert _get(api, "/offloaded") == (200, b'"_Controller.offloaded_0"')
+
+
+class _AsyncOffloadController(BaseController):
+    @get("/")
+    @offload()
+    async def index(self) -> int:
+        return 1
+
+
+class _UnpicklableController(BaseController):
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+
+    @get("/")
+    @offload(processes=True)
+    def index(self) -> int:
+        return 1
+
+
+@ADAPTERS
+@pytest.mark.parametrize("controller", [_AsyncOffloadController, _UnpicklableController])
+def test_invalid_offloading_is_rejected_on_mount(adapter: type, controller: type) -> None:
+    api = SomeAPI("Test", "1", adapter=adapter)
+
+    with pytest.raises(ValueError, match="index"):
+        api.mount(controller())
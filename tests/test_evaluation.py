@@ -0,0 +1,57 @@
+import asyncio
+
+from limits import parse
+from limits.aio.storage import MemoryStorage
+from limits.aio.strategies import MovingWindowRateLimiter
+
+from my_web_framework.plugins.rate_limiter.evaluation import evaluate_limits
+from my_web_framework.plugins.rate_limiter.storages import ShardedMemoryStorage
+
+
+class _CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def acquire_entry(self, *args, **kwargs) -> bool:  # noqa: ANN002, ANN003
+        self.calls += 1
+        return await super().acquire_entry(*args, **kwargs)
+
+    async def get_moving_window(self, *args, **kwargs) -> tuple[int, int]:  # noqa: ANN002, ANN003
+        self.calls += 1
+        return await super().get_moving_window(*args, **kwargs)
+
+
+def test_rejected_request_does_not_consume_other_limits() -> None:
+    async def evaluate() -> None:
+        limiter = MovingWindowRateLimiter(MemoryStorage())
+        limits = [(parse("1/second"), "key"), (parse("10/minute"), "key")]
+
+        assert (await evaluate_limits(limiter, limits)).failed is None
+        assert (await evaluate_limits(limiter, limits)).failed == 0
+        assert (await limiter.get_window_stats(parse("10/minute"), "key")).remaining == 9
+
+    asyncio.run(evaluate())
+
+
+def test_admitted_request_calls() -> None:
+    async def evaluate() -> None:
+        storage = _CountingStorage()
+        limits = [(parse("1/second"), "key"), (parse("5/minute"), "key"), (parse("10/hour"), "key")]
+
+        assert (await evaluate_limits(MovingWindowRateLimiter(storage), limits)).failed is None
+        assert storage.calls == 2 * len(limits) - 1
+
+    asyncio.run(evaluate())
+
+
+def test_multi_limit_storage_is_atomic() -> None:
+    async def evaluate() -> None:
+        limiter = MovingWindowRateLimiter(ShardedMemoryStorage())
+        limits = [(parse("1/second"), "key"), (parse("10/minute"), "key")]
+
+        assert (await evaluate_limits(limiter, limits)).failed is None
+        assert (await evaluate_limits(limiter, limits)).failed == 0
+        assert (await limiter.get_window_stats(parse("10/minute"), "key")).remaining == 9
+
+    asyncio.run(evaluate())
@@ -0,0 +1,36 @@
+import asyncio
+
+from my_web_framework.instrumentation import MetricsCollector
+from my_web_framework.plugins.rate_limiter.health import StorageHealthMonitor, StorageState
+
+
+class _Storage:
+    def __init__(self, results: list[bool]) -> None:
+        self.results = results
+
+    async def check(self) -> bool:
+        return self.results.pop(0)
+
+
+def test_state_and_transitions_are_recorded() -> None:
+    metrics = MetricsCollector()
+    monitor = StorageHealthMonitor(
+        _Storage([False, False, True]), on_transition=lambda *_: None, failure_threshold=2, recovery_threshold=1,
+    )
+    monitor.instrument(metrics)
+
+    async def probe() -> None:
+        await monitor.probe()
+        await monitor.probe()
+        assert monitor.state is StorageState.FAILED
+        assert 'rate_limit_storage_state{state="failed"} 1' in metrics.render().decode()
+        await monitor.probe()
+
+    asyncio.run(probe())
+
+    rendered = metrics.render().decode()
+    assert 'rate_limit_storage_state{state="healthy"} 1' in rendered
+    assert 'rate_limit_storage_state{state="failed"} 0' in rendered
+    assert 'rate_limit_storage_transitions_total{from="healthy",to="degraded"} 1' in rendered
+    assert 'rate_limit_storage_transitions_total{from="degraded",to="failed"} 1' in rendered
+    assert 'rate_limit_storage_transitions_total{from="failed",to="healthy"} 1' in rendered
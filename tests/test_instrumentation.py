@@ -0,0 +1,92 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.instrumentation import PROMETHEUS_MEDIA_TYPE, MetricsCollector, MetricsController
+from tests.asgi_client import ASGIClient
+
+ADAPTERS = pytest.mark.parametrize("adapter", [ASGIAdapter, FastAPIAdapter], ids=["asgi", "fastapi"])
+
+
+class _Controller(BaseController):
+    @get("/items/{item_id}")
+    async def item(self, item_id: int) -> int:
+        return item_id
+
+
+def test_counters_and_gauges_are_rendered_with_labels() -> None:
+    metrics = MetricsCollector()
+    metrics.counter("requests_total", "Handled requests", method="GET", path='/a"b').inc()
+    metrics.counter("requests_total", "Handled requests", path='/a"b', method="GET").inc(2)
+    metrics.gauge("queue_size", "Queued requests").set(1.5)
+
+    assert metrics.render().decode().splitlines() == [
+        "# HELP queue_size Queued requests",
+        "# TYPE queue_size gauge",
+        "queue_size 1.5",
+        "# HELP requests_total Handled requests",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET",path="/a\\"b"} 3',
+    ]
+
+
+def test_histograms_are_rendered_with_cumulative_buckets() -> None:
+    metrics = MetricsCollector()
+    histogram = metrics.histogram("duration_seconds", "Request duration", (0.1, 1), endpoint="index")
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    assert metrics.render().decode().splitlines() == [
+        "# HELP duration_seconds Request duration",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{endpoint="index",le="0.1"} 2',
+        'duration_seconds_bucket{endpoint="index",le="1.0"} 3',
+        'duration_seconds_bucket{endpoint="index",le="+Inf"} 4',
+        'duration_seconds_sum{endpoint="index"} 3.65',
+        'duration_seconds_count{endpoint="index"} 4',
+    ]
+
+
+def test_metric_kinds_cannot_be_mixed() -> None:
+    metrics = MetricsCollector()
+    metrics.counter("requests", "Requests")
+
+    with pytest.raises(ValueError, match="is a counter"):
+        metrics.gauge("requests", "Requests")
+
+
+@ADAPTERS
+def test_requests_are_timed_and_served_to_prometheus(adapter: type) -> None:
+    metrics = MetricsCollector()
+    api = SomeAPI("Test", "1", adapter=adapter, instrumentation=metrics)
+    api.mount(_Controller())
+    api.mount(MetricsController(metrics))
+
+    async def run() -> tuple[int, dict[bytes, bytes], list[str]]:
+        client = ASGIClient(api)
+        await client.request("GET", "/items/1")
+        await client.request("GET", "/items/2")
+        response = await client.request("GET", "/metrics")
+        return response.status, dict(response.headers), response.body.decode().splitlines()
+
+    status, headers, lines = asyncio.run(run())
+
+    assert status == 200
+    assert headers[b"content-type"] == PROMETHEUS_MEDIA_TYPE.encode()
+    labels = 'endpoint="_Controller.item",method="GET",status="200"'
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+
+
+def test_instrumentation_does_not_import_starlette() -> None:
+    # A fresh interpreter, so modules imported by other tests do not count
+    code = "import sys, my_web_framework.instrumentation; print(any(m.startswith('starlette') for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, text=True)  # noqa: S603
+
+    assert result.stdout.strip() == "False"
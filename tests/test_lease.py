@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from limits import RateLimitItem, parse
+from limits.aio.storage import MemoryStorage
+from limits.aio.strategies import MovingWindowRateLimiter
+
+from my_web_framework.plugins.rate_limiter import lease
+from my_web_framework.plugins.rate_limiter.evaluation import evaluate_limits
+from my_web_framework.plugins.rate_limiter.lease import LeasedRateLimiter
+
+
+class _RecordingLimiter(MovingWindowRateLimiter):
+    def __init__(self) -> None:
+        super().__init__(MemoryStorage())
+        self.costs: list[int] = []
+
+    async def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        self.costs.append(cost)
+        return await super().hit(item, *identifiers, cost=cost)
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(lease, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _hits(limiter: LeasedRateLimiter, item: RateLimitItem, count: int) -> list[bool]:
+    async def run() -> list[bool]:
+        return [await limiter.hit(item, "key") for _ in range(count)]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.usefixtures("clock")
+def test_lease_is_acquired_with_its_size_and_drawn_down_locally() -> None:
+    recording = _RecordingLimiter()
+    limiter = LeasedRateLimiter(recording, lease_size=5)
+
+    assert _hits(limiter, parse("10/minute"), 6) == [True] * 6
+    assert recording.costs == [5, 5]
+
+
+@pytest.mark.usefixtures("clock")
+def test_exhausted_lease_falls_back_to_exact_hits() -> None:
+    recording = _RecordingLimiter()
+    limiter = LeasedRateLimiter(recording, lease_size=5)
+
+    assert _hits(limiter, parse("7/minute"), 8) == [True] * 7 + [False]
+    # The second lease does not fit, the remaining quota is hit one at a time
+    assert recording.costs == [5, 5, 1, 1, 1]
+
+
+def test_leases_expire(clock: SimpleNamespace) -> None:
+    recording = _RecordingLimiter()
+    limiter = LeasedRateLimiter(recording, lease_size=5, lease_ttl=1.0)
+    item = parse("100/minute")
+
+    assert _hits(limiter, item, 2) == [True, True]
+    clock.now = 1.0
+    assert _hits(limiter, item, 1) == [True]
+    # Budget left over by the expired lease is not used
+    assert recording.costs == [5, 5]
+
+
+@pytest.mark.usefixtures("clock")
+def test_evaluation_tests_leased_budget_before_hitting() -> None:
+    recording = _RecordingLimiter()
+    limiter = LeasedRateLimiter(recording, lease_size=2)
+    limits = [(parse("3/minute"), "key"), (parse("10/minute"), "key")]
+
+    async def evaluate() -> list[int | None]:
+        return [(await evaluate_limits(limiter, limits)).failed for _ in range(4)]
+
+    assert asyncio.run(evaluate()) == [None, None, None, 0]
+    # Leases of both limits are drawn down by the second request, the third one leases again
+    # and falls back to an exact hit of the tight limit, the rejected fourth one hits nothing
+    assert recording.costs == [2, 2, 2, 2, 1]
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from my_web_framework.exceptions import HttpException
+from my_web_framework.plugins._base import Handler
+from my_web_framework.plugins.load_shedding import LoadSheddingPlugin, Priority
+from my_web_framework.plugins.load_shedding import plugin as load_shedding
+from my_web_framework.plugins.load_shedding.annotations import _PriorityAnnotation
+from my_web_framework.plugins.load_shedding.exceptions import LoadSheddingError
+
+REQUEST = SimpleNamespace()
+TIERS = (Priority.HIGH, Priority.NORMAL, Priority.LOW)
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [0.0]
+    monkeypatch.setattr(load_shedding, "time", SimpleNamespace(perf_counter=lambda: now[0]))
+    return now
+
+
+def _timed_handler(clock: list[float]) -> Handler:
+    async def handler(_: Any, kwargs: dict[str, Any]) -> dict:  # noqa: ANN401
+        await asyncio.sleep(0)
+        clock[0] += kwargs["elapsed"]
+        if kwargs.get("reject"):
+            raise HttpException(status_code=429, headers={}, content=b"")
+        return {}
+
+    return handler
+
+
+def test_lower_tiers_are_shed_first() -> None:
+    # No request is sampled, so the limit stays put
+    plugin = LoadSheddingPlugin(initial_limit=10, sample_every=1000)
+
+    async def blocking(_: Any, kwargs: dict[str, Any]) -> dict:  # noqa: ANN401
+        await kwargs["release"].wait()
+        return {}
+
+    async def quick(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        return {}
+
+    holder = plugin.wrap([_PriorityAnnotation(Priority.HIGH)], blocking)
+    tiers = {tier: plugin.wrap([_PriorityAnnotation(tier)], quick) for tier in TIERS}
+
+    async def shed_tiers(in_flight: int) -> list[Priority]:
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(holder(REQUEST, {"release": release})) for _ in range(in_flight)]
+        await asyncio.sleep(0)
+        shed = []
+        for tier, handler in tiers.items():
+            try:
+                await handler(REQUEST, {})
+            except LoadSheddingError:
+                shed.append(tier)
+        release.set()
+        await asyncio.gather(*tasks)
+        return shed
+
+    assert asyncio.run(shed_tiers(7)) == []
+    assert asyncio.run(shed_tiers(8)) == [Priority.LOW]
+    assert asyncio.run(shed_tiers(9)) == [Priority.NORMAL, Priority.LOW]
+    assert plugin.shed == 3
+    assert plugin.wrap([_PriorityAnnotation(Priority.CRITICAL)], quick) is None
+
+
+def test_limit_grows_by_one_while_latencies_are_low(clock: list[float]) -> None:
+    plugin = LoadSheddingPlugin(initial_limit=2, sample_every=1)
+    handler = plugin.wrap([], _timed_handler(clock))
+
+    async def run() -> None:
+        await asyncio.gather(handler(REQUEST, {"elapsed": 0.01}), handler(REQUEST, {"elapsed": 0.01}))
+
+    asyncio.run(run())
+
+    # Only the first request completed while the limit was half used
+    assert plugin.limit == 3
+
+
+def test_limit_is_cut_by_backoff_down_to_the_minimum(clock: list[float]) -> None:
+    plugin = LoadSheddingPlugin(initial_limit=100, min_limit=10, backoff=0.5, sample_every=1)
+    handler = plugin.wrap([], _timed_handler(clock))
+
+    async def run() -> list[int]:
+        await handler(REQUEST, {"elapsed": 0.01})
+        limits = []
+        for _ in range(4):
+            await handler(REQUEST, {"elapsed": 0.05})
+            limits.append(plugin.limit)
+        return limits
+
+    assert asyncio.run(run()) == [50, 25, 12, 10]
+
+
+def test_rejected_requests_are_not_sampled(clock: list[float]) -> None:
+    plugin = LoadSheddingPlugin(initial_limit=100, sample_every=1)
+    handler = plugin.wrap([], _timed_handler(clock))
+
+    async def run() -> None:
+        with pytest.raises(HttpException):
+            await handler(REQUEST, {"elapsed": 0.001, "reject": True})
+        await handler(REQUEST, {"elapsed": 0.01})
+
+    asyncio.run(run())
+
+    assert plugin.limit == 100
+
+
+def test_loop_lag_lowers_the_limit() -> None:
+    plugin = LoadSheddingPlugin(initial_limit=100, max_loop_lag=0.005, lag_check_interval=0.01, sample_every=1)
+
+    async def blocking(_: Any, __: dict[str, Any]) -> dict:  # noqa: ANN401
+        # Keeps the event loop busy, so the probe wakes up late
+        time.sleep(0.1)
+        return {}
+
+    handler = plugin.wrap([], blocking)
+
+    async def run() -> float:
+        await plugin.startup()
+        await asyncio.sleep(0.02)
+        await handler(REQUEST, {})
+        await asyncio.sleep(0.001)
+        lag = plugin.loop_lag
+        await handler(REQUEST, {})
+        await plugin.shutdown()
+        return lag
+
+    assert asyncio.run(run()) > 0.005
+    # The first request sets the baseline, the second one is as fast but sees the lag
+    assert plugin.limit == 90
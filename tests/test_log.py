@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from my_web_framework import log
+from my_web_framework.log import LoggingPipeline, SamplingFilter, _NonBlockingQueueHandler
+
+
+class _RecordingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [0.0]
+    monkeypatch.setattr(log, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _record(msg: str, *args: object, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("my_web_framework.test", level, __file__, 1, msg, args, None)
+
+
+def _passed(sampling: SamplingFilter, records: list[logging.LogRecord]) -> list[str]:
+    return [record.getMessage() for record in records if sampling.filter(record)]
+
+
+def test_records_are_sampled_per_message(clock: list[float]) -> None:
+    sampling = SamplingFilter(per_second=2)
+
+    assert _passed(sampling, [_record("hit %s", i) for i in range(5)]) == ["hit 0", "hit 1"]
+    assert _passed(sampling, [_record("other")]) == ["other"]
+
+    clock[0] = 1.0
+    assert _passed(sampling, [_record("hit %s", 5)]) == ["hit 5 (3 similar messages suppressed)"]
+
+
+def test_warnings_are_not_sampled(clock: list[float]) -> None:  # noqa: ARG001
+    sampling = SamplingFilter(per_second=1)
+
+    records = [_record("slow %s", i, level=logging.WARNING) for i in range(3)]
+    assert _passed(sampling, records) == ["slow 0", "slow 1", "slow 2"]
+
+
+def test_tracked_messages_are_capped(clock: list[float]) -> None:
+    sampling = SamplingFilter(per_second=1, max_messages=2)
+
+    # The third message is not tracked, so it is not sampled either
+    assert _passed(sampling, [_record(f"message {i}") for i in (0, 1, 2, 2)]) == [
+        "message 0", "message 1", "message 2", "message 2",
+    ]
+
+    # Expired windows make room for new messages
+    clock[0] = 1.0
+    assert _passed(sampling, [_record("message 3"), _record("message 3")]) == ["message 3"]
+
+
+def test_records_are_dropped_when_the_queue_is_full() -> None:
+    handler = _NonBlockingQueueHandler(queue.Queue(1))
+
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
+
+
+def test_records_are_written_from_a_background_thread() -> None:
+    handler = _RecordingHandler()
+    pipeline = LoggingPipeline([handler], level=logging.DEBUG, logger_name="my_web_framework.test_log")
+    logger = logging.getLogger("my_web_framework.test_log")
+
+    pipeline.start()
+    pipeline.start()
+    assert not logger.propagate
+    logger.debug("written %s", 1)
+    pipeline.stop()
+    pipeline.stop()
+    logger.debug("not written")
+
+    assert handler.messages == ["written 1"]
+    assert threading.current_thread().name not in handler.threads
+    assert logger.propagate
+    assert not logger.handlers
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from collections.abc import Callable
+
+import pytest
+from starlette.requests import Request
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.base_adapter import BaseAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, Endpoint, get
+from my_web_framework.mount_plan import MountPlan, endpoint_fingerprint
+from my_web_framework.plugins.rate_limiter import RateLimiterPlugin, limit
+from tests.asgi_client import ASGIClient
+
+
+class _Controller(BaseController):
+    @get("/items/{item_id}")
+    @limit("10/minute", key=lambda item_id: item_id)
+    async def item(self, item_id: int, page: int = 1) -> list[int]:
+        return [item_id, page]
+
+    @get("/other")
+    async def other(self, request: Request) -> str:
+        return request.url.path
+
+
+def _mount(plan: MountPlan | None = None) -> SomeAPI:
+    api = SomeAPI("Test", "1", plugins=[RateLimiterPlugin()], adapter=ASGIAdapter, mount_plan=plan)
+    api.mount(_Controller())
+    return api
+
+
+def _handler(source: str) -> Callable:
+    # Compiled on every call, so nested code objects are distinct objects
+    namespace: dict = {}
+    exec(source, namespace)  # noqa: S102
+    return namespace["handler"]
+
+
+def _fingerprint(source: str) -> str | None:
+    return endpoint_fingerprint(Endpoint(_handler(source), "/", {"GET"}, []))
+
+
+def test_saved_plans_are_reused(monkeypatch: pytest.MonkeyPatch) -> None:
+    data = _mount().mount_plan.dumps()
+    plan = MountPlan.loads(data)
+
+    assert plan.dumps() == data
+    assert len(plan) == 2
+
+    def match_plugins(*_: object) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(BaseAdapter, "_supported_plugins", match_plugins)
+    with pytest.raises(AssertionError):
+        _mount()
+    api = _mount(plan)
+
+    async def run() -> list[tuple[int, bytes]]:
+        client = ASGIClient(api)
+        responses = [
+            await client.request("GET", "/items/3", query_string=b"page=2"),
+            await client.request("GET", "/other"),
+        ]
+        return [(response.status, response.body) for response in responses]
+
+    assert asyncio.run(run()) == [(200, b"[3,2]"), (200, b'"/other"')]
+
+
+def test_plans_of_other_plugins_or_versions_are_ignored() -> None:
+    plan = _mount().mount_plan
+    key = next(key for key in json.loads(plan.dumps())["endpoints"] if ".item " in key)
+    fingerprint = endpoint_fingerprint(_Controller().endpoints()[0])
+
+    assert plan.get(key, fingerprint, [RateLimiterPlugin()]) is not None
+    assert plan.get(key, fingerprint, []) is None
+    assert plan.get(key, "changed", [RateLimiterPlugin()]) is None
+    assert len(MountPlan.loads('{"version": 0}')) == 0
+
+
+def test_fingerprints_follow_the_code_of_handlers() -> None:
+    source = """
+async def handler(self, kind: str) -> bool:
+    check = lambda value: value in {"a", "b", "c"}
+    return check(kind) and len(kind) > 0
+"""
+
+    assert _fingerprint(source) == _fingerprint(source)
+    # Constants and names are referred to by index from the bytecode, so only they change here
+    assert _fingerprint(source) != _fingerprint(source.replace('"c"', '"d"'))
+    assert _fingerprint(source) != _fingerprint(source.replace("> 0", "> 1"))
+    assert _fingerprint(source) != _fingerprint(source.replace("len(kind)", "hash(kind)"))
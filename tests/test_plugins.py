@@ -0,0 +1,97 @@
+import asyncio
+from collections.abc import MutableMapping
+from typing import Any
+
+import pytest
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.fastapi_adapter import FastAPIAdapter
+from my_web_framework.annotations import Annotation
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.plugins._base import Handler, Interceptor, Plugin, Send, Stage
+from tests.asgi_client import ASGIClient
+
+ADAPTERS = pytest.mark.parametrize("adapter", [ASGIAdapter, FastAPIAdapter], ids=["asgi", "fastapi"])
+
+
+class _RecordingPlugin(Plugin):
+    def __init__(self, name: str, calls: list[str], *, wraps: bool = True) -> None:
+        self.__name = name
+        self.__calls = calls
+        self.__wraps = wraps
+
+    def is_global(self) -> bool:
+        return True
+
+    def compile(self, annotations: list[Annotation]) -> Stage:  # noqa: ARG002
+        async def stage(_: Any, __: dict[str, Any]) -> None:  # noqa: ANN401
+            self.__calls.append(f"{self.__name} stage")
+
+        return stage
+
+    def wrap(self, annotations: list[Annotation], handler: Handler) -> Handler | None:  # noqa: ARG002
+        if not self.__wraps:
+            return None
+
+        async def wrapper(request: Any, kwargs: dict[str, Any]) -> Any:  # noqa: ANN401
+            self.__calls.append(f"{self.__name} wrap")
+            result = await handler(request, kwargs)
+            self.__calls.append(f"{self.__name} unwrap")
+            return result
+
+        return wrapper
+
+    def intercept(self, annotations: list[Annotation]) -> Interceptor:  # noqa: ARG002
+        def interceptor(_: Any, send: Send) -> Send:  # noqa: ANN401
+            async def recording_send(message: MutableMapping[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    self.__calls.append(f"{self.__name} start")
+                    message["headers"] = [*message["headers"], (b"x-plugin", self.__name.encode())]
+                await send(message)
+
+            return recording_send
+
+        return interceptor
+
+
+class _Controller(BaseController):
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    @get("/")
+    async def index(self) -> str:
+        self.calls.append("handler")
+        return "ok"
+
+
+@ADAPTERS
+def test_plugins_are_applied_in_order(adapter: type) -> None:
+    calls: list[str] = []
+    plugins = [
+        _RecordingPlugin("first", calls),
+        _RecordingPlugin("second", calls, wraps=False),
+        _RecordingPlugin("third", calls),
+    ]
+    api = SomeAPI("Test", "1", plugins=plugins, adapter=adapter)
+    api.mount(_Controller(calls))
+
+    response = asyncio.run(ASGIClient(api).request("GET", "/"))
+
+    assert response.status == 200
+    # Stages and wrappers of a plugin run within the wrappers of the plugins listed before it
+    assert calls == [
+        "first wrap",
+        "first stage",
+        "second stage",
+        "third wrap",
+        "third stage",
+        "handler",
+        "third unwrap",
+        "first unwrap",
+        # The first plugin receives messages first, so later plugins see its changes
+        "first start",
+        "second start",
+        "third start",
+    ]
+    assert [value for name, value in response.headers if name == b"x-plugin"] == [b"first", b"second", b"third"]
@@ -0,0 +1,75 @@
+import asyncio
+from collections.abc import Sequence
+
+import pytest
+from limits import RateLimitItem
+from limits.aio.strategies import RateLimiter
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.annotations import Annotation
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.plugins._base import Stage
+from my_web_framework.plugins.rate_limiter import RateLimiterPlugin, limit, plugin
+from my_web_framework.plugins.rate_limiter.evaluation import EvaluationResult, evaluate_limits
+from tests.asgi_client import ASGIClient
+
+
+class _CountingPlugin(RateLimiterPlugin):
+    def __init__(self) -> None:
+        super().__init__()
+        self.compiled = 0
+
+    def compile(self, annotations: list[Annotation]) -> Stage:
+        self.compiled += 1
+        return super().compile(annotations)
+
+
+class _Controller(BaseController):
+    @get("/names/{name}")
+    @limit("2/minute", key=lambda name: name)
+    async def name(self, name: str) -> str:
+        return name
+
+    @get("/other")
+    @limit("5/minute", key=lambda: "other")
+    async def other(self) -> str:
+        return "other"
+
+
+def _statuses(api: SomeAPI, paths: list[str]) -> list[int]:
+    async def run() -> list[int]:
+        client = ASGIClient(api)
+        return [(await client.request("GET", path)).status for path in paths]
+
+    return asyncio.run(run())
+
+
+def test_limits_are_compiled_once_per_endpoint() -> None:
+    counting = _CountingPlugin()
+    api = SomeAPI("Test", "1", plugins=[counting], adapter=ASGIAdapter)
+    api.mount(_Controller())
+
+    assert counting.compiled == 2
+    assert _statuses(api, ["/names/a", "/names/a", "/names/a", "/names/b", "/other"]) == [200, 200, 429, 200, 200]
+    assert counting.compiled == 2
+
+
+@pytest.mark.parametrize(("deny_cache_size", "evaluations"), [(None, 4), (100, 3)])
+def test_denied_keys_skip_the_storage(
+    monkeypatch: pytest.MonkeyPatch, deny_cache_size: int | None, evaluations: int,
+) -> None:
+    evaluated: list[Sequence[tuple[RateLimitItem, str]]] = []
+
+    async def counting_evaluate_limits(
+        limiter: RateLimiter, limits: Sequence[tuple[RateLimitItem, str]],
+    ) -> EvaluationResult:
+        evaluated.append(limits)
+        return await evaluate_limits(limiter, limits)
+
+    monkeypatch.setattr(plugin, "evaluate_limits", counting_evaluate_limits)
+    api = SomeAPI("Test", "1", plugins=[RateLimiterPlugin(deny_cache_size=deny_cache_size)], adapter=ASGIAdapter)
+    api.mount(_Controller())
+
+    assert _statuses(api, ["/names/a"] * 4) == [200, 200, 429, 429]
+    assert len(evaluated) == evaluations
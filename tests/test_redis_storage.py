@@ -0,0 +1,144 @@
+"""Multi-limit semantics of the Redis script.
+
+The script runs against the Redis server at `REDIS_URL` if it is set, and always
+against an in-process fake executing it with Lua through `lupa`.
+"""
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from limits import parse
+
+from my_web_framework.plugins.rate_limiter.storages import RedisMultiLimitStorage
+
+TIGHT = parse("2/second")
+LOOSE = parse("3/minute")
+
+
+class _FakeRedis:
+    """Keeps lists in memory and runs scripts with an embedded Lua runtime."""
+
+    def __init__(self) -> None:
+        lupa = pytest.importorskip("lupa")
+        self.__lua = lupa.LuaRuntime(unpack_returned_tuples=True)
+        self.lists: dict[str, list[str]] = {}
+        self.calls = 0
+
+    def call(self, command: str, key: str, *args: Any) -> Any:  # noqa: ANN401
+        items = self.lists.setdefault(key, [])
+        if command == "lindex":
+            index = int(args[0])
+            return items[index] if index < len(items) else None
+        if command == "lpush":
+            items[:0] = [str(arg) for arg in reversed(args)]
+            return len(items)
+        if command == "ltrim":
+            self.lists[key] = items[int(args[0]):int(args[1]) + 1]
+            return "OK"
+        if command == "expire":
+            return 1
+        if command == "lrange":
+            return self.__lua.table_from(items[int(args[0]):int(args[1]) + 1])
+        raise NotImplementedError(command)
+
+    def register_script(self, source: str) -> Any:  # noqa: ANN401
+        fake, lua = self, self.__lua
+
+        class Script:
+            async def execute(self, keys: list[str], args: list[Any]) -> list[Any]:
+                fake.calls += 1
+                lua.globals().KEYS = lua.table_from([str(key) for key in keys])
+                lua.globals().ARGV = lua.table_from([str(arg) for arg in args])
+                lua.globals().redis = lua.table_from({"call": fake.call})
+                result = lua.execute(source)
+                return [result[index] for index in range(1, len(result) + 1)]
+
+        return Script()
+
+
+def _fake_storage() -> RedisMultiLimitStorage:
+    storage = RedisMultiLimitStorage("async+redis://localhost:6379")
+    storage.storage = _FakeRedis()
+    storage.initialize_storage("")
+    return storage
+
+
+def _redis_storage() -> RedisMultiLimitStorage:
+    url = os.environ.get("REDIS_URL")
+    if url is None:
+        pytest.skip("REDIS_URL is not set")
+    storage = RedisMultiLimitStorage(url.replace("redis", "async+redis", 1))
+    asyncio.run(storage.reset())
+    return storage
+
+
+@pytest.fixture(params=[_fake_storage, _redis_storage], ids=["fake", "redis"])
+def storage(request: pytest.FixtureRequest) -> RedisMultiLimitStorage:
+    return request.param()
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Callable[[float], None]:
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    def advance(seconds: float) -> None:
+        now[0] += seconds
+
+    return advance
+
+
+def _entries(key: str) -> list[tuple[str, int, int]]:
+    return [(limit.key_for(key), limit.amount, limit.get_expiry()) for limit in (TIGHT, LOOSE)]
+
+
+@pytest.mark.usefixtures("clock")
+def test_admitted_request_reports_the_first_limit(storage: RedisMultiLimitStorage) -> None:
+    result = asyncio.run(storage.acquire_entries(_entries("ip")))
+
+    assert result.failed is None
+    assert result.remaining == TIGHT.amount - 1
+
+
+def test_rejected_request_does_not_consume_other_limits(storage: RedisMultiLimitStorage, clock: Callable) -> None:
+    async def run() -> None:
+        assert (await storage.acquire_entries(_entries("ip"))).failed is None
+        assert (await storage.acquire_entries(_entries("ip"))).failed is None
+
+        rejected = await storage.acquire_entries(_entries("ip"))
+        assert rejected.failed == 0
+        assert rejected.remaining == 0
+        assert rejected.reset_time == pytest.approx(time.time() + TIGHT.get_expiry())
+
+        # Only the two admitted requests count towards the loose limit
+        clock(TIGHT.get_expiry() + 0.1)
+        assert (await storage.acquire_entries(_entries("ip"))).failed is None
+
+        clock(TIGHT.get_expiry() + 0.1)
+        rejected = await storage.acquire_entries(_entries("ip"))
+        assert rejected.failed == 1
+        assert rejected.remaining == 0
+
+    asyncio.run(run())
+
+
+@pytest.mark.usefixtures("clock")
+def test_keys_are_limited_separately(storage: RedisMultiLimitStorage) -> None:
+    async def run() -> None:
+        for _ in range(TIGHT.amount):
+            assert (await storage.acquire_entries(_entries("a"))).failed is None
+        assert (await storage.acquire_entries(_entries("a"))).failed == 0
+        assert (await storage.acquire_entries(_entries("b"))).failed is None
+
+    asyncio.run(run())
+
+
+def test_one_script_call_per_request() -> None:
+    storage = _fake_storage()
+
+    asyncio.run(storage.acquire_entries(_entries("ip")))
+
+    assert storage.storage.calls == 1
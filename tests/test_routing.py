@@ -0,0 +1,50 @@
+import pytest
+
+from my_web_framework.routing import MethodNotAllowedError, RouteNotFoundError, Router
+
+
+def test_static_route_takes_precedence_over_parameter() -> None:
+    router: Router[str] = Router()
+    router.add("/a/b", ["GET"], "static")
+    router.add("/a/{x}", ["GET"], "parameter")
+
+    assert router.match("GET", "/a/b") == ("static", {})
+    assert router.match("GET", "/a/c") == ("parameter", {"x": "c"})
+
+
+def test_method_mismatch_falls_back_to_parameter_route() -> None:
+    router: Router[str] = Router()
+    router.add("/a/b", ["GET"], "static")
+    router.add("/a/{x}", ["POST"], "parameter")
+
+    assert router.match("POST", "/a/b") == ("parameter", {"x": "b"})
+
+
+def test_method_mismatch_falls_back_to_deeper_parameter_route() -> None:
+    router: Router[str] = Router()
+    router.add("/a/b/c", ["GET"], "static")
+    router.add("/a/{x}/c", ["DELETE"], "parameter")
+
+    assert router.match("DELETE", "/a/b/c") == ("parameter", {"x": "b"})
+
+
+def test_method_not_allowed_lists_methods_of_every_matching_route() -> None:
+    router: Router[str] = Router()
+    router.add("/a/b", ["GET"], "static")
+    router.add("/a/{x}", ["POST"], "parameter")
+
+    with pytest.raises(MethodNotAllowedError) as e:
+        router.match("PUT", "/a/b")
+    assert e.value.allowed == {"GET", "POST"}
+
+    with pytest.raises(MethodNotAllowedError) as e:
+        router.match("PUT", "/a/c")
+    assert e.value.allowed == {"POST"}
+
+
+def test_unknown_path() -> None:
+    router: Router[str] = Router()
+    router.add("/a/{x}", ["GET"], "parameter")
+
+    with pytest.raises(RouteNotFoundError):
+        router.match("GET", "/b/c")
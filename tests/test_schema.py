@@ -0,0 +1,123 @@
+import asyncio
+import gzip
+import json
+from collections.abc import Sequence
+
+import pytest
+
+from my_web_framework.adapters.asgi_adapter import ASGIAdapter
+from my_web_framework.adapters.fastapi_adapter import SCHEMA_URL, FastAPIAdapter
+from my_web_framework.api import SomeAPI
+from my_web_framework.controller import BaseController, get
+from my_web_framework.schema import StaticResponse
+from tests.asgi_client import ASGIClient, Response
+
+BODY = json.dumps({"paths": {f"/items/{i}": {} for i in range(100)}}).encode()
+
+
+class _Controller(BaseController):
+    @get("/items")
+    async def items(self) -> list:
+        return []
+
+
+class _OtherController(BaseController):
+    @get("/other")
+    async def other(self) -> list:
+        return []
+
+
+def _request(
+    app: StaticResponse | SomeAPI, headers: Sequence[tuple[bytes, bytes]] = (), method: str = "GET",
+) -> tuple[Response, dict[bytes, bytes]]:
+    async def run() -> Response:
+        return await ASGIClient(app).request(method, SCHEMA_URL, headers=headers)
+
+    response = asyncio.run(run())
+    return response, dict(response.headers)
+
+
+def test_representations_have_etags_of_their_own() -> None:
+    app = StaticResponse(BODY, "application/json")
+
+    identity, identity_headers = _request(app)
+    compressed, compressed_headers = _request(app, [(b"accept-encoding", b"gzip")])
+
+    assert identity.body == BODY
+    assert b"content-encoding" not in identity_headers
+    assert identity_headers[b"etag"] == app.etag.encode()
+    assert compressed_headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(compressed.body) == BODY
+    assert compressed_headers[b"etag"] != identity_headers[b"etag"]
+    for headers in (identity_headers, compressed_headers):
+        assert headers[b"vary"] == b"Accept-Encoding"
+        assert headers[b"etag"].startswith(b'"')
+
+
+def test_small_bodies_are_not_compressed() -> None:
+    app = StaticResponse(b"{}", "application/json")
+
+    response, headers = _request(app, [(b"accept-encoding", b"gzip")])
+
+    assert response.body == b"{}"
+    assert b"content-encoding" not in headers
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "if_none_match", "status"),
+    [
+        (b"identity", "{identity}", 304),
+        (b"identity", 'W/"other", {identity}', 304),
+        (b"identity", "*", 304),
+        (b"identity", "W/{identity}", 304),
+        (b"identity", '"other"', 200),
+        (b"gzip", "{gzip}", 304),
+        # Each coding is validated with its own ETag
+        (b"gzip", "{identity}", 200),
+    ],
+)
+def test_revalidation(accept_encoding: bytes, if_none_match: str, status: int) -> None:
+    app = StaticResponse(BODY, "application/json")
+    _, gzip_headers = _request(app, [(b"accept-encoding", b"gzip")])
+    etags = {"identity": app.etag, "gzip": gzip_headers[b"etag"].decode()}
+
+    response, headers = _request(
+        app, [(b"accept-encoding", accept_encoding), (b"if-none-match", if_none_match.format(**etags).encode())],
+    )
+
+    assert response.status == status
+    assert headers[b"vary"] == b"Accept-Encoding"
+    if status == 304:
+        assert response.body == b""
+
+
+def test_head_requests_get_headers_only() -> None:
+    app = StaticResponse(BODY, "application/json")
+
+    response, headers = _request(app, method="HEAD")
+
+    assert response.body == b""
+    assert headers[b"content-length"] == str(len(BODY)).encode()
+
+
+def test_schema_is_rendered_again_after_mounting() -> None:
+    api = SomeAPI("Test", "1", adapter=FastAPIAdapter)
+    api.mount(_Controller())
+
+    response, headers = _request(api)
+    assert response.status == 200
+    assert list(json.loads(response.body)["paths"]) == ["/items"]
+    assert _request(api, [(b"if-none-match", headers[b"etag"])])[0].status == 304
+
+    api.mount(_OtherController())
+
+    response, _ = _request(api, [(b"if-none-match", headers[b"etag"])])
+    assert response.status == 200
+    assert list(json.loads(response.body)["paths"]) == ["/items", "/other"]
+
+
+def test_asgi_adapter_serves_no_schema() -> None:
+    api = SomeAPI("Test", "1", adapter=ASGIAdapter)
+    api.mount(_Controller())
+
+    assert _request(api)[0].status == 404
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from limits import parse
+from limits.aio.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+from my_web_framework.plugins.rate_limiter.storages import ShardedMemoryStorage, sharded_memory
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    clock = SimpleNamespace(now=600.0)
+    monkeypatch.setattr(sharded_memory, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def _hits(limiter: MovingWindowRateLimiter, limit: str, key: str, count: int) -> list[bool]:
+    async def run() -> list[bool]:
+        return [await limiter.hit(parse(limit), key) for _ in range(count)]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.usefixtures("clock")
+def test_keys_are_admitted_up_to_the_limit() -> None:
+    limiter = MovingWindowRateLimiter(ShardedMemoryStorage())
+
+    assert _hits(limiter, "3/minute", "a", 4) == [True, True, True, False]
+    assert _hits(limiter, "3/minute", "b", 1) == [True]
+
+
+def test_previous_window_is_weighted_in(clock: SimpleNamespace) -> None:
+    limiter = MovingWindowRateLimiter(ShardedMemoryStorage())
+    assert _hits(limiter, "4/minute", "a", 4) == [True] * 4
+
+    # Half of the previous window still overlaps with the moving window
+    clock.now += 90
+    assert _hits(limiter, "4/minute", "a", 3) == [True, True, False]
+
+
+def test_full_storage_rejects_new_keys_instead_of_evicting(clock: SimpleNamespace) -> None:
+    storage = ShardedMemoryStorage(shards="1", max_entries="2")
+    limiter = MovingWindowRateLimiter(storage)
+    assert _hits(limiter, "2/minute", "a", 1) == [True]
+    assert _hits(limiter, "2/minute", "b", 1) == [True]
+
+    assert _hits(limiter, "2/minute", "c", 1) == [False]
+    # Counters of other keys are kept, so they cannot be reset by flooding new keys
+    assert _hits(limiter, "2/minute", "a", 2) == [True, False]
+    assert len(storage) == 2
+
+    # Expired counters make room again
+    clock.now += 120
+    assert _hits(limiter, "2/minute", "c", 1) == [True]
+
+
+@pytest.mark.usefixtures("clock")
+def test_full_storage_rejects_fixed_window_hits() -> None:
+    storage = ShardedMemoryStorage(shards="1", max_entries="1")
+    limiter = FixedWindowRateLimiter(storage)
+
+    assert _hits(limiter, "2/minute", "a", 1) == [True]
+    assert _hits(limiter, "2/minute", "b", 1) == [False]
+
+
+@pytest.mark.usefixtures("clock")
+def test_acquire_entries_consumes_all_limits_or_none() -> None:
+    storage = ShardedMemoryStorage()
+
+    async def acquire() -> list[int | None]:
+        entries = [("a/second", 1, 1), ("a/minute", 10, 60)]
+        return [(await storage.acquire_entries(entries)).failed for _ in range(2)]
+
+    assert asyncio.run(acquire()) == [None, 0]
+    assert asyncio.run(storage.get_moving_window("a/minute", 10, 60))[1] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import multiprocessing
+from pathlib import Path
+
+import pytest
+from limits import parse
+from limits.aio.strategies import MovingWindowRateLimiter
+
+pytest.importorskip("fcntl")
+
+from my_web_framework.plugins.rate_limiter.storages import SharedMemoryStorage  # noqa: E402
+
+LIMIT = parse("500/hour")
+KEYS = ("a", "b", "c")
+PROCESSES = 4
+HITS = 600
+
+
+def _hit(uri: str, results: multiprocessing.Queue) -> None:
+    async def run() -> int:
+        limiter = MovingWindowRateLimiter(SharedMemoryStorage(uri))
+        return sum([await limiter.hit(LIMIT, KEYS[i % len(KEYS)]) for i in range(HITS)])
+
+    results.put(asyncio.run(run()))
+
+
+def test_processes_are_admitted_exactly_up_to_the_limit(tmp_path: Path) -> None:
+    uri = f"async+shared-memory:///limits?directory={tmp_path}&stripes=4&slots=64"
+    results: multiprocessing.Queue = multiprocessing.Queue()
+
+    processes = [multiprocessing.Process(target=_hit, args=(uri, results)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    admitted = sum(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join()
+
+    assert admitted == LIMIT.amount * len(KEYS)
+
+
+def test_hits_are_rejected_rather_than_evicting_live_counters(tmp_path: Path) -> None:
+    # A single stripe with as many slots as a key can probe, so every key competes for the same slots
+    storage = SharedMemoryStorage(f"async+shared-memory:///limits?directory={tmp_path}&stripes=1&slots=8")
+    limiter = MovingWindowRateLimiter(storage)
+
+    async def run() -> None:
+        for i in range(SharedMemoryStorage.PROBE_LENGTH):
+            assert await limiter.hit(LIMIT, f"key-{i}")
+
+        assert not await limiter.hit(LIMIT, "another-key")
+        assert (await limiter.get_window_stats(LIMIT, "key-0")).remaining == LIMIT.amount - 1
+
+    asyncio.run(run())
+
+
+def _hold_table(path: Path, locked: multiprocessing.Event, seconds: float) -> None:
+    import fcntl
+    import time
+
+    with path.open("r+b") as f:
+        fcntl.lockf(f, fcntl.LOCK_EX, 0, 0)
+        locked.set()
+        time.sleep(seconds)
+        fcntl.lockf(f, fcntl.LOCK_UN, 0, 0)
+
+
+def test_waiting_for_a_lock_does_not_block_the_event_loop(tmp_path: Path) -> None:
+    storage = SharedMemoryStorage(f"async+shared-memory:///limits?directory={tmp_path}&stripes=4&slots=64")
+    locked = multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold_table, args=(tmp_path / "limits", locked, 0.3))
+    holder.start()
+    assert locked.wait(timeout=10)
+
+    async def run() -> tuple[bool, int]:
+        ticks = 0
+        hit = asyncio.ensure_future(MovingWindowRateLimiter(storage).hit(LIMIT, "key"))
+        while not hit.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return hit.result(), ticks
+
+    admitted, ticks = asyncio.run(run())
+    holder.join()
+
+    assert admitted
+    assert ticks > 10
@@ -0,0 +1,109 @@
+import asyncio
+import contextlib
+import threading
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from my_web_framework.encoders import JSONEncoder
+from my_web_framework.streaming import ServerSentEvent, Stream, as_stream, ndjson, send_stream, sse
+
+ENCODER = JSONEncoder()
+
+
+async def _body(stream: Stream) -> tuple[str | None, list[bytes]]:
+    await stream.prepare()
+    return stream.media_type, [chunk async for chunk in stream.chunks(ENCODER)]
+
+
+def test_bytes_and_strings_are_sent_as_they_are() -> None:
+    assert asyncio.run(_body(Stream(iter([b"a,", "b,"])))) == ("application/octet-stream", [b"a,", b"b,"])
+    assert asyncio.run(_body(Stream(iter([])))) == ("application/octet-stream", [])
+
+
+def test_other_items_are_sent_as_ndjson() -> None:
+    assert asyncio.run(_body(Stream(iter([{"i": 0}, [1]])))) == ("application/x-ndjson", [b'{"i":0}\n', b"[1]\n"])
+
+
+def test_given_media_type_is_kept() -> None:
+    stream = Stream(iter([1, 2]), media_type="text/plain")
+
+    assert asyncio.run(_body(stream)) == ("text/plain", [b"1", b"2"])
+
+
+def test_only_iterators_are_streamed() -> None:
+    assert as_stream([1, 2]) is None
+    assert as_stream("text") is None
+    assert as_stream(iter([1])) is not None
+
+
+def test_sync_iterators_run_off_the_event_loop() -> None:
+    threads = set()
+
+    def items() -> Iterator[bytes]:
+        for item in (b"a", b"b"):
+            threads.add(threading.current_thread())
+            yield item
+
+    assert asyncio.run(_body(Stream(items())))[1] == [b"a", b"b"]
+    assert threading.main_thread() not in threads
+
+
+def test_generators_are_closed_when_the_client_goes_away() -> None:
+    closed = False
+
+    async def items() -> AsyncIterator[bytes]:
+        nonlocal closed
+        try:
+            for item in (b"a", b"b", b"c"):
+                yield item
+        finally:
+            closed = True
+
+    async def first_chunk() -> bytes:
+        stream = Stream(items())
+        await stream.prepare()
+        async with contextlib.aclosing(stream.chunks(ENCODER)) as chunks:
+            return await anext(chunks)
+
+    assert asyncio.run(first_chunk()) == b"a"
+    assert closed
+
+
+def test_ndjson_encodes_every_item() -> None:
+    assert asyncio.run(_body(ndjson(iter(["a", {"b": 1}])))) == ("application/x-ndjson", [b'"a"\n', b'{"b":1}\n'])
+
+
+def test_sse_framing() -> None:
+    events = [
+        ServerSentEvent({"a": 1}, event="update", id="1", retry=500),
+        "first\nsecond",
+        "",
+    ]
+
+    media_type, chunks = asyncio.run(_body(sse(iter(events))))
+
+    assert media_type == "text/event-stream"
+    assert chunks == [
+        b'event: update\nid: 1\nretry: 500\ndata: {"a":1}\n\n',
+        b"data: first\ndata: second\n\n",
+        b"data: \n\n",
+    ]
+
+
+def test_send_stream() -> None:
+    messages: list[dict[str, Any]] = []
+
+    async def send(message: dict[str, Any]) -> None:
+        messages.append(message)
+
+    asyncio.run(send_stream(send, 200, sse(iter(["x"])), ENCODER))
+
+    assert messages == [
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        },
+        {"type": "http.response.body", "body": b"data: x\n\n", "more_body": True},
+        {"type": "http.response.body", "body": b"", "more_body": False},
+    ]